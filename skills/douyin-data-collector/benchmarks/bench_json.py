@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时接口响应解析微基准
+功能：构造与 handler_user_profile_v4 / APP 接口体量相当的响应体，
+对比 requests 默认的 response.json()（解码为 str 后 json.loads）、
+fast_json.extract_profile（选择性提取）与 orjson 完整解析的单次耗时与峰值内存
+
+用法：
+    python3 benchmarks/bench_json.py
+    python3 benchmarks/bench_json.py --size 200 --iterations 500 --json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import fast_json  # noqa: E402
+
+
+def build_payload(size_kb, seed=42):
+    """
+    构造约 size_kb KB 的实时接口响应体
+
+    用户对象带有大量嵌套字段（头像多尺寸地址、认证信息、作品列表摘要等），
+    follower_count、code、time 与真实响应一样各出现一次。
+    """
+    rng = random.Random(seed)
+
+    def url_list(name):
+        return {'uri': f"{name}/{rng.getrandbits(64):x}",
+                'url_list': [f"https://p{i}.douyinpic.com/{name}/{rng.getrandbits(64):x}.jpeg?from=profile"
+                             for i in range(3)],
+                'width': 720, 'height': 720}
+
+    user = {
+        'sec_user_id': 'MS4wLjABAAAA' + 'x' * 64,
+        'uid': str(rng.getrandbits(60)),
+        'nickname': '示例账号',
+        'signature': '合作请私信 📮 ' * 4,
+        'follower_count': 1234567,
+        'following_count': 321,
+        'total_favorited': 98765432,
+        'aweme_count': 1024,
+        'avatar_thumb': url_list('avatar_thumb'),
+        'avatar_medium': url_list('avatar_medium'),
+        'avatar_larger': url_list('avatar_larger'),
+        'cover_url': [url_list('cover') for _ in range(4)],
+        'verification': {'type': 1, 'reason': '知名博主', 'status_code': 0},
+        'tab_settings': {f"tab_{i}": {'show': bool(i % 2), 'title': f"标签{i}"} for i in range(20)},
+    }
+    items = []
+    while len(json.dumps(user, ensure_ascii=False).encode('utf-8')) < size_kb * 1024:
+        items.append({
+            'aweme_id': str(rng.getrandbits(63)),
+            'desc': '今日分享 #日常 #vlog ' * rng.randint(1, 4),
+            'statistics': {'digg_count': rng.randint(0, 10 ** 6), 'comment_count': rng.randint(0, 10 ** 4),
+                           'share_count': rng.randint(0, 10 ** 4), 'play_count': rng.randint(0, 10 ** 7)},
+            'video': {'cover': url_list('video_cover'), 'duration': rng.randint(5000, 600000)},
+        })
+        user['aweme_list'] = items
+
+    payload = {
+        'code': 200,
+        'router': '/api/v1/douyin/web/handler_user_profile_v4',
+        'params': {'sec_user_id': user['sec_user_id']},
+        'data': {'status_code': 0, 'user': user, 'extra': {'now': int(time.time() * 1000)}},
+        'time': '2026-10-17 12:30:00',
+        'time_stamp': int(time.time()),
+    }
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def requests_json(body):
+    """requests.Response.json() 的等价实现：按编码解码为 str 后完整解析"""
+    return json.loads(body.decode('utf-8'))
+
+
+def orjson_loads(body):
+    return fast_json.orjson.loads(body)
+
+
+def measure(func, body, iterations):
+    """返回 (单次耗时中位数 µs, 单次调用峰值内存 KB)"""
+    func(body)
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(body)
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+
+    tracemalloc.start()
+    func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return durations[len(durations) // 2] * 1e6, peak / 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='实时接口响应解析微基准')
+    parser.add_argument('--size', type=int, default=100, help='响应体大小（KB）')
+    parser.add_argument('--iterations', type=int, default=200, help='每种解析方式的重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出报告')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    body = build_payload(args.size)
+    expected = requests_json(body)['data']['user']['follower_count']
+
+    candidates = [('response.json()', requests_json),
+                  ('fast_json.extract_profile', fast_json.extract_profile)]
+    if fast_json.orjson is not None:
+        candidates.append(('orjson.loads', orjson_loads))
+
+    report = {'body_bytes': len(body), 'results': []}
+    for name, func in candidates:
+        assert func(body)['data']['user']['follower_count'] == expected
+        median_us, peak_kb = measure(func, body, args.iterations)
+        report['results'].append({'parser': name, 'median_us': round(median_us, 1), 'peak_kb': round(peak_kb, 1)})
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    baseline = report['results'][0]['median_us']
+    print(f"响应体 {len(body) / 1024:.1f} KB，每种方式 {args.iterations} 次")
+    print(f"{'解析方式':<28} {'耗时中位数':>12} {'加速比':>8} {'峰值内存':>12}")
+    for row in report['results']:
+        print(f"{row['parser']:<28} {row['median_us']:>10.1f}µs {baseline / row['median_us']:>7.1f}x "
+              f"{row['peak_kb']:>10.1f}KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TikHub / 飞书接口的本地模拟服务
+功能：在本机端口上模拟采集器用到的全部接口，支持注入延迟、错误率与超时，
+供压测脚本在不消耗真实接口配额的情况下测量吞吐与延迟
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class Faults:
+    """
+    故障注入配置
+
+    Args:
+        latency: 每个请求的基础延迟（秒）
+        jitter: 在基础延迟上叠加的随机延迟上限（秒）
+        error_rate: 返回 HTTP 500 的概率
+        timeout_rate: 挂起 hang 秒后才响应的概率（用于触发客户端读取超时）
+        hang: 模拟超时时挂起的秒数
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0, hang=15.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+
+    def apply(self, rng):
+        """按配置等待，返回是否应当返回错误"""
+        if self.timeout_rate and rng.random() < self.timeout_rate:
+            time.sleep(self.hang)
+        elif self.latency or self.jitter:
+            time.sleep(self.latency + rng.random() * self.jitter)
+        return bool(self.error_rate) and rng.random() < self.error_rate
+
+
+class MockServer:
+    """
+    单个模拟主机
+
+    按路径后缀分派到 handle_* 方法；faults 为 {路径关键字: Faults}，
+    关键字为 '*' 时对全部路径生效。counts 按路径统计请求数。
+    """
+
+    name = 'mock'
+
+    def __init__(self, faults=None, seed=None):
+        self.faults = faults or {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, port=0):
+        """在后台线程中启动服务，port 为 0 时自动分配端口"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _faults_for(self, path):
+        for key, faults in self.faults.items():
+            if key != '*' and key in path:
+                return faults
+        return self.faults.get('*')
+
+    def _dispatch(self, handler, method):
+        parts = urlsplit(handler.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = json.loads(handler.rfile.read(length) or b'{}') if length else {}
+
+        with self._lock:
+            self.counts[parts.path] += 1
+
+        faults = self._faults_for(parts.path)
+        if faults is not None:
+            with self._rng_lock:
+                rng = random.Random(self._rng.random())
+            if faults.apply(rng):
+                return self._send(handler, 500, {'code': 500, 'msg': 'injected error'})
+
+        status, payload = self.route(method, parts.path, query, body)
+        self._send(handler, status, payload)
+
+    def route(self, method, path, query, body):
+        return 404, {'code': 404, 'msg': 'not found'}
+
+    @staticmethod
+    def _send(handler, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        try:
+            handler.send_response(status)
+            handler.send_header('Content-Type', 'application/json')
+            handler.send_header('Content-Length', str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已超时断开
+            pass
+
+
+class TikHubMock(MockServer):
+    """模拟 TikHub 实时接口（handler_user_profile*）与历史接口（kol_daily_fans_v1）"""
+
+    name = 'tikhub'
+
+    def route(self, method, path, query, body):
+        if 'handler_user_profile' in path:
+            sec_user_id = query.get('sec_user_id', '')
+            return 200, {
+                'code': 200,
+                'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'data': {'user': {'sec_user_id': sec_user_id,
+                                  'follower_count': 10000 + sum(map(ord, sec_user_id))}}
+            }
+        if 'kol_daily_fans' in path:
+            start = datetime.strptime(query['startDate'], '%Y-%m-%d')
+            end = datetime.strptime(query['endDate'], '%Y-%m-%d')
+            daily, delta = [], []
+            day = start
+            while day <= end:
+                date_str = day.strftime('%Y-%m-%d')
+                daily.append({'date': date_str, 'fans_cnt': 9000 + day.toordinal() % 1000})
+                delta.append({'date': date_str, 'fans_cnt': 10})
+                day += timedelta(days=1)
+            return 200, {'code': 200, 'data': {'daily': daily, 'delta': delta}}
+        return super().route(method, path, query, body)
+
+
+class FeishuMock(MockServer):
+    """模拟飞书 tenant_access_token、多维表格 records 接口与 im/v1/messages"""
+
+    name = 'feishu'
+
+    def __init__(self, faults=None, seed=None):
+        super().__init__(faults, seed)
+        self.records = {}
+        self._client_tokens = {}
+
+    def route(self, method, path, query, body):
+        if path.endswith('/tenant_access_token/internal'):
+            return 200, {'code': 0, 'tenant_access_token': f"t-{uuid.uuid4().hex}", 'expire': 7200}
+        if path.endswith('/im/v1/messages'):
+            return 200, {'code': 0, 'data': {'message_id': f"om_{uuid.uuid4().hex[:16]}"}}
+        if path.endswith('/records/search'):
+            return self._search(query, body)
+
+        client_token = query.get('client_token')
+        with self._lock:
+            if client_token and client_token in self._client_tokens:
+                return 200, self._client_tokens[client_token]
+            if path.endswith('/records/batch_create'):
+                created = [self._create(record['fields']) for record in body.get('records', [])]
+                payload = {'code': 0, 'data': {'records': created}}
+            elif path.endswith('/records/batch_update'):
+                for record in body.get('records', []):
+                    self.records.get(record['record_id'], {}).update(record['fields'])
+                payload = {'code': 0, 'data': {'records': body.get('records', [])}}
+            elif path.endswith('/records'):
+                payload = {'code': 0, 'data': {'record': self._create(body.get('fields', {}))}}
+            else:
+                return super().route(method, path, query, body)
+            if client_token:
+                self._client_tokens[client_token] = payload
+        return 200, payload
+
+    def _create(self, fields):
+        record_id = f"rec{uuid.uuid4().hex[:10]}"
+        self.records[record_id] = dict(fields)
+        return {'record_id': record_id, 'fields': fields}
+
+    def _search(self, query, body):
+        """支持 is / isGreater / isLess 条件与分页"""
+        conditions = body.get('filter', {}).get('conditions', [])
+        conjunction = body.get('filter', {}).get('conjunction', 'and')
+
+        def matches(fields):
+            results = []
+            for cond in conditions:
+                value = fields.get(cond['field_name'])
+                expected = cond['value'][-1] if cond['value'] else None
+                if cond['field_name'] == '统计日期文本':
+                    value = datetime.fromtimestamp(fields.get('统计日期', 0) / 1000).strftime('%Y-%m-%d')
+                if cond['operator'] == 'is':
+                    results.append(str(value) == str(expected))
+                elif cond['operator'] == 'isGreater':
+                    results.append(value is not None and value > int(expected))
+                elif cond['operator'] == 'isLess':
+                    results.append(value is not None and value < int(expected))
+                else:
+                    results.append(False)
+            if not results:
+                return True
+            return all(results) if conjunction == 'and' else any(results)
+
+        with self._lock:
+            items = [{'record_id': record_id, 'fields': dict(fields)}
+                     for record_id, fields in self.records.items() if matches(fields)]
+
+        page_size = int(query.get('page_size', 20))
+        offset = int(query.get('page_token') or 0)
+        page = items[offset:offset + page_size]
+        has_more = offset + page_size < len(items)
+        return 200, {'code': 0, 'data': {
+            'items': page,
+            'has_more': has_more,
+            'page_token': str(offset + page_size) if has_more else '',
+            'total': len(items)
+        }}
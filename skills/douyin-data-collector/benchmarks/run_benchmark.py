@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集器离线压测
+功能：启动本地 TikHub / 飞书模拟服务，用 N 个虚拟账号驱动采集器，
+输出吞吐（账号/秒）、各阶段 p50/p99 耗时与每个主机的请求数
+
+用法：
+    python3 benchmarks/run_benchmark.py --accounts 200 --mode batch --workers 16 --latency 0.05
+    python3 benchmarks/run_benchmark.py --accounts 2000 --mode async --error-rate 0.02 --json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from collector import DouyinDataCollector  # noqa: E402
+from endpoint_health import quantile  # noqa: E402
+from mock_servers import FeishuMock, Faults, TikHubMock  # noqa: E402
+
+# 统计耗时的采集阶段：阶段名 -> 方法名
+PHASES = {
+    'token': 'get_feishu_tenant_token',
+    'realtime': 'fetch_realtime_data',
+    'history': 'fetch_history_range',
+    'previous_day': 'get_previous_day_fans',
+    'write': 'write_to_feishu',
+    'notify': 'send_feishu_message',
+    'account': '_collect_account',
+}
+
+
+class PhaseTimer:
+    """记录各阶段每次调用的耗时（秒）"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.samples[phase].append(seconds)
+
+    def wrap(self, obj, phase, name):
+        """将 obj.name 替换为计时版本（同步或异步方法均可）"""
+        method = getattr(obj, name, None)
+        if method is None:
+            return
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - started)
+        else:
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - started)
+
+        setattr(obj, name, timed)
+
+    def summary(self):
+        return {
+            phase: {
+                'count': len(values),
+                'p50_ms': round(quantile(values, 0.5) * 1000, 2),
+                'p99_ms': round(quantile(values, 0.99) * 1000, 2),
+                'max_ms': round(max(values) * 1000, 2),
+            }
+            for phase, values in sorted(self.samples.items())
+        }
+
+
+def build_config(args, tikhub, feishu, cache):
+    """生成指向模拟服务的采集器配置"""
+    realtime_urls = [f"{tikhub.base_url}/api/v1/douyin/web/handler_user_profile_v{i + 1}"
+                     for i in range(args.realtime_endpoints)]
+    config = {
+        'accounts': [{'name': f"bench{i:05d}", 'sec_user_id': f"MS4wLjABAAAA{i:08d}", 'kol_id': f"{7000000 + i}"}
+                     for i in range(args.accounts)],
+        'tikhub': {
+            'api_key': 'bench',
+            'realtime_api_urls': realtime_urls,
+            'history_api_urls': [f"{tikhub.base_url}/api/v1/douyin/xingtu/kol_daily_fans_v1"],
+        },
+        'feishu': {
+            'app_id': 'cli_bench',
+            'app_secret': 'bench',
+            'app_token': 'bascnBench',
+            'table_id': 'tblBench',
+            'chat_id': 'oc_bench',
+            'account_field': '账号',
+            'base_url': f"{feishu.base_url}/open-apis",
+        },
+        'batch': {'workers': args.workers},
+        'async': {'workers': args.workers},
+        'http': {'read_timeout': args.read_timeout, 'retries': args.retries},
+        'cache': {'dir': str(cache)},
+    }
+    if args.hedge:
+        config['tikhub']['realtime_hedge'] = {'mode': 'hedge', 'delay': args.hedge}
+    return config
+
+
+def run_collection(collector, args, timer):
+    """按模式执行一次采集，返回结果行"""
+    if args.mode == 'async':
+        from async_engine import AsyncDouyinCollector
+
+        engine = AsyncDouyinCollector(collector)
+        for phase, name in PHASES.items():
+            timer.wrap(engine, phase, name)
+        return engine.collect_all()
+
+    for phase, name in PHASES.items():
+        timer.wrap(collector, phase, name)
+
+    if args.mode == 'batch':
+        return collector.collect_batch(workers=args.workers)
+
+    rows = []
+    for account in collector.accounts:
+        rows.append(collector._result_row(account, collector.collect(account=account)))
+    return rows
+
+
+def run_benchmark(args):
+    """启动模拟服务并执行压测，返回报告"""
+    realtime_faults = Faults(args.latency, args.jitter, args.realtime_error_rate
+                             if args.realtime_error_rate is not None else args.error_rate,
+                             args.timeout_rate, args.read_timeout + 1)
+    default_faults = Faults(args.latency, args.jitter, args.error_rate, args.timeout_rate, args.read_timeout + 1)
+    tikhub = TikHubMock({'handler_user_profile': realtime_faults, '*': default_faults}, seed=args.seed).start()
+    feishu = FeishuMock({'*': Faults(args.feishu_latency, args.jitter, args.error_rate)}, seed=args.seed).start()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='douyin-bench-') as tmp:
+            config_path = Path(tmp) / 'config.json'
+            config = build_config(args, tikhub, feishu, Path(tmp) / 'cache')
+            config_path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+
+            timer = PhaseTimer()
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                collector = DouyinDataCollector(config_path)
+                try:
+                    started = time.perf_counter()
+                    rows = run_collection(collector, args, timer)
+                    elapsed = time.perf_counter() - started
+                finally:
+                    collector.close()
+    finally:
+        tikhub.stop()
+        feishu.stop()
+
+    succeeded = sum(1 for row in rows if row['success'])
+    return {
+        'mode': args.mode,
+        'accounts': args.accounts,
+        'workers': args.workers,
+        'succeeded': succeeded,
+        'failed': len(rows) - succeeded,
+        'elapsed_s': round(elapsed, 3),
+        'accounts_per_s': round(len(rows) / elapsed, 2) if elapsed else None,
+        'phases': timer.summary(),
+        'requests': {
+            server.name: {'total': sum(server.counts.values()), 'paths': dict(server.counts.most_common())}
+            for server in (tikhub, feishu)
+        },
+    }
+
+
+def print_report(report):
+    """打印压测报告"""
+    print("=" * 60)
+    print(f"模式 {report['mode']}，账号 {report['accounts']}，并发 {report['workers']}")
+    print(f"耗时 {report['elapsed_s']}s，吞吐 {report['accounts_per_s']} 账号/秒，"
+          f"成功 {report['succeeded']}，失败 {report['failed']}")
+    print("-" * 60)
+    print(f"{'阶段':<14} {'次数':>8} {'p50(ms)':>10} {'p99(ms)':>10} {'max(ms)':>10}")
+    for phase, stats in report['phases'].items():
+        print(f"{phase:<14} {stats['count']:>8} {stats['p50_ms']:>10} {stats['p99_ms']:>10} {stats['max_ms']:>10}")
+    print("-" * 60)
+    for host, stats in report['requests'].items():
+        print(f"{host}: {stats['total']} 次请求")
+        for path, count in stats['paths'].items():
+            print(f"    {count:>8}  {path}")
+    print("=" * 60)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='采集器离线压测')
+    parser.add_argument('--accounts', type=int, default=100, help='虚拟账号数')
+    parser.add_argument('--mode', choices=('single', 'batch', 'async'), default='batch',
+                        help='single: 逐个调用 collect()；batch: collect_batch；async: 异步引擎')
+    parser.add_argument('--workers', type=int, default=8, help='并发数')
+    parser.add_argument('--realtime-endpoints', type=int, default=3, help='实时接口数量')
+    parser.add_argument('--hedge', type=float, help='开启实时接口对冲并指定延迟（秒）')
+    parser.add_argument('--latency', type=float, default=0.05, help='TikHub 接口基础延迟（秒）')
+    parser.add_argument('--feishu-latency', type=float, default=0.02, help='飞书接口基础延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.02, help='随机附加延迟上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='接口返回 500 的概率')
+    parser.add_argument('--realtime-error-rate', type=float, help='实时接口单独的错误率（用于测试降级）')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='TikHub 接口超时的概率')
+    parser.add_argument('--read-timeout', type=float, default=2.0, help='采集器读取超时（秒）')
+    parser.add_argument('--retries', type=int, default=0, help='传输层重试次数')
+    parser.add_argument('--seed', type=int, default=42, help='故障注入随机种子')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出报告')
+    parser.add_argument('--verbose', action='store_true', help='保留采集器的日志输出')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0 if report['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
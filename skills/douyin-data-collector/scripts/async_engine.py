@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步采集引擎
+功能：基于 asyncio + aiohttp 在单进程内并发采集成千上万个账号
+依赖：aiohttp（可选依赖，pip3 install aiohttp）
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import collector as sync_collector
+from fast_json import loads as json_loads
+from rate_limit import quota_exhausted, throttle_delay
+from steps import Call, Launch, Request, Wait
+from transport import RequestCancelled
+
+# 同时处理的账号数、全局与单主机最大并发连接数
+DEFAULT_ASYNC_WORKERS = 200
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 50
+
+
+class ResponseStatusError(Exception):
+    """HTTP 状态码 >= 400（status 供接口健康度统计区分限流）"""
+
+    def __init__(self, status, message=None):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+
+
+class AsyncDouyinCollector:
+    """
+    异步采集器
+
+    单账号的采集步骤（实时接口及对冲 → 前一天粉丝数 → 去重 → 写入 → 通知，
+    实时接口失败时降级到历史接口）与 DouyinDataCollector 共用同一份实现
+    （DouyinDataCollector._account_steps，见 steps.py），本引擎只负责执行其中的副作用：
+    网络请求在一个事件循环中并发执行，本地 SQLite 读写与索引同步在线程池中执行，不阻塞事件循环。
+    配置、账号列表、飞书 token、本地表格索引、限流器与调用预算均复用传入的同步采集器。
+
+    账号由固定数量的 worker 协程依次领取，不会一次性为所有账号创建任务，
+    内存占用与账号总数基本无关。
+
+    配置项（config.json 的 async 段，均可选）：
+        workers: 同时处理的账号数
+        limit: 全局最大并发连接数
+        limit_per_host: 单个主机最大并发连接数
+    """
+
+    def __init__(self, collector, options=None):
+        if aiohttp is None:
+            raise RuntimeError("异步采集引擎需要 aiohttp，请执行: pip3 install aiohttp")
+
+        self.collector = collector
+        self.config = collector.config
+
+        options = options or self.config.get('async', {})
+        self.workers = int(options.get('workers', DEFAULT_ASYNC_WORKERS))
+        self.limit = int(options.get('limit', DEFAULT_LIMIT))
+        self.limit_per_host = int(options.get('limit_per_host', DEFAULT_LIMIT_PER_HOST))
+
+        connect_timeout, read_timeout = collector.http.timeout
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._session = None
+
+    def collect(self, target_date=None, account=None):
+        """同步入口：采集单个账号，返回结果表的一行"""
+        account = account or self.collector.accounts[0]
+        return asyncio.run(self.collect_many([account], target_date))[0]
+
+    def collect_all(self, accounts=None, target_date=None):
+        """同步入口：采集全部账号，返回结果表"""
+        return asyncio.run(self.collect_many(accounts, target_date))
+
+    async def collect_many(self, accounts=None, target_date=None):
+        """
+        并发采集多个账号
+
+        Args:
+            accounts: 账号列表（可选），默认为配置中的全部账号
+            target_date: 目标日期（可选），默认为今天
+
+        Returns:
+            list: 每个账号一行结果，与 DouyinDataCollector.collect_batch 相同
+        """
+        accounts = accounts or self.collector.accounts
+        loop = asyncio.get_running_loop()
+
+        # 获取 token、同步本地索引都可能阻塞，放到线程池中执行
+        with self.collector.metrics.span('token') as span:
+            token = await loop.run_in_executor(None, self.collector.get_feishu_tenant_token)
+            if not token:
+                span.outcome = 'fail'
+        if not token:
+            return [self.collector._result_row(account, {'success': False, 'message': '获取飞书 token 失败'})
+                    for account in accounts]
+
+        # 同步本地索引；索引不可用时将去重查询（当天）与前一天粉丝数（昨天）合并为少量分页查询
+        today = datetime.now()
+        dates = [(today - timedelta(days=1)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')]
+        await loop.run_in_executor(None, self.collector.prefetch_records, accounts, dates)
+
+        workers = max(1, min(self.workers, len(accounts)))
+        print(f"👥 异步采集 {len(accounts)} 个账号，并发账号数 {workers}，"
+              f"最大连接数 {self.limit}（单主机 {self.limit_per_host}）")
+
+        results = [None] * len(accounts)
+        pending = iter(enumerate(accounts))
+        digest = self.collector._notify_mode(len(accounts)) == 'digest'
+
+        async def worker():
+            for idx, account in pending:
+                try:
+                    result = await self._collect_account(account, target_date, not digest)
+                except Exception as e:
+                    result = {'success': False, 'message': f'采集异常: {e}'}
+                results[idx] = self.collector._result_row(account, result)
+
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            self._session = session
+            try:
+                await asyncio.gather(*(worker() for _ in range(workers)))
+            finally:
+                self._session = None
+                self.collector._planned = {}
+
+        if digest:
+            title = f"抖音粉丝日报 {target_date or datetime.now().strftime('%Y-%m-%d')}"
+            await loop.run_in_executor(None, self.collector.send_digest, accounts, results, title)
+        return results
+
+    async def _blocking(self, func, *args):
+        """在线程池中执行可能阻塞的同步调用（本地索引同步、SQLite 读写），不阻塞事件循环"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _collect_account(self, account, target_date=None, notify=True):
+        """单账号采集流程：以 aiohttp 执行 DouyinDataCollector._account_steps，整体耗时记为 account 阶段"""
+        return await self._drive(self.collector._account_steps(account, target_date, notify))
+
+    async def _drive(self, steps):
+        """
+        以 aiohttp 执行一组采集步骤（产出 steps.py 中副作用的生成器），返回生成器的返回值
+
+        本地调用在线程池中执行，Launch 的步骤作为任务并发执行；同步采集器的驱动见 DouyinDataCollector._drive
+        """
+        value, error = None, None
+        while True:
+            try:
+                effect = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                value = await self._perform(effect)
+            except Exception as e:
+                error = e
+
+    async def _perform(self, effect):
+        """执行一个步骤副作用，见 steps.py"""
+        if isinstance(effect, Call):
+            return await self._blocking(effect.func, *effect.args)
+        if isinstance(effect, Request):
+            return await self._request(effect)
+        if isinstance(effect, Launch):
+            # 异步请求可以真正取消，未被采用的对冲请求立即释放连接
+            return asyncio.ensure_future(self._drive(effect.steps))
+        if isinstance(effect, Wait):
+            return await asyncio.wait(effect.pending, timeout=effect.timeout, return_when=asyncio.FIRST_COMPLETED)
+        raise TypeError(f"未知的步骤副作用: {effect!r}")
+
+    async def _request(self, effect):
+        """执行一个 Request：返回解析后的响应数据，状态码 >= 400 时抛出 ResponseStatusError"""
+        if effect.cancel is not None and effect.cancel.is_set():
+            raise RequestCancelled(f"请求已取消: {effect.url}")
+        kwargs = {key: value for key, value in (('params', effect.params), ('json', effect.json),
+                                                ('headers', effect.headers)) if value is not None}
+        if effect.timeout is not None:
+            connect_timeout, read_timeout = effect.timeout
+            kwargs['timeout'] = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        parse = effect.parse or json_loads
+        if effect.feishu:
+            return await self._feishu_request(effect.method, effect.url, parse, **kwargs)
+        status, data = await self._request_json(effect.method, effect.url, parse, **kwargs)
+        if status >= 400:
+            raise ResponseStatusError(status)
+        return data
+
+    async def _request_json(self, method, url, parse=json_loads, **kwargs):
+        """
+        发送请求并解析 JSON，返回 (HTTP 状态码, 响应数据)
+
+        parse 为响应体的解析函数，默认完整解析（安装了 orjson 时使用 orjson）。
+
+        每次发送前与同步传输层一样经过 collector.http.send_guard（调度器的调用预算）检查，
+        再向限流器申请令牌；被限流时按响应头退避后重试。
+        每次请求的状态码、响应字节数与耗时记入 collector.metrics。
+        """
+        limiter = self.collector.rate_limiter
+        metrics = self.collector.metrics
+        for attempt in range(limiter.throttle_retries + 1):
+            guard = self.collector.http.send_guard
+            release = guard(url) if guard is not None else None
+            if guard is not None and release is None:
+                raise RequestCancelled("调用预算不足，请求未发出")
+            sent = None
+            try:
+                await limiter.acquire_async(url)
+                sent = False
+                started = time.perf_counter()
+                try:
+                    async with self._session.request(method, url, **kwargs) as response:
+                        body = await response.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    metrics.http(method, url, None, 0, time.perf_counter() - started, type(e).__name__)
+                    raise
+                sent = True
+            finally:
+                # 发出后结果未知（异常、被取消）时按已发出计入预算
+                if release is not None:
+                    release(sent is False)
+            metrics.http(method, url, response.status, len(body), time.perf_counter() - started)
+
+            try:
+                data = parse(body)
+            except ValueError:
+                data = None
+            body_code = data.get('code') if isinstance(data, dict) else None
+            wait = throttle_delay(response.status, response.headers, body_code)
+
+            if wait is None or attempt == limiter.throttle_retries:
+                exhausted = quota_exhausted(response.headers) if wait is None else None
+                if exhausted:
+                    limiter.pause(url, exhausted)
+                if data is None:
+                    raise ValueError(f"HTTP {response.status}: 响应不是合法的 JSON")
+                return response.status, data
+
+            if limiter.bucket_for(url) is None:
+                await asyncio.sleep(wait)
+            else:
+                limiter.pause(url, wait)
+
+    async def _feishu_request(self, method, url, parse=json_loads, **kwargs):
+        """携带 tenant_access_token 请求飞书接口，token 失效时重新鉴权并重试一次"""
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.setdefault('Content-Type', 'application/json')
+        for attempt in range(2):
+            token = self.collector.feishu_token
+            headers['Authorization'] = f'Bearer {token}'
+            status, data = await self._request_json(method, url, parse, headers=headers, **kwargs)
+            if attempt == 0 and data.get('code') in sync_collector.FEISHU_INVALID_TOKEN_CODES:
+                print(f"🔑 飞书 token 已失效，重新获取...")
+                if await self._blocking(self.collector._refresh_tenant_token, token):
+                    continue
+            if status >= 400:
+                raise ResponseStatusError(status, data.get('msg'))
+            return data
@@ -6,13 +6,85 @@
 策略：优先使用实时接口，降级到历史接口
 """
 
+import argparse
+import asyncio
+import csv
 import json
 import os
 import requests
+import sqlite3
 import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from endpoint_health import EndpointHealth
+from fast_json import extract_profile, loads as json_loads
+from rate_limit import RateLimiter
+from snapshot_store import SnapshotStore
+from steps import Call, Launch, Request, Wait, handle_result
+from history_cache import HistoryCache, iter_dates
+from lookup_planner import LookupPlanner, date_from_condition, date_range_conditions
+from metrics import Metrics
+from notify import NotificationDigest
+from outbox import DEFAULT_MAX_ROWS, DEFAULT_RETENTION_DAYS, WriteOutbox
+from storage import FileLock, cache_dir
+from table_index import BitableIndex, field_number, field_text, record_date
+from token_cache import TenantTokenCache
+from transport import HttpTransport, RequestCancelled
+
+# 飞书开放平台接口地址（默认值，可通过 feishu.base_url 覆盖，如 Lark 国际版或本地压测桩）
+FEISHU_OPEN_API = "https://open.feishu.cn/open-apis"
+
+# 批量采集默认并发数
+DEFAULT_BATCH_WORKERS = 4
+
+# 运行锁被占用时默认等待的秒数（0 表示直接跳过本次运行）
+DEFAULT_RUN_LOCK_WAIT = 0
+
+# 实时接口对冲默认延迟（秒），delay 为 "auto" 且样本不足时也使用该值
+DEFAULT_HEDGE_DELAY = 2.0
+
+# 本地表格索引默认增量同步间隔（秒）、同步的统计日期窗口（天）与分页扫描每页条数
+DEFAULT_INDEX_RESYNC_INTERVAL = 3600
+DEFAULT_INDEX_WINDOW_DAYS = 31
+SEARCH_PAGE_SIZE = 500
+
+# records/batch_create、records/batch_update 单次最多写入条数
+BATCH_WRITE_SIZE = 500
+
+# 飞书 token 默认有效期与提前刷新时间（秒）
+DEFAULT_TOKEN_EXPIRE = 7200
+DEFAULT_TOKEN_REFRESH_MARGIN = 300
+
+# 飞书 token 缺失 / 无效 / 过期的错误码
+FEISHU_INVALID_TOKEN_CODES = {99991661, 99991663, 99991668}
+
+# 生成写入幂等键（client_token）的命名空间
+CLIENT_TOKEN_NAMESPACE = uuid.UUID('6f1c7b2e-3d4a-5b6c-8d7e-9f0a1b2c3d4e')
+
+# 请求超时的异常类型（同步请求 / 异步引擎）
+TIMEOUT_ERRORS = (requests.exceptions.Timeout, asyncio.TimeoutError)
+
+
+def client_token(*parts):
+    """
+    由写入内容的标识生成确定性的 client_token
+
+    飞书要求 client_token 为 uuidv4 格式：先按 uuid5 哈希，再改写版本位。
+    同一账号同一日期的重复写入得到相同的 client_token，由服务端去重。
+    """
+    digest = uuid.uuid5(CLIENT_TOKEN_NAMESPACE, '/'.join(str(part) for part in parts))
+    return str(uuid.UUID(bytes=digest.bytes, version=4))
+
+
+def previous_day(date_str):
+    """date_str 的前一天，格式 YYYY-MM-DD"""
+    return (datetime.strptime(date_str, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+
 
 class DouyinDataCollector:
     """抖音数据采集器"""
@@ -22,8 +94,42 @@ class DouyinDataCollector:
         if config_path is None:
             config_path = Path(__file__).parent.parent / "config.json"
 
+        self.config_path = Path(config_path)
         self.config = self.load_config(config_path)
+        self.accounts = self.load_accounts()
         self.feishu_token = None
+        self.feishu_api = self.config['feishu'].get('base_url', FEISHU_OPEN_API).rstrip('/')
+
+        # 阶段耗时与每个 HTTP 请求的指标，接口按配置中的序号标识
+        self.metrics = Metrics(self.config.get('metrics'))
+        self.metrics.name_endpoints('realtime', self._realtime_urls())
+        self.metrics.name_endpoints('history', self.config['tikhub'].get('history_api_urls', []))
+
+        # 所有请求经由同一个传输对象，按主机复用 TCP/TLS 连接
+        self.rate_limiter = RateLimiter(self.config.get('rate_limits'))
+        self.http = HttpTransport(self._http_options(), self.rate_limiter, self.metrics)
+
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        # close() 后置位，仍在运行的对冲请求不再重试或输出日志
+        self._closing = threading.Event()
+        self._collect_executor = None
+
+        self._token_expire_at = 0
+        self._token_timer = None
+        self._token_lock = threading.RLock()
+        self._tenant_token_cache = None
+
+        self._bitable_index = None
+        self._index_lock = threading.Lock()
+        self._index_sync_lock = threading.Lock()
+        self._index_next_sync = {}
+        # 批量预查询结果 {(table_key, account_name, date): 记录或 None}，见 prefetch_records
+        self._planned = {}
+        self._history_cache_db = None
+        self._endpoint_health_stats = None
+        self._snapshot_db = None
+        self._outbox_db = None
 
     def load_config(self, config_path):
         """加载配置文件，敏感信息优先从环境变量读取"""
@@ -69,8 +175,9 @@ class DouyinDataCollector:
             errors.append("缺少飞书 App Secret")
 
         sec_user_id = config.get('douyin', {}).get('sec_user_id', '')
-        if not sec_user_id:
-            errors.append("缺少抖音 sec_user_id")
+        has_accounts = config.get('accounts') or config.get('accounts_file')
+        if not sec_user_id and not has_accounts:
+            errors.append("缺少抖音 sec_user_id（或 accounts 账号列表）")
 
         if errors:
             print("❌ 配置错误：")
@@ -78,21 +185,200 @@ class DouyinDataCollector:
                 print(f"   - {err}")
             sys.exit(1)
 
+    def _http_options(self):
+        """传输层配置，连接池大小默认不小于批量并发数 × 实时接口数"""
+        options = dict(self.config.get('http', {}))
+        workers = self.config.get('batch', {}).get('workers', DEFAULT_BATCH_WORKERS)
+        urls = self.config['tikhub'].get('realtime_api_urls') or [None]
+        options.setdefault('pool_maxsize', max(10, workers * len(urls)))
+        return options
+
+    def load_accounts(self):
+        """
+        加载账号列表
+
+        优先级：accounts_file > accounts > douyin（单账号兼容模式）
+        accounts_file 支持 JSON 数组或 CSV（表头 name,sec_user_id,kol_id），
+        相对路径以 config.json 所在目录为基准。
+
+        Returns:
+            list: [{'name': ..., 'sec_user_id': ..., 'kol_id': ...}, ...]
+        """
+        raw_accounts = self.config.get('accounts') or []
+
+        accounts_file = self.config.get('accounts_file')
+        if accounts_file:
+            path = Path(accounts_file)
+            if not path.is_absolute():
+                path = self.config_path.parent / path
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if path.suffix.lower() == '.csv':
+                        raw_accounts = list(csv.DictReader(f))
+                    else:
+                        raw_accounts = json.load(f)
+            except FileNotFoundError:
+                print(f"❌ 错误：账号文件不存在: {path}")
+                sys.exit(1)
+            except (json.JSONDecodeError, csv.Error) as e:
+                print(f"❌ 错误：账号文件格式错误: {e}")
+                sys.exit(1)
+
+        if not raw_accounts:
+            return [self.default_account()]
+
+        accounts = []
+        for idx, item in enumerate(raw_accounts):
+            sec_user_id = (item.get('sec_user_id') or '').strip()
+            if not sec_user_id:
+                print(f"⚠️  第 {idx + 1} 个账号缺少 sec_user_id，已忽略")
+                continue
+            account = {k: v for k, v in item.items() if v not in (None, '')}
+            account['sec_user_id'] = sec_user_id
+            account.setdefault('name', sec_user_id)
+            account.setdefault('kol_id', '')
+            accounts.append(account)
+
+        if not accounts:
+            print("❌ 错误：账号列表为空")
+            sys.exit(1)
+        self._validate_shared_tables(accounts)
+        return accounts
+
+    def _validate_shared_tables(self, accounts):
+        """多个账号写入同一张表时必须配置 feishu.account_field，否则按日期去重会互相覆盖"""
+        if self.config['feishu'].get('account_field'):
+            return
+        tables = {}
+        for account in accounts:
+            tables.setdefault(self._table_key(account), []).append(account['name'])
+        shared = {key: names for key, names in tables.items() if len(names) > 1}
+        if not shared:
+            return
+        print("❌ 配置错误：多个账号写入同一张表，但未配置 feishu.account_field")
+        for key, names in shared.items():
+            print(f"   - {key}: {'、'.join(names)}")
+        print("   请配置 feishu.account_field（区分账号的文本字段），或为各账号指定 table_id")
+        sys.exit(1)
+
+    def default_account(self):
+        """由 douyin 配置段构造单账号（兼容旧配置）"""
+        douyin = self.config.get('douyin', {})
+        return {
+            'name': douyin.get('name') or douyin.get('sec_user_id', ''),
+            'sec_user_id': douyin.get('sec_user_id', ''),
+            'kol_id': douyin.get('kol_id', '')
+        }
+
+    def _table_url(self, account, suffix=''):
+        """多维表格记录接口地址，账号可单独指定 app_token / table_id"""
+        app_token = account.get('app_token') or self.config['feishu']['app_token']
+        table_id = account.get('table_id') or self.config['feishu']['table_id']
+        return f"{self.feishu_api}/bitable/v1/apps/{app_token}/tables/{table_id}/records{suffix}"
+
+    def _date_conditions(self, account, date_str):
+        """按日期（及账号字段，如已配置）过滤记录的查询条件"""
+        conditions = [{
+            "field_name": "统计日期文本",
+            "operator": "is",
+            "value": [date_str]
+        }]
+        return conditions + self._account_conditions(account)
+
+    def _account_conditions(self, account):
+        """按账号字段过滤记录的查询条件，未配置账号字段时为空"""
+        account_field = self.config['feishu'].get('account_field')
+        if not account_field:
+            return []
+        return [{
+            "field_name": account_field,
+            "operator": "is",
+            "value": [account['name']]
+        }]
+
     def get_feishu_tenant_token(self):
-        """获取飞书 tenant_access_token"""
-        url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
+        """
+        获取飞书 tenant_access_token
+
+        token 连同过期时间缓存在本地文件中，多次运行、多个进程之间复用；
+        距离过期不足 token_refresh_margin 秒时才重新鉴权，并在后台定时提前刷新。
+        """
+        with self._token_lock:
+            if self.feishu_token and self._token_expire_at - time.time() > self._token_refresh_margin():
+                return self.feishu_token
+        return self._refresh_tenant_token()
+
+    def _token_refresh_margin(self):
+        """提前刷新 token 的时间（秒）"""
+        return self.config['feishu'].get('token_refresh_margin', DEFAULT_TOKEN_REFRESH_MARGIN)
+
+    def _refresh_tenant_token(self, invalid_token=None):
+        """
+        刷新 tenant_access_token
+
+        Args:
+            invalid_token: 已确认失效的 token，缓存中的 token 与其相同时强制重新鉴权
+        """
+        app_id = self.config['feishu']['app_id']
+        margin = self._token_refresh_margin()
+
+        with self._token_lock:
+            if self.feishu_token and self.feishu_token != invalid_token \
+                    and self._token_expire_at - time.time() > margin:
+                return self.feishu_token
+
+            cache = self._token_cache()
+            if cache is not None:
+                try:
+                    with cache.lock:
+                        cached = cache.load(app_id)
+                        if cached and cached['token'] != invalid_token \
+                                and cached['expire_at'] - time.time() > margin:
+                            self._set_tenant_token(cached['token'], cached['expire_at'])
+                            return self.feishu_token
+
+                        token = self._request_tenant_token()
+                        if token:
+                            cache.save(app_id, token, self._token_expire_at)
+                        return token
+                except OSError as e:
+                    print(f"⚠️  token 缓存不可用: {e}")
+                    if self.feishu_token and self.feishu_token != invalid_token \
+                            and self._token_expire_at - time.time() > margin:
+                        return self.feishu_token
+
+            return self._request_tenant_token()
+
+    def _token_cache(self):
+        """token 文件缓存，配置 feishu.token_cache = false 时禁用"""
+        if not self.config['feishu'].get('token_cache', True):
+            return None
+        if self._tenant_token_cache is None:
+            try:
+                path = cache_dir(self.config, self.config_path) / 'feishu_token.json'
+            except OSError as e:
+                print(f"⚠️  无法创建缓存目录，token 缓存已禁用: {e}")
+                self.config['feishu']['token_cache'] = False
+                return None
+            self._tenant_token_cache = TenantTokenCache(path)
+        return self._tenant_token_cache
+
+    def _request_tenant_token(self):
+        """向飞书鉴权接口请求新的 tenant_access_token"""
+        url = f"{self.feishu_api}/auth/v3/tenant_access_token/internal"
         payload = {
             "app_id": self.config['feishu']['app_id'],
             "app_secret": self.config['feishu']['app_secret']
         }
 
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.http.post(url, json=payload, idempotent=True)
             response.raise_for_status()
             data = response.json()
 
             if data.get('code') == 0:
-                self.feishu_token = data['tenant_access_token']
+                self._set_tenant_token(data['tenant_access_token'],
+                                       time.time() + data.get('expire', DEFAULT_TOKEN_EXPIRE))
                 return self.feishu_token
             else:
                 print(f"❌ 获取飞书 token 失败: {data.get('msg')}")
@@ -101,10 +387,133 @@ class DouyinDataCollector:
             print(f"❌ 获取飞书 token 异常: {e}")
             return None
 
-    def fetch_realtime_data(self):
+    def _set_tenant_token(self, token, expire_at):
+        """更新当前 token，并安排在过期前后台刷新"""
+        self.feishu_token = token
+        self._token_expire_at = expire_at
+
+        if self._token_timer is not None:
+            self._token_timer.cancel()
+        delay = max(expire_at - time.time() - self._token_refresh_margin(), 1)
+        self._token_timer = threading.Timer(delay, self._refresh_tenant_token)
+        self._token_timer.daemon = True
+        self._token_timer.start()
+
+    def _feishu_request(self, method, url, **kwargs):
+        """
+        携带 tenant_access_token 请求飞书开放平台接口
+
+        接口返回 token 失效错误码时，重新鉴权并重试一次。
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.setdefault('Content-Type', 'application/json')
+
+        for attempt in range(2):
+            token = self.feishu_token
+            headers['Authorization'] = f'Bearer {token}'
+            response = self.http.request(method, url, headers=headers, **kwargs)
+
+            if attempt == 0 and self._is_invalid_token_response(response):
+                print(f"🔑 飞书 token 已失效，重新获取...")
+                if self._refresh_tenant_token(invalid_token=token):
+                    continue
+            return response
+
+    @staticmethod
+    def _is_invalid_token_response(response):
+        """响应是否为 token 失效错误"""
+        try:
+            return response.json().get('code') in FEISHU_INVALID_TOKEN_CODES
+        except ValueError:
+            return False
+
+    def run_lock(self):
+        """跨进程运行锁（本地缓存目录下的 run.lock）"""
+        return FileLock(cache_dir(self.config, self.config_path) / 'run.lock')
+
+    def run_lock_wait(self):
+        """运行锁被占用时最多等待的秒数（run_lock.wait），默认不等待"""
+        return float(self.config.get('run_lock', {}).get('wait', DEFAULT_RUN_LOCK_WAIT))
+
+    def flush(self):
+        """将内存中的接口健康度统计写回本地并导出指标快照（常驻进程每批采集后调用）"""
+        if self._endpoint_health_stats is not None:
+            try:
+                self._endpoint_health_stats.save()
+            except OSError as e:
+                print(f"⚠️  接口健康度统计保存失败: {e}")
+        try:
+            self.metrics.export(self.http)
+        except (OSError, requests.RequestException) as e:
+            print(f"⚠️  指标导出失败: {e}")
+
+    def close(self):
+        """释放后台线程与网络连接"""
+        self._closing.set()
+        if self._token_timer is not None:
+            self._token_timer.cancel()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+        if self._collect_executor is not None:
+            self._collect_executor.shutdown(wait=False)
+        if self._bitable_index is not None:
+            self._bitable_index.close()
+        if self._history_cache_db is not None:
+            self._history_cache_db.close()
+        if self._snapshot_db is not None:
+            self._snapshot_db.close()
+        if self._outbox_db is not None:
+            self._compact_outbox()
+            self._outbox_db.close()
+        self.flush()
+        self.metrics.close()
+        self.http.close()
+
+    def _drive(self, steps):
+        """
+        以同步 HTTP 执行一组采集步骤（产出 steps.py 中副作用的生成器），返回生成器的返回值
+
+        请求与本地调用在当前线程中执行，Launch 的步骤在对冲线程池中执行；
+        异步引擎以 aiohttp 执行同一组步骤，见 AsyncDouyinCollector._drive
+        """
+        value, error = None, None
+        while True:
+            try:
+                effect = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                value = self._perform(effect)
+            except Exception as e:
+                error = e
+
+    def _perform(self, effect):
+        """执行一个步骤副作用，见 steps.py"""
+        if isinstance(effect, Call):
+            return effect.func(*effect.args)
+        if isinstance(effect, Request):
+            options = {'params': effect.params, 'json': effect.json, 'headers': effect.headers,
+                       'timeout': effect.timeout, 'idempotent': effect.idempotent, 'cancel': effect.cancel}
+            send = self._feishu_request if effect.feishu else self.http.request
+            response = send(effect.method, effect.url,
+                            **{key: value for key, value in options.items() if value is not None})
+            response.raise_for_status()
+            return (effect.parse or json_loads)(response.content)
+        if isinstance(effect, Launch):
+            return self._get_hedge_executor().submit(self._drive, effect.steps)
+        if isinstance(effect, Wait):
+            return wait(effect.pending, timeout=effect.timeout, return_when=FIRST_COMPLETED)
+        raise TypeError(f"未知的步骤副作用: {effect!r}")
+
+    def fetch_realtime_data(self, account=None, limit=None):
         """
         获取实时粉丝数据（优先使用，支持多个备选接口）
 
+        Args:
+            account: 账号（可选），默认为第一个账号
+            limit: 最多尝试的接口数（可选），按健康度取前 limit 个，用于限制调用次数
+
         Returns:
             dict: {
                 'date': '2026-02-14',  # 采集日期（今天）
@@ -112,80 +521,278 @@ class DouyinDataCollector:
                 'source': 'realtime'    # 数据来源
             }
         """
-        # 支持单个 URL 或 URL 列表
-        api_urls = self.config['tikhub'].get('realtime_api_urls', [])
+        return self._drive(self._realtime_steps(account or self.accounts[0], limit))
+
+    def _realtime_steps(self, account, limit=None):
+        """fetch_realtime_data 的步骤"""
+        api_urls = self._realtime_urls()
         if not api_urls:
-            # 兼容旧配置：如果没有 realtime_api_urls，使用 realtime_api_url
-            api_url = self.config['tikhub'].get('realtime_api_url')
-            if api_url:
-                api_urls = [api_url]
-            else:
-                print("❌ 配置错误：缺少实时接口地址")
-                return None
+            print("❌ 配置错误：缺少实时接口地址")
+            return None
+
+        params = {'sec_user_id': account['sec_user_id']}
+        headers = self._tikhub_headers()
 
-        params = {'sec_user_id': self.config['douyin']['sec_user_id']}
-        headers = {
+        # 按健康度排列接口，熔断中的接口被跳过
+        endpoints = self._ordered_endpoints(api_urls, '实时接口')
+        if limit:
+            endpoints = endpoints[:limit]
+
+        hedge = self.config['tikhub'].get('realtime_hedge', {})
+        mode = hedge.get('mode', 'sequential')
+        if mode in ('hedge', 'race') and len(endpoints) > 1:
+            delay = hedge.get('delay', DEFAULT_HEDGE_DELAY)
+            return (yield from self._hedged_steps(endpoints, params, headers, mode, delay))
+
+        # 尝试所有实时接口
+        for pos, (idx, url) in enumerate(endpoints):
+            api_name = f"实时接口-{idx + 1}" if len(api_urls) > 1 else "实时接口"
+            result = yield from self._endpoint_steps(url, api_name, params, headers)
+            if result:
+                return result
+            if pos < len(endpoints) - 1:
+                print(f"🔄 尝试备选接口...")
+
+        print(f"❌ 所有实时接口均请求失败")
+        return None
+
+    def _realtime_urls(self):
+        """实时接口地址列表，兼容旧配置中的单个 realtime_api_url"""
+        tikhub = self.config['tikhub']
+        return tikhub.get('realtime_api_urls') or [u for u in [tikhub.get('realtime_api_url')] if u]
+
+    def _tikhub_headers(self):
+        return {
             'Authorization': f"Bearer {self.config['tikhub']['api_key']}",
             'accept': 'application/json'
         }
 
-        # 尝试所有实时接口
-        for idx, url in enumerate(api_urls):
-            try:
-                api_name = f"实时接口-{idx + 1}" if len(api_urls) > 1 else "实时接口"
-                print(f"🔍 正在使用{api_name}获取数据...")
+    @staticmethod
+    def _realtime_result(data):
+        """
+        解析实时接口响应（同步采集器与异步引擎共用）
 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get('code') == 200 and 'data' in data:
-                    user = data['data'].get('user', {})
-                    fans_count = user.get('follower_count')
-
-                    if fans_count is not None:
-                        # 实时接口返回的是当前数据，日期为今天
-                        today = datetime.now().strftime('%Y-%m-%d')
-                        api_time = data.get('time', 'N/A')
-
-                        print(f"✅ {api_name}请求成功")
-                        print(f"   API 时间: {api_time}")
-                        print(f"   当前粉丝数: {fans_count:,}")
-
-                        return {
-                            'date': today,
-                            'fans_count': fans_count,
-                            'source': 'realtime',
-                            'api_time': api_time
-                        }
+        Returns:
+            dict: {'date', 'fans_count', 'source', 'api_time'}，日期为今天；响应无效时返回 None
+        """
+        if data.get('code') != 200 or not isinstance(data.get('data'), dict):
+            return None
+        fans_count = (data['data'].get('user') or {}).get('follower_count')
+        if fans_count is None:
+            return None
+        # 实时接口返回的是当前数据，日期为今天
+        return {
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'fans_count': fans_count,
+            'source': 'realtime',
+            'api_time': data.get('time', 'N/A')
+        }
+
+    def _endpoint_steps(self, url, api_name, params, headers, cancel=None):
+        """
+        请求单个实时接口的步骤，成功返回数据，失败返回 None
+
+        cancel 为对冲请求共用的 threading.Event：置位（已有其他接口返回）或采集器关闭后，
+        本请求不再发出或重试，返回时也不再输出日志，结果直接丢弃
+        """
+        def cancelled():
+            return self._closing.is_set() or (cancel is not None and cancel.is_set())
+
+        def log(message):
+            if not cancelled():
+                print(message)
+
+        started = time.monotonic()
+        error = None
+        try:
+            log(f"🔍 正在使用{api_name}获取数据...")
+
+            # 只提取 code、time 与 follower_count，不解析完整的用户对象
+            data = yield Request('GET', url, params=params, headers=headers, timeout=self._endpoint_timeout(url),
+                                 parse=extract_profile, cancel=self._closing if cancel is None else cancel)
+
+            result = self._realtime_result(data)
+            if result is not None:
+                # 落选的请求同样计入接口延迟统计，auto 对冲延迟依赖完整的延迟分布
+                self._record_endpoint(url, started, True)
+                if cancel is None:
+                    self._print_realtime_result(api_name, result)
+                # 对冲请求的成功结果由 _hedged_steps 选出后输出，避免同时返回时重复打印
+                return None if cancelled() else result
+            if data.get('code') == 200 and 'data' in data:
+                log(f"⚠️  {api_name}返回数据格式异常")
+            else:
+                log(f"⚠️  {api_name}返回错误: {data.get('message', 'Unknown error')}")
+
+        except RequestCancelled as e:
+            # 尚未发出即被取消（对冲已有结果时不输出）或调用预算不足，不计入接口健康度
+            log(f"⚠️  {api_name}未请求: {e}")
+            return None
+        except TIMEOUT_ERRORS as e:
+            error = e
+            log(f"⚠️  {api_name}请求超时")
+        except Exception as e:
+            error = e
+            log(f"⚠️  {api_name}异常: {e}")
+
+        self._record_endpoint(url, started, False, error)
+        return None
+
+    @staticmethod
+    def _print_realtime_result(api_name, result):
+        """输出实时接口的成功结果"""
+        print(f"✅ {api_name}请求成功")
+        print(f"   API 时间: {result['api_time']}")
+        print(f"   当前粉丝数: {result['fans_count']:,}")
+
+    def _hedged_steps(self, endpoints, params, headers, mode, delay):
+        """
+        对冲 / 竞速请求多个实时接口的步骤，取第一个有效结果
+
+        - hedge: 当前接口在 delay 秒内未返回时，并发请求下一个接口；
+          接口明确失败时立即请求下一个接口
+        - race: 同时请求全部接口
+
+        得到结果（或全部失败）后取消未开始的请求；同步采集器中已发出的请求无法中断，
+        但不再进行限流重试，返回后不输出日志，结果直接丢弃（异步引擎中直接取消）。
+
+        Args:
+            endpoints: 按尝试顺序排列的 [(配置序号, url), ...]
+            delay: 对冲延迟（秒），可为单个数值、"auto"（按该接口的 p90 延迟），
+                   或按接口配置顺序给出的列表
+        """
+        pending = set()
+        next_idx = 0
+        settled = threading.Event()
+        names = {}
+
+        def launch():
+            nonlocal next_idx
+            idx, url = endpoints[next_idx]
+            next_idx += 1
+            api_name = f"实时接口-{idx + 1}"
+            handle = yield Launch(self._endpoint_steps(url, api_name, params, headers, settled))
+            names[handle] = api_name
+            pending.add(handle)
+
+        if mode == 'race':
+            print(f"🏁 竞速请求 {len(endpoints)} 个实时接口...")
+            while next_idx < len(endpoints):
+                yield from launch()
+        else:
+            yield from launch()
+
+        try:
+            while pending:
+                timeout = None
+                if next_idx < len(endpoints):
+                    timeout = self._hedge_delay(delay, *endpoints[next_idx - 1])
+                done, pending = yield Wait(pending, timeout)
+
+                for handle in done:
+                    # 采集器关闭时未开始的请求已被取消
+                    result = handle_result(handle)
+                    if result:
+                        settled.set()
+                        self._print_realtime_result(names[handle], result)
+                        return result
+
+                if self._closing.is_set():
+                    return None
+                if next_idx < len(endpoints):
+                    if not done:
+                        print(f"⏱️  实时接口-{endpoints[next_idx - 1][0] + 1} 超过 {timeout:.2f}s 未返回，对冲请求备选接口...")
                     else:
-                        print(f"⚠️  {api_name}返回数据格式异常")
-                        if idx < len(api_urls) - 1:
-                            print(f"🔄 尝试备选接口...")
-                            continue
-                        return None
-                else:
-                    print(f"⚠️  {api_name}返回错误: {data.get('message', 'Unknown error')}")
-                    if idx < len(api_urls) - 1:
                         print(f"🔄 尝试备选接口...")
-                        continue
-                    return None
-
-            except requests.exceptions.Timeout:
-                print(f"⚠️  {api_name}请求超时")
-                if idx < len(api_urls) - 1:
-                    print(f"🔄 尝试备选接口...")
-                    continue
-            except Exception as e:
-                print(f"⚠️  {api_name}异常: {e}")
-                if idx < len(api_urls) - 1:
-                    print(f"🔄 尝试备选接口...")
-                    continue
+                    yield from launch()
+        finally:
+            # 先置位再取消：已在运行的请求从此静默，尚未开始的请求不再执行
+            settled.set()
+            for handle in pending:
+                handle.cancel()
 
         print(f"❌ 所有实时接口均请求失败")
         return None
 
-    def fetch_history_data(self, start_date, end_date):
+    def _hedge_delay(self, delay, idx, url):
+        """对冲延迟（秒）：配置的数值，或 "auto" 时取该接口的 p90 延迟"""
+        if isinstance(delay, (list, tuple)):
+            delay = delay[min(idx, len(delay) - 1)]
+        if delay == 'auto':
+            health = self._endpoint_health()
+            p90 = health.latency(url, 0.9) if health is not None else None
+            return p90 if p90 is not None else DEFAULT_HEDGE_DELAY
+        return float(delay)
+
+    def _get_hedge_executor(self):
+        """对冲请求使用的共享线程池（延迟创建）"""
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                workers = self.config.get('batch', {}).get('workers', DEFAULT_BATCH_WORKERS)
+                urls = self.config['tikhub'].get('realtime_api_urls') or [None]
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=max(1, workers) * len(urls),
+                    thread_name_prefix='realtime-hedge'
+                )
+            return self._hedge_executor
+
+    def _endpoint_health(self):
+        """接口健康度统计（延迟加载），配置 endpoint_health.enabled = false 时禁用"""
+        options = self.config.get('endpoint_health', {})
+        if not options.get('enabled', True):
+            return None
+        with self._index_lock:
+            if self._endpoint_health_stats is None:
+                try:
+                    path = cache_dir(self.config, self.config_path) / 'endpoint_health.json'
+                    self._endpoint_health_stats = EndpointHealth(path, options)
+                except OSError as e:
+                    print(f"⚠️  接口健康度统计不可用: {e}")
+                    self.config.setdefault('endpoint_health', {})['enabled'] = False
+                    return None
+            return self._endpoint_health_stats
+
+    def _ordered_endpoints(self, api_urls, label=None):
+        """
+        按健康度排列接口，熔断冷却中的接口被跳过
+
+        Args:
+            label: 接口类型名称，用于提示被跳过的接口数，为 None 时不输出提示
+
+        Returns:
+            list: [(配置中的序号, url), ...]
+        """
+        health = self._endpoint_health()
+        if health is None:
+            return list(enumerate(api_urls))
+
+        endpoints = health.order(api_urls)
+        skipped = len(api_urls) - len(endpoints)
+        if skipped and label:
+            print(f"⛔ {skipped} 个{label}连续失败，熔断冷却中，暂时跳过")
+        return endpoints
+
+    def _endpoint_timeout(self, url):
+        """接口的 (连接超时, 读取超时)，读取超时根据该接口的 p99 延迟推算"""
+        connect_timeout, read_timeout = self.http.timeout
+        health = self._endpoint_health()
+        if health is not None:
+            read_timeout = health.timeout_for(url, read_timeout)
+        return connect_timeout, read_timeout
+
+    def _record_endpoint(self, url, started, ok, error=None):
+        """记录一次接口请求结果，被限流（429）不计入失败"""
+        health = self._endpoint_health()
+        if health is None:
+            return
+        # 同步请求的 HTTPError 带有 response，异步引擎的状态码错误带有 status
+        response = getattr(error, 'response', None)
+        status = response.status_code if response is not None else getattr(error, 'status', None)
+        if status == 429:
+            return
+        health.record(url, time.monotonic() - started, ok)
+
+    def fetch_history_data(self, start_date, end_date, account=None):
         """
         获取历史粉丝数据（备用）
 
@@ -197,235 +804,1144 @@ class DouyinDataCollector:
                 'source': 'history'     # 数据来源
             }
         """
+        return self._drive(self._history_steps(start_date, end_date, account or self.accounts[0]))
+
+    def _history_steps(self, start_date, end_date, account):
+        """fetch_history_data 的步骤"""
+        rows = yield from self._history_range_steps(start_date, end_date, account)
+        if not rows:
+            return None
+
+        latest = rows[-1]
+        print(f"   数据日期: {latest['date']}")
+        print(f"   粉丝总数: {latest['fans_count']:,}")
+        return latest
+
+    def fetch_history_range(self, start_date, end_date, account=None):
+        """
+        获取日期区间内每一天的历史粉丝数据
+
+        优先读取本地历史缓存，只对缓存未覆盖的日期（首个至最后一个缺失日期）发起一次接口请求；
+        历史接口只提供截至昨天的数据，今天及以后的日期不请求。
+
+        Returns:
+            list: 按日期升序排列的 [{'date', 'fans_count', 'fans_delta', 'source'}, ...]，
+                  缓存未命中且所有接口均失败时返回 None
+        """
+        return self._drive(self._history_range_steps(start_date, end_date, account or self.accounts[0]))
+
+    def _history_range_steps(self, start_date, end_date, account):
+        """fetch_history_range 的步骤"""
+        cached, missing = yield Call(self._history_cache_plan, account, start_date, end_date)
+        if missing is None:
+            if cached:
+                print(f"🗄️  历史数据缓存命中 {start_date} 至 {cached[-1]['date']}")
+            else:
+                print(f"ℹ️  历史接口只提供截至昨天的数据，{start_date} 至 {end_date} 无需请求")
+            return cached
+        if cached:
+            print(f"🗄️  历史数据缓存命中 {len(cached)} 天，仅请求 {missing[0]} 至 {missing[1]} 的数据")
+
+        rows = yield from self._request_history_steps(missing[0], missing[1], account)
+        return (yield Call(self._history_cache_merge, account, cached, rows))
+
+    def _history_cache(self):
+        """历史接口本地缓存（延迟打开），配置 history_cache.enabled = false 时禁用"""
+        options = self.config.get('history_cache', {})
+        if not options.get('enabled', True):
+            return None
+        with self._index_lock:
+            if self._history_cache_db is None:
+                try:
+                    path = cache_dir(self.config, self.config_path) / 'history_cache.sqlite'
+                    self._history_cache_db = HistoryCache(path, options)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️  历史数据缓存不可用: {e}")
+                    self.config.setdefault('history_cache', {})['enabled'] = False
+                    return None
+            return self._history_cache_db
+
+    def _history_cache_plan(self, account, start_date, end_date):
+        """
+        规划历史数据请求
+
+        历史接口只提供截至昨天（T-1）的数据，结束日期截断到昨天，
+        只缺今天的数据时不发起请求。
+
+        Returns:
+            tuple: (缓存中已有的逐日数据列表, 需要请求的 (起始日期, 结束日期))，
+                   区间已全部命中缓存或截断后为空时后者为 None
+        """
+        end_date = min(end_date, (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'))
+        if start_date > end_date:
+            return [], None
+
+        cache = self._history_cache()
+        kol_id = account.get('kol_id', '')
+        if cache is None or not kol_id:
+            return [], (start_date, end_date)
+
+        cached = cache.get_range(kol_id, start_date, end_date)
+        missing = [date for date in iter_dates(start_date, end_date) if date not in cached]
+        rows = [cached[date] for date in sorted(cached)]
+        return rows, ((missing[0], missing[-1]) if missing else None)
+
+    def _history_cache_merge(self, account, cached, fetched):
+        """将接口返回的数据写入缓存与快照库，并与缓存数据合并为按日期升序的列表"""
+        if fetched is None:
+            return cached or None
+
+        self.record_snapshots(account, fetched)
+        cache = self._history_cache()
+        if cache is not None and account.get('kol_id') and fetched:
+            cache.put_many(account['kol_id'], fetched)
+
+        merged = {row['date']: row for row in cached}
+        merged.update((row['date'], row) for row in fetched)
+        return [merged[date] for date in sorted(merged)]
+
+    def _request_history_steps(self, start_date, end_date, account):
+        """请求历史接口获取日期区间内的逐日数据的步骤（一次请求，按顺序尝试备选接口）"""
         api_urls = self.config['tikhub'].get('history_api_urls', [])
         if not api_urls:
             print("❌ 配置错误：缺少历史接口地址")
             return None
 
-        params = {
-            'kolId': self.config['douyin'].get('kol_id', ''),
-            'startDate': start_date,
-            'endDate': end_date
-        }
-        headers = {
-            'Authorization': f"Bearer {self.config['tikhub']['api_key']}",
-            'accept': 'application/json'
-        }
+        params = self._history_params(account, start_date, end_date)
+        headers = self._tikhub_headers()
 
-        for idx, url in enumerate(api_urls):
+        endpoints = self._ordered_endpoints(api_urls, '历史接口')
+        for pos, (idx, url) in enumerate(endpoints):
+            started = time.monotonic()
             try:
                 api_name = f"历史接口-{idx + 1}" if len(api_urls) > 1 else "历史接口"
                 print(f"🔍 正在使用{api_name}获取 {start_date} 至 {end_date} 的数据...")
 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get('data') and \
-                   data['data'].get('daily') and len(data['data']['daily']) > 0:
-
-                    daily_list = sorted(data['data']['daily'],
-                                      key=lambda x: x['date'], reverse=True)
-                    delta_list = sorted(data['data'].get('delta', []),
-                                      key=lambda x: x['date'], reverse=True)
-
-                    latest_daily = daily_list[0]
-                    latest_delta = next((d for d in delta_list if d['date'] == latest_daily['date']), None)
+                data = yield Request('GET', url, params=params, headers=headers, timeout=self._endpoint_timeout(url))
+                self._record_endpoint(url, started, True)
 
+                rows = self._history_rows(data)
+                if rows:
                     print(f"✅ {api_name}请求成功")
-                    print(f"   数据日期: {latest_daily['date']}")
-                    print(f"   粉丝总数: {latest_daily['fans_cnt']:,}")
-
-                    return {
-                        'date': latest_daily['date'],
-                        'fans_count': latest_daily['fans_cnt'],
-                        'fans_delta': latest_delta['fans_cnt'] if latest_delta else 0,
-                        'source': 'history'
-                    }
-                else:
+                    return rows
+                elif rows is not None:
+                    # 接口正常响应但区间内没有数据，备选接口的数据源相同，不再重复请求
                     print(f"⚠️  {api_name}返回数据为空")
-                    if idx < len(api_urls) - 1:
+                    return []
+                else:
+                    print(f"⚠️  {api_name}响应异常: {data.get('message') or data.get('code')}")
+                    if pos < len(endpoints) - 1:
                         print(f"🔄 尝试备选接口...")
                         continue
                     return None
 
+            except RequestCancelled as e:
+                # 调用预算不足，备选接口同样不会发出，不计入接口健康度
+                print(f"⚠️  {api_name}未请求: {e}")
+                return None
             except Exception as e:
+                self._record_endpoint(url, started, False, e)
                 print(f"⚠️  {api_name}异常: {e}")
-                if idx < len(api_urls) - 1:
+                if pos < len(endpoints) - 1:
                     print(f"🔄 尝试备选接口...")
                     continue
 
         return None
 
-    def get_previous_day_fans(self, date_str):
-        """
-        从飞书表格查询前一天的粉丝数
+    @staticmethod
+    def _history_params(account, start_date, end_date):
+        return {
+            'kolId': account.get('kol_id', ''),
+            'startDate': start_date,
+            'endDate': end_date
+        }
 
-        Args:
-            date_str: 当前日期，格式 YYYY-MM-DD
+    @classmethod
+    def _history_rows(cls, data):
+        """
+        解析历史接口响应（同步采集器与异步引擎共用）
 
         Returns:
-            int: 前一天的粉丝数，如果查询失败返回 None
+            list: 逐日数据；正常响应但区间内没有数据时为空列表，响应异常时返回 None
         """
-        if not self.feishu_token:
+        payload = data.get('data')
+        if not isinstance(payload, dict):
             return None
+        if payload.get('daily'):
+            return cls._parse_history_payload(payload)
+        if data.get('code', 200) == 200 and payload.get('daily') == []:
+            return []
+        return None
 
-        # 计算前一天日期
-        current_date = datetime.strptime(date_str, '%Y-%m-%d')
-        previous_date = (current_date - timedelta(days=1)).strftime('%Y-%m-%d')
-
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.config['feishu']['app_token']}/tables/{self.config['feishu']['table_id']}/records/search"
+    @staticmethod
+    def _history_fallback_range():
+        """实时接口失败时降级请求的历史区间：最近 3 天至今天（历史接口只返回截至昨天的数据）"""
+        now = datetime.now()
+        return (now - timedelta(days=3)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _parse_history_payload(payload):
+        """将历史接口返回的 daily / delta 两个列表按日期合并为逐日数据"""
+        deltas = {d['date']: d['fans_cnt'] for d in payload.get('delta') or []}
+        return [
+            {
+                'date': daily['date'],
+                'fans_count': daily['fans_cnt'],
+                'fans_delta': deltas.get(daily['date'], 0),
+                'source': 'history'
+            }
+            for daily in sorted(payload['daily'], key=lambda x: x['date'])
+        ]
 
-        headers = {
-            'Authorization': f'Bearer {self.feishu_token}',
-            'Content-Type': 'application/json'
-        }
+    def _snapshot_store(self):
+        """本地快照库（延迟打开），配置 snapshots.enabled = false 时禁用"""
+        if not self.config.get('snapshots', {}).get('enabled', True):
+            return None
+        with self._index_lock:
+            if self._snapshot_db is None:
+                try:
+                    path = cache_dir(self.config, self.config_path) / 'snapshots.sqlite'
+                    self._snapshot_db = SnapshotStore(path)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️  本地快照库不可用: {e}")
+                    self.config.setdefault('snapshots', {})['enabled'] = False
+                    return None
+            return self._snapshot_db
 
-        payload = {
-            "filter": {
-                "conjunction": "and",
-                "conditions": [{
-                    "field_name": "统计日期文本",
-                    "operator": "is",
-                    "value": [previous_date]
-                }]
-            },
-            "automatic_fields": False
-        }
+    @staticmethod
+    def _account_key(account):
+        """账号的稳定标识（快照库、写入幂等键使用）：sec_user_id，未配置时为账号名称"""
+        return account.get('sec_user_id') or account['name']
 
+    def record_snapshots(self, account, rows):
+        """将实时 / 历史接口的观测结果追加到本地快照库"""
+        store = self._snapshot_store()
+        if store is None or not rows:
+            return
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('code') == 0:
-                items = data.get('data', {}).get('items', [])
-                if items:
-                    previous_fans = items[0].get('fields', {}).get('抖音粉丝数')
-                    if previous_fans is not None:
-                        print(f"   前一天 ({previous_date}) 粉丝数: {previous_fans:,}")
-                        return int(previous_fans)
-
-            print(f"   未找到前一天 ({previous_date}) 的数据")
+            store.append_many(self._account_key(account), rows)
+        except sqlite3.Error as e:
+            print(f"⚠️  写入本地快照失败: {e}")
+
+    def _snapshot_fans(self, account, date_str):
+        """本地快照库中某日期最后一次观测到的粉丝数，没有时返回 None"""
+        store = self._snapshot_store()
+        if store is None:
             return None
-
-        except Exception as e:
-            print(f"   查询前一天数据异常: {e}")
+        try:
+            snapshot = store.latest(self._account_key(account), date_str)
+        except sqlite3.Error as e:
+            print(f"⚠️  读取本地快照失败: {e}")
             return None
+        return snapshot['fans_count'] if snapshot else None
 
-    def check_record_exists(self, date_str):
-        """检查飞书表格中是否已存在该日期的记录"""
-        if not self.feishu_token:
-            return False
+    def snapshot_report(self, start_date, end_date, accounts=None):
+        """
+        从本地快照库汇总日期区间内每个账号每天的粉丝数（不发起网络请求）
 
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.config['feishu']['app_token']}/tables/{self.config['feishu']['table_id']}/records/search"
+        Returns:
+            list: [{'account', 'date', 'fans_count', 'fans_delta', 'high', 'low',
+                    'source', 'observations'}, ...]
+        """
+        store = self._snapshot_store()
+        if store is None:
+            return []
+        rows = []
+        for account in accounts or self.accounts:
+            for day in store.daily(self._account_key(account), start_date, end_date):
+                rows.append(dict(day, account=account['name']))
+        return rows
+
+    def _outbox(self):
+        """写入发件箱（延迟打开），配置 outbox.enabled = false 时禁用"""
+        if not self.config.get('outbox', {}).get('enabled', True):
+            return None
+        with self._index_lock:
+            if self._outbox_db is None:
+                try:
+                    path = cache_dir(self.config, self.config_path) / 'outbox.sqlite'
+                    self._outbox_db = WriteOutbox(path)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️  写入发件箱不可用: {e}")
+                    self.config.setdefault('outbox', {})['enabled'] = False
+                    return None
+            return self._outbox_db
 
-        headers = {
-            'Authorization': f'Bearer {self.feishu_token}',
-            'Content-Type': 'application/json'
-        }
+    def _outbox_enqueue(self, items):
+        """
+        写入前将数据记入发件箱
 
-        payload = {
-            "filter": {
-                "conjunction": "and",
-                "conditions": [{
-                    "field_name": "统计日期文本",
-                    "operator": "is",
-                    "value": [date_str]
-                }]
-            },
-            "automatic_fields": False
-        }
+        Args:
+            items: [(account, row), ...]
 
+        Returns:
+            list: 与 items 一一对应的记录 id（发件箱不可用时为空列表）
+        """
+        outbox = self._outbox()
+        if outbox is None or not items:
+            return []
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            return outbox.enqueue([(self._table_key(account), self._account_key(account), row)
+                                   for account, row in items])
+        except sqlite3.Error as e:
+            print(f"⚠️  写入发件箱失败: {e}")
+            return []
+
+    def _outbox_settle(self, ids, ok, error=None):
+        """写入成功后标记发件箱记录完成，失败时记录错误并保持待写入"""
+        outbox = self._outbox()
+        if outbox is None or not ids:
+            return
+        try:
+            if ok:
+                outbox.mark_done(ids)
+            else:
+                outbox.mark_failed(ids, error)
+        except sqlite3.Error as e:
+            print(f"⚠️  更新发件箱失败: {e}")
 
-            if data.get('code') == 0:
-                items = data.get('data', {}).get('items', [])
-                return len(items) > 0
+    def _compact_outbox(self):
+        """按 outbox.retention_days / outbox.max_rows 压缩发件箱"""
+        options = self.config.get('outbox', {})
+        try:
+            dropped = self._outbox_db.compact(options.get('retention_days', DEFAULT_RETENTION_DAYS),
+                                              options.get('max_rows', DEFAULT_MAX_ROWS))
+        except sqlite3.Error as e:
+            print(f"⚠️  压缩发件箱失败: {e}")
+            return
+        if dropped:
+            print(f"⚠️  发件箱超出容量上限，已丢弃最旧的 {dropped} 条待写入数据")
 
-        except Exception as e:
-            print(f"❌ 查询记录异常: {e}")
-            return False
+    def replay_outbox(self):
+        """
+        重放发件箱中上次未写入成功的数据（采集开始前调用）
 
-        return False
+        按账号分组：先查询表格中已有的记录（本地索引可用时先同步，避免上次写入
+        实际成功但响应丢失时重复写入），缺失的通过 records/batch_create 批量写入；
+        已存在的在 upsert 模式下更新有变化的字段，否则直接标记完成。
+        账号已不在配置中的数据保持待写入，由容量上限淘汰。
 
-    def write_to_feishu(self, data):
-        """将数据写入飞书表格"""
-        if not self.feishu_token:
-            print("❌ 飞书 token 未获取，无法写入数据")
-            return False
+        Returns:
+            int: 重放完成的条数
+        """
+        outbox = self._outbox()
+        if outbox is None:
+            return 0
+        try:
+            groups = outbox.pending()
+        except sqlite3.Error as e:
+            print(f"⚠️  读取发件箱失败: {e}")
+            return 0
+        if not groups:
+            return 0
+
+        total = sum(len(entries) for entries in groups.values())
+        print(f"📮 发件箱中有 {total} 条待写入数据，开始重放...")
+        if not self.get_feishu_tenant_token():
+            print("❌ 获取飞书 token 失败，暂不重放")
+            return 0
+
+        accounts = {(self._table_key(account), self._account_key(account)): account for account in self.accounts}
+        creates = {}
+        replayed = 0
+        for (table_key, account_key), entries in groups.items():
+            account = accounts.get((table_key, account_key))
+            if account is None:
+                print(f"⚠️  账号 {account_key} 已不在配置中，跳过发件箱中的 {len(entries)} 条数据")
+                continue
+            if self._table_index() is not None and table_key not in creates:
+                self.sync_table_index(account)
+            table_creates = creates.setdefault(table_key, [])
+
+            rows = [row for _, row in entries]
+            existing = self._existing_records(account, rows[0]['date'], rows[-1]['date'])
+            if existing is None:
+                continue
+
+            updates, present = [], []
+            for record_id, row in entries:
+                if row['date'] not in existing:
+                    table_creates.append((account, row))
+                    continue
+                changes = self._changed_fields(existing[row['date']], row) if self._write_mode() == 'upsert' else {}
+                if changes:
+                    updates.append((existing[row['date']]['record_id'], row, changes))
+                else:
+                    present.append(record_id)
+
+            self._outbox_settle(present, True)
+            replayed += len(present)
+            replayed += self.batch_update_records(updates, account) if updates else 0
+
+        # 同一表格中各账号缺失的记录合并批量写入
+        for items in creates.values():
+            replayed += self._batch_create(items) if items else 0
+
+        self._compact_outbox()
+        print(f"📮 发件箱重放完成 {replayed}/{total} 条")
+        return replayed
+
+    def _table_key(self, account):
+        """多维表格标识 "{app_token}/{table_id}"，用作本地索引的分区键"""
+        app_token = account.get('app_token') or self.config['feishu']['app_token']
+        table_id = account.get('table_id') or self.config['feishu']['table_id']
+        return f"{app_token}/{table_id}"
+
+    def _table_index(self):
+        """本地表格索引（延迟打开），配置 feishu.index.enabled = false 时禁用"""
+        options = self.config['feishu'].get('index', {})
+        if not options.get('enabled', True):
+            return None
+        with self._index_lock:
+            if self._bitable_index is None:
+                try:
+                    path = cache_dir(self.config, self.config_path) / 'bitable_index.sqlite'
+                    self._bitable_index = BitableIndex(path)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️  本地表格索引不可用，改为远程查询: {e}")
+                    self.config['feishu'].setdefault('index', {})['enabled'] = False
+                    return None
+            return self._bitable_index
 
-        if self.check_record_exists(data['date']):
-            print(f"⚠️  {data['date']} 的记录已存在，跳过写入")
-            return True
+    def _index_lookup(self, account, date_str):
+        """从本地索引查询记录，索引不可用或未命中时返回 None"""
+        index = self._table_index()
+        if index is None or not self._ensure_index_synced(account):
+            return None
 
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.config['feishu']['app_token']}/tables/{self.config['feishu']['table_id']}/records"
+        return index.get(self._table_key(account), self._index_account(account), date_str)
+
+    def _index_account(self, account):
+        """索引中的账号名称，未配置账号字段时为空字符串"""
+        return account['name'] if self.config['feishu'].get('account_field') else ''
+
+    def _index_row(self, record):
+        """将远程记录转换为索引行 (account, date, record_id, fans_count, fans_delta, modified_at)"""
+        fields = record.get('fields', {})
+        account_field = self.config['feishu'].get('account_field')
+        account_name = field_text(fields.get(account_field)) if account_field else ''
+        return (
+            account_name,
+            record_date(fields),
+            record['record_id'],
+            field_number(fields.get('抖音粉丝数')),
+            field_number(fields.get('抖音净新增')),
+            record.get('last_modified_time')
+        )
+
+    def _index_remember(self, account, record):
+        """将远程查询或写入得到的记录加入本地索引（及批量预查询结果）"""
+        row = self._index_row(record)
+        if not row[1]:
+            return
+        key = (self._table_key(account), row[0], row[1])
+        if key in self._planned:
+            self._planned[key] = {'record_id': row[2], 'fans_count': row[3], 'fans_delta': row[4]}
+        index = self._table_index()
+        if index is not None:
+            index.upsert_many(key[0], [row])
 
-        headers = {
-            'Authorization': f'Bearer {self.feishu_token}',
-            'Content-Type': 'application/json'
-        }
+    def _index_resync_interval(self):
+        return self.config['feishu'].get('index', {}).get('resync_interval', DEFAULT_INDEX_RESYNC_INTERVAL)
 
+    def _index_window_start(self):
+        """
+        索引同步覆盖的起始日期：最近 feishu.index.window_days 天（统计日期），
+        配置为 0 时同步整张表，返回空字符串
+        """
+        days = int(self.config['feishu'].get('index', {}).get('window_days', DEFAULT_INDEX_WINDOW_DAYS))
+        if days <= 0:
+            return ''
+        return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    def _index_fresh(self, account, date_str=None):
+        """
+        本地索引是否在 resync_interval 内成功同步过，且同步范围覆盖 date_str（及之后的日期）
+
+        此时未命中即表格中没有该记录，无需再远程查询；
+        尚未同步、同步失败后沿用旧数据或日期早于同步窗口时返回 False。
+        """
+        index = self._table_index()
+        if index is None:
+            return False
+        state = index.sync_state(self._table_key(account))
+        if state is None or time.time() - state[0] >= self._index_resync_interval():
+            return False
+        return date_str is None or date_str >= state[2]
+
+    def _ensure_index_synced(self, account):
+        """
+        确保本地索引已同步
+
+        首次使用时同步一次，之后每隔 feishu.index.resync_interval 秒同步一次，见 sync_table_index。
+        同步失败时返回 False，调用方回退到远程查询。
+        """
+        table_key = self._table_key(account)
+        with self._index_sync_lock:
+            if time.time() < self._index_next_sync.get(table_key, 0):
+                return True
+
+            interval = self._index_resync_interval()
+            state = self._table_index().sync_state(table_key)
+            if state is not None and time.time() - state[0] < interval:
+                self._index_next_sync[table_key] = state[0] + interval
+                return True
+
+            ok = self.sync_table_index(account)
+            self._index_next_sync[table_key] = time.time() + (interval if ok else 60)
+            return ok or state is not None
+
+    def sync_table_index(self, account=None, full=False):
+        """
+        同步本地表格索引
+
+        默认只扫描统计日期在最近 feishu.index.window_days 天内的记录并替换索引中的这部分记录，
+        扫描量随账号数而不是表格的历史数据增长；配置了 feishu.index.modified_field
+        （“修改时间”类型字段）时，首次同步之后只拉取修改过的记录。
+
+        Args:
+            account: 账号（可选），用于确定目标表格
+            full: 是否扫描整张表（忽略日期窗口与修改时间）
+
+        Returns:
+            bool: 是否同步成功
+        """
+        account = account or self.accounts[0]
+        index = self._table_index()
+        if index is None:
+            return False
+
+        table_key = self._table_key(account)
+        modified_field = self.config['feishu'].get('index', {}).get('modified_field')
+        state = index.sync_state(table_key)
+
+        since = '' if full else self._index_window_start()
+        incremental = not full and modified_field and state is not None and state[1]
+        if incremental:
+            conditions = [{
+                "field_name": modified_field,
+                "operator": "isGreater",
+                "value": ["ExactDate", str(state[1])]
+            }]
+        elif since:
+            conditions = [date_from_condition(since)]
+        else:
+            conditions = None
+
+        try:
+            rows = [self._index_row(item) for item in self._scan_records(account, conditions)]
+        except Exception as e:
+            print(f"⚠️  同步本地表格索引失败: {e}")
+            return False
+
+        rows = [row for row in rows if row[1]]
+        max_modified = max((row[5] or 0 for row in rows), default=0)
+        if incremental:
+            index.upsert_many(table_key, rows)
+            index.mark_synced(table_key, max_modified)
+            scope = '增量'
+        else:
+            index.replace_table(table_key, rows, max_modified, since)
+            scope = f"{since} 起" if since else '全量'
+
+        print(f"🗂️  本地表格索引已同步（{scope}，{len(rows)} 条记录）")
+        return True
+
+    def _scan_records(self, account, conditions=None, conjunction='and'):
+        """分页扫描多维表格记录（每页 500 条）"""
+        url = self._table_url(account, '/search')
+        payload = {"automatic_fields": True}
+        if conditions:
+            payload["filter"] = {"conjunction": conjunction, "conditions": conditions}
+
+        page_token = None
+        while True:
+            params = {'page_size': SEARCH_PAGE_SIZE}
+            if page_token:
+                params['page_token'] = page_token
+
+            response = self._feishu_request('POST', url, json=payload, params=params, idempotent=True)
+            response.raise_for_status()
+            data = response.json()
+            if data.get('code') != 0:
+                raise RuntimeError(data.get('msg'))
+
+            yield from data.get('data', {}).get('items') or []
+
+            if not data.get('data', {}).get('has_more'):
+                break
+            page_token = data['data'].get('page_token')
+
+    def prefetch_records(self, accounts, dates):
+        """
+        批量预查询多个账号若干日期的记录
+
+        按表格收集全部 (账号, 日期)，由 LookupPlanner 合并为少量分页查询
+        （日期区间或 OR 条件，每页 500 条），结果写入本地索引并暂存，
+        之后的 find_record / get_previous_day_fans 直接读取，不再逐条远程查询。
+        本地索引在有效期内同步过且覆盖这些日期的表格无需预查询（未命中即不存在）；
+        索引过期时不在此处重新同步，预查询的请求数远少于同步整个窗口。
+
+        Returns:
+            set: 已有可用记录（索引已同步或预查询成功）的表格标识
+        """
+        self._planned = {}
+        tables = {}
+        for account in accounts:
+            tables.setdefault(self._table_key(account), []).append(account)
+
+        index = self._table_index()
+        covered = set()
+        for table_key, members in tables.items():
+            if self._index_fresh(members[0], min(dates)):
+                covered.add(table_key)
+                continue
+
+            planner = LookupPlanner()
+            for account in members:
+                for date_str in dates:
+                    planner.add(self._index_account(account), date_str)
+            account_conditions = self._account_conditions(members[0])
+            try:
+                with self.metrics.span('lookup_plan', table=table_key):
+                    found, rows = planner.run(
+                        lambda conditions, conjunction: self._scan_records(members[0], conditions, conjunction),
+                        self._index_row, account_conditions)
+            except Exception as e:
+                print(f"⚠️  批量预查询失败，改为逐条查询: {e}")
+                continue
+
+            if index is not None and rows:
+                index.upsert_many(table_key, rows)
+            for (account_name, date_str), row in found.items():
+                self._planned[(table_key, account_name, date_str)] = (
+                    {'record_id': row[2], 'fans_count': row[3], 'fans_delta': row[4]} if row else None)
+            covered.add(table_key)
+            print(f"🔎 批量预查询 {len(found)} 个 (账号, 日期)：{len(planner.queries(account_conditions))} 组查询，"
+                  f"命中 {sum(1 for row in found.values() if row)} 条")
+        return covered
+
+    def _planned_record(self, account, date_str):
+        """
+        读取批量预查询结果
+
+        Returns:
+            tuple: (是否已预查询, 记录或 None)
+        """
+        key = (self._table_key(account), self._index_account(account), date_str)
+        if key not in self._planned:
+            return False, None
+        return True, self._planned[key]
+
+    def get_previous_day_fans(self, date_str, account=None):
+        """
+        从飞书表格查询前一天的粉丝数
+
+        Args:
+            date_str: 当前日期，格式 YYYY-MM-DD
+            account: 账号（可选），默认为第一个账号
+
+        Returns:
+            int: 前一天的粉丝数，如果查询失败返回 None
+        """
+        return self._drive(self._previous_day_steps(date_str, account or self.accounts[0]))
+
+    def _previous_day_steps(self, date_str, account):
+        """get_previous_day_fans 的步骤"""
+        previous_date = previous_day(date_str)
+        source, previous_fans = yield Call(self._local_previous_fans, account, previous_date, bool(self.feishu_token))
+        if source is not None:
+            if previous_fans is not None:
+                print(f"   前一天 ({previous_date}) 粉丝数: {previous_fans:,}（{source}）")
+            else:
+                print(f"   未找到前一天 ({previous_date}) 的数据")
+            return previous_fans
+
+        if not self.feishu_token:
+            return None
+
+        try:
+            data = yield Request('POST', self._table_url(account, '/search'),
+                                 json=self._search_payload(account, previous_date), idempotent=True, feishu=True)
+            record = yield Call(self._search_result, account, data)
+
+            if record and record['fans_count'] is not None:
+                print(f"   前一天 ({previous_date}) 粉丝数: {record['fans_count']:,}")
+                return record['fans_count']
+
+            print(f"   未找到前一天 ({previous_date}) 的数据")
+            return None
+
+        except Exception as e:
+            print(f"   查询前一天数据异常: {e}")
+            return None
+
+    def _local_previous_fans(self, account, previous_date, records=True):
+        """
+        从本地数据查询前一天粉丝数：本地快照 → 批量预查询结果 / 本地索引（records 为 True 时）
+
+        Returns:
+            tuple: (来源说明, 粉丝数)；本地无定论、需要远程查询时来源为 None
+        """
+        previous_fans = self._snapshot_fans(account, previous_date)
+        if previous_fans is not None:
+            return '本地快照', previous_fans
+        if not records:
+            return None, None
+        source, record = self._local_record(account, previous_date)
+        if source is None:
+            return None, None
+        return source, record['fans_count'] if record else None
+
+    def _local_record(self, account, date_str):
+        """
+        从本地数据查询记录：批量预查询结果 → 本地索引
+
+        Returns:
+            tuple: (来源说明, 记录或 None)；本地无定论、需要远程查询时来源为 None
+        """
+        planned, record = self._planned_record(account, date_str)
+        if planned:
+            return '批量预查询', record
+        record = self._index_lookup(account, date_str)
+        if record is not None or self._index_fresh(account, date_str):
+            return '本地索引', record
+        return None, None
+
+    def _search_payload(self, account, date_str):
+        """按日期（及账号字段）查询记录的 records/search 请求体"""
+        return {
+            "filter": {
+                "conjunction": "and",
+                "conditions": self._date_conditions(account, date_str)
+            },
+            "automatic_fields": False
+        }
+
+    def _search_result(self, account, data):
+        """
+        解析 records/search 响应的第一条记录并加入本地索引
+
+        Returns:
+            dict: {'record_id', 'fans_count', 'fans_delta'}，无记录或查询失败时返回 None
+        """
+        if data.get('code') != 0:
+            return None
+        items = (data.get('data') or {}).get('items') or []
+        if not items:
+            return None
+        self._index_remember(account, items[0])
+        _, _, record_id, fans_count, fans_delta, _ = self._index_row(items[0])
+        return {'record_id': record_id, 'fans_count': fans_count, 'fans_delta': fans_delta}
+
+    def check_record_exists(self, date_str, account=None):
+        """检查飞书表格中是否已存在该日期的记录"""
+        return self.find_record(date_str, account) is not None
+
+    def find_record(self, date_str, account=None):
+        """
+        查询飞书表格中该日期的记录，优先读取本地索引
+
+        Returns:
+            dict: {'record_id', 'fans_count', 'fans_delta'}，不存在或查询失败时返回 None
+        """
+        return self._drive(self._find_record_steps(date_str, account or self.accounts[0]))
+
+    def _find_record_steps(self, date_str, account):
+        """find_record 的步骤"""
+        if not self.feishu_token:
+            return None
+
+        source, record = yield Call(self._local_record, account, date_str)
+        if source is not None:
+            return record
+
+        try:
+            data = yield Request('POST', self._table_url(account, '/search'),
+                                 json=self._search_payload(account, date_str), idempotent=True, feishu=True)
+            return (yield Call(self._search_result, account, data))
+
+        except Exception as e:
+            print(f"❌ 查询记录异常: {e}")
+
+        return None
+
+    def _record_fields(self, account, data):
+        """构造写入多维表格的字段"""
         date_obj = datetime.strptime(data['date'], '%Y-%m-%d')
         timestamp = int(date_obj.timestamp() * 1000)
 
-        payload = {
-            "fields": {
-                "抖音粉丝数": int(data['fans_count']),
-                "抖音净新增": int(data['fans_delta']),
-                "统计日期": timestamp
+        fields = {
+            "抖音粉丝数": int(data['fans_count']),
+            "抖音净新增": int(data['fans_delta']),
+            "统计日期": timestamp
+        }
+        account_field = self.config['feishu'].get('account_field')
+        if account_field:
+            fields[account_field] = account['name']
+        fields.update(data.get('extra_fields') or {})
+        return fields
+
+    def _idempotent_writes(self):
+        """
+        是否依赖 client_token 去重，写入前只查本地索引
+
+        配置 feishu.idempotent_writes（默认开启）；本地索引不可用时仍需远程查询。
+        """
+        return self.config['feishu'].get('idempotent_writes', True) and self._table_index() is not None
+
+    def _client_token(self, account, *dates):
+        """写入某账号若干日期记录时使用的 client_token"""
+        return client_token(self._table_key(account), self._account_key(account), *dates)
+
+    def _known_record_steps(self, account, date_str):
+        """
+        写入前的去重查询的步骤，返回已有记录或 None
+
+        开启幂等写入时只查本地数据（批量预查询结果 / 本地索引），远程去重交给 client_token；
+        否则本地索引未命中、且索引不在有效期内时远程查询。
+        """
+        if self._idempotent_writes():
+            return (yield Call(self._local_record, account, date_str))[1]
+        return (yield from self._find_record_steps(date_str, account))
+
+    def _write_mode(self):
+        """记录已存在时的处理方式（feishu.write_mode）：skip 跳过（默认）/ upsert 更新有变化的字段"""
+        return self.config['feishu'].get('write_mode', 'skip')
+
+    @staticmethod
+    def _changed_fields(existing, data):
+        """
+        与已有记录比较粉丝数与净增，返回需要更新的字段（无变化时为空字典）
+
+        本地索引不保存 extra_fields 中的附加字段，附加字段总是随更新一并提交。
+        """
+        changes = {}
+        for field, key in (('抖音粉丝数', 'fans_count'), ('抖音净新增', 'fans_delta')):
+            value = int(data[key])
+            if existing.get(key) is None or int(existing[key]) != value:
+                changes[field] = value
+        changes.update(data.get('extra_fields') or {})
+        return changes
+
+    def batch_create_records(self, rows, account=None):
+        """
+        通过 records/batch_create 批量写入记录（每批最多 500 条）
+
+        Args:
+            rows: [{'date', 'fans_count', 'fans_delta', ...}, ...]
+
+        Returns:
+            int: 成功写入的条数
+        """
+        account = account or self.accounts[0]
+        return self._batch_create([(account, row) for row in rows])
+
+    def _batch_create(self, items):
+        """
+        批量写入同一表格中多个账号的记录，按顺序分批，某一批失败后停止
+
+        Args:
+            items: [(account, row), ...]，所有账号须写入同一表格
+
+        Returns:
+            int: 成功写入的条数（items 中的前若干条）
+        """
+        url = self._table_url(items[0][0], '/batch_create')
+        table_key = self._table_key(items[0][0])
+        written = 0
+        outbox_ids = self._outbox_enqueue(items)
+
+        for offset in range(0, len(items), BATCH_WRITE_SIZE):
+            chunk = items[offset:offset + BATCH_WRITE_SIZE]
+            payload = {
+                "records": [{"fields": self._record_fields(account, row)} for account, row in chunk]
+            }
+            accounts = {self._account_key(account) for account, _ in chunk}
+            if len(accounts) == 1:
+                token = self._client_token(chunk[0][0], *(row['date'] for _, row in chunk))
+            else:
+                token = client_token(table_key, *(f"{self._account_key(account)}/{row['date']}"
+                                                  for account, row in chunk))
+            params = {'client_token': token}
+
+            try:
+                print(f"📝 正在批量写入 {len(chunk)} 条记录...")
+                response = self._feishu_request('POST', url, json=payload, params=params, idempotent=True)
+                response.raise_for_status()
+                result = response.json()
+
+                if result.get('code') != 0:
+                    print(f"❌ 批量写入失败: {result.get('msg')}")
+                    self._outbox_settle(outbox_ids[offset:], False, result.get('msg'))
+                    break
+
+                for record in result.get('data', {}).get('records') or []:
+                    self._index_remember(items[0][0], record)
+                self._outbox_settle(outbox_ids[offset:offset + BATCH_WRITE_SIZE], True)
+                written += len(chunk)
+
+            except Exception as e:
+                print(f"❌ 批量写入异常: {e}")
+                self._outbox_settle(outbox_ids[offset:], False, str(e))
+                break
+
+        return written
+
+    def batch_update_records(self, updates, account=None):
+        """
+        通过 records/batch_update 批量更新记录（每批最多 500 条），只提交有变化的字段
+
+        Args:
+            updates: [(record_id, row, changed_fields), ...]，row 为完整的 {'date', 'fans_count', 'fans_delta'}
+
+        Returns:
+            int: 成功更新的条数
+        """
+        return self._drive(self._update_steps(updates, account or self.accounts[0]))
+
+    def _update_steps(self, updates, account):
+        """batch_update_records 的步骤"""
+        url = self._table_url(account, '/batch_update')
+        updated = 0
+        outbox_ids = yield Call(self._outbox_enqueue, [(account, row) for _, row, _ in updates])
+
+        for offset in range(0, len(updates), BATCH_WRITE_SIZE):
+            chunk = updates[offset:offset + BATCH_WRITE_SIZE]
+            payload = {
+                "records": [{"record_id": record_id, "fields": fields} for record_id, _, fields in chunk]
             }
+
+            try:
+                print(f"📝 正在批量更新 {len(chunk)} 条记录...")
+                result = yield Request('POST', url, json=payload, idempotent=True, feishu=True)
+
+                if not (yield Call(self._settle_update, account, chunk, outbox_ids[offset:offset + BATCH_WRITE_SIZE],
+                                   result)):
+                    print(f"❌ 批量更新失败: {result.get('msg')}")
+                    yield Call(self._outbox_settle, outbox_ids[offset + BATCH_WRITE_SIZE:], False, result.get('msg'))
+                    break
+                updated += len(chunk)
+
+            except Exception as e:
+                print(f"❌ 批量更新异常: {e}")
+                yield Call(self._outbox_settle, outbox_ids[offset:], False, str(e))
+                break
+
+        return updated
+
+    def _settle_update(self, account, updates, outbox_ids, result):
+        """
+        处理 records/batch_update 的响应：成功时更新本地索引；结算发件箱，返回是否成功
+
+        Args:
+            updates: [(record_id, row, changed_fields), ...]
+        """
+        if result.get('code') != 0:
+            self._outbox_settle(outbox_ids, False, result.get('msg'))
+            return False
+        for record_id, row, _ in updates:
+            self._index_remember(account, {'record_id': record_id, 'fields': self._record_fields(account, row)})
+        self._outbox_settle(outbox_ids, True)
+        return True
+
+    def _existing_records(self, account, start_date, end_date):
+        """
+        查询日期区间内表格中已有的记录
+
+        本地索引在有效期内同步过且覆盖该区间时直接读取索引，否则按日期区间分页扫描一次远程表格。
+
+        Returns:
+            dict: {date: {'record_id', 'fans_count', 'fans_delta'}}，查询失败时返回 None
+        """
+        index = self._table_index()
+        if index is not None and self._ensure_index_synced(account) and self._index_fresh(account, start_date):
+            return index.records_between(self._table_key(account), self._index_account(account),
+                                         start_date, end_date)
+
+        conditions = date_range_conditions(start_date, end_date) + self._account_conditions(account)
+
+        try:
+            existing = {}
+            for item in self._scan_records(account, conditions):
+                _, date, record_id, fans_count, fans_delta, _ = self._index_row(item)
+                existing[date] = {'record_id': record_id, 'fans_count': fans_count, 'fans_delta': fans_delta}
+            return existing
+        except Exception as e:
+            print(f"❌ 查询已有记录异常: {e}")
+            return None
+
+    def backfill(self, start_date, end_date, account=None, notify=True):
+        """
+        补采日期区间内缺失的数据
+
+        一次历史接口请求取回整个区间的逐日数据，跳过表格中已有的日期，
+        其余通过 records/batch_create 批量写入。
+
+        Args:
+            start_date: 起始日期（含），格式 YYYY-MM-DD
+            end_date: 结束日期（含），格式 YYYY-MM-DD
+            account: 账号（可选），默认为第一个账号
+            notify: 是否单独发送补采完成通知（汇总通知时为 False）
+        """
+        account = account or self.accounts[0]
+        print(f"🎯 [{account['name']}] 补采区间: {start_date} 至 {end_date}")
+
+        rows = self.fetch_history_range(start_date, end_date, account)
+        if rows is None:
+            return {'success': False, 'message': '历史接口请求失败'}
+
+        rows = [row for row in rows if start_date <= row['date'] <= end_date]
+        existing = self._existing_records(account, start_date, end_date)
+        if existing is None:
+            return {'success': False, 'message': '查询已有记录失败'}
+
+        missing = [row for row in rows if row['date'] not in existing]
+        print(f"   接口返回 {len(rows)} 天，表格已有 {len(rows) - len(missing)} 天，待写入 {len(missing)} 天")
+
+        # upsert 模式下，已有记录中数值有变化的部分一并更新
+        updates = []
+        if self._write_mode() == 'upsert':
+            for row in rows:
+                if row['date'] in existing:
+                    changes = self._changed_fields(existing[row['date']], row)
+                    if changes:
+                        updates.append((existing[row['date']]['record_id'], row, changes))
+            if updates:
+                print(f"   已有记录中 {len(updates)} 天数据有变化，待更新")
+
+        written = self.batch_create_records(missing, account) if missing else 0
+        updated = self.batch_update_records(updates, account) if updates else 0
+        summary = {
+            'date': f"{start_date}~{end_date}",
+            'fans_count': rows[-1]['fans_count'] if rows else None,
+            'fans_delta': sum(row['fans_delta'] for row in missing[:written]),
+            'source': 'history'
         }
 
+        if written < len(missing):
+            return {'success': False, 'data': summary,
+                    'message': f'补采写入 {written}/{len(missing)} 条，部分写入失败'}
+        if updated < len(updates):
+            return {'success': False, 'data': summary,
+                    'message': f'补采写入 {written} 条，更新 {updated}/{len(updates)} 条，部分更新失败'}
+
+        if written and notify:
+            self.send_feishu_text(
+                f"{start_date}至{end_date}补采完成,写入{written}天数据,最新抖音总粉丝数{rows[-1]['fans_count']}",
+                account
+            )
+        message = f'补采写入 {written} 条，'
+        if updates:
+            message += f'更新 {updated} 条，'
+        message += f'跳过已有 {len(rows) - len(missing) - len(updates)} 条'
+        return {'success': True, 'data': summary, 'message': message}
+
+    def write_to_feishu(self, data, account=None, write_mode=None):
+        """
+        将数据写入飞书表格
+
+        Args:
+            data: {'date', 'fans_count', 'fans_delta', ...}，可通过 extra_fields 附带其他字段
+            write_mode: 记录已存在时的处理方式（可选），默认读取 feishu.write_mode
+        """
+        return self._drive(self._write_steps(data, account or self.accounts[0], write_mode))
+
+    def _write_steps(self, data, account, write_mode=None):
+        """write_to_feishu 的步骤"""
+        if not self.feishu_token:
+            print("❌ 飞书 token 未获取，无法写入数据")
+            return False
+
+        with self.metrics.span('exists_check', account=account['name']) as span:
+            existing = yield from self._known_record_steps(account, data['date'])
+            span.outcome = 'hit' if existing is not None else 'miss'
+        if existing is not None:
+            if (write_mode or self._write_mode()) != 'upsert':
+                print(f"⚠️  {data['date']} 的记录已存在，跳过写入")
+                return True
+
+            changes = self._changed_fields(existing, data)
+            if not changes:
+                print(f"✅ {data['date']} 的记录已存在且数据无变化，无需更新")
+                return True
+            print(f"🔁 {data['date']} 的记录已存在，更新字段: {', '.join(changes)}")
+            return (yield from self._update_steps([(existing['record_id'], data, changes)], account)) == 1
+
+        url = self._table_url(account)
+
+        payload = {
+            "fields": self._record_fields(account, data)
+        }
+        params = {'client_token': self._client_token(account, data['date'])}
+        outbox_ids = yield Call(self._outbox_enqueue, [(account, data)])
+
         try:
             print(f"📝 正在写入飞书表格...")
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            response.raise_for_status()
-            result = response.json()
+            result = yield Request('POST', url, json=payload, params=params, idempotent=True, feishu=True)
 
-            if result.get('code') == 0:
+            if (yield Call(self._settle_create, account, payload['fields'], outbox_ids, result)):
                 print(f"✅ 数据写入成功！")
                 return True
-            else:
-                print(f"❌ 数据写入失败: {result.get('msg')}")
-                return False
+            print(f"❌ 数据写入失败: {result.get('msg')}")
+            return False
 
         except Exception as e:
             print(f"❌ 写入数据异常: {e}")
+            yield Call(self._outbox_settle, outbox_ids, False, str(e))
             return False
 
-    def send_feishu_message(self, data):
-        """发送飞书消息通知"""
-        if not self.feishu_token:
-            return
-
-        url = "https://open.feishu.cn/open-apis/im/v1/messages"
-
-        headers = {
-            'Authorization': f'Bearer {self.feishu_token}',
-            'Content-Type': 'application/json'
-        }
-
-        message_text = f"{data['date']}数据为,粉丝新增{data['fans_delta']},抖音总粉丝数{data['fans_count']}"
+    def _settle_create(self, account, fields, outbox_ids, result):
+        """处理新增记录接口的响应：成功时写入本地索引；结算发件箱，返回是否成功"""
+        if result.get('code') != 0:
+            self._outbox_settle(outbox_ids, False, result.get('msg'))
+            return False
+        record = (result.get('data') or {}).get('record') or {}
+        if record.get('record_id'):
+            self._index_remember(account, {'record_id': record['record_id'], 'fields': fields})
+        self._outbox_settle(outbox_ids, True)
+        return True
+
+    @staticmethod
+    def _record_message(data):
+        """单条记录的通知文本"""
+        return f"{data['date']}数据为,粉丝新增{data['fans_delta']},抖音总粉丝数{data['fans_count']}"
+
+    def _text_message(self, message_text, account):
+        """
+        向账号对应群组发送文本消息的请求体与查询参数，多账号时在文本前加账号名称
 
+        Returns:
+            tuple: (payload, params)
+        """
+        if len(self.accounts) > 1:
+            message_text = f"【{account['name']}】{message_text}"
         payload = {
-            "receive_id": self.config['feishu']['chat_id'],
+            "receive_id": account.get('chat_id') or self.config['feishu']['chat_id'],
             "msg_type": "text",
             "content": json.dumps({"text": message_text})
         }
+        return payload, {"receive_id_type": "chat_id"}
 
-        params = {
-            "receive_id_type": "chat_id"
-        }
+    def send_feishu_message(self, data, account=None):
+        """发送飞书消息通知"""
+        self._drive(self._text_steps(self._record_message(data), account or self.accounts[0]))
+
+    def send_feishu_text(self, message_text, account=None):
+        """向账号对应的群组发送文本消息"""
+        self._drive(self._text_steps(message_text, account or self.accounts[0]))
+
+    def _text_steps(self, message_text, account):
+        """send_feishu_text 的步骤"""
+        if not self.feishu_token:
+            return
+
+        url = f"{self.feishu_api}/im/v1/messages"
+        payload, params = self._text_message(message_text, account)
 
         try:
             print(f"📨 正在发送飞书通知...")
-            response = requests.post(url, json=payload, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            result = response.json()
+            result = yield Request('POST', url, json=payload, params=params, feishu=True)
 
             if result.get('code') == 0:
                 print(f"✅ 通知发送成功！")
@@ -435,7 +1951,69 @@ class DouyinDataCollector:
         except Exception as e:
             print(f"⚠️  发送通知异常: {e}")
 
-    def collect(self, target_date=None):
+    def _notify_mode(self, account_count):
+        """
+        通知方式（feishu.notify_mode）：per_record 每条记录一条消息 / digest 汇总卡片 /
+        auto（默认）单账号逐条、多账号汇总
+        """
+        mode = self.config['feishu'].get('notify_mode', 'auto')
+        if mode == 'auto':
+            return 'digest' if account_count > 1 else 'per_record'
+        return mode
+
+    def send_feishu_card(self, card, chat_id):
+        """向群组发送交互式卡片，成功返回 True"""
+        if not self.feishu_token:
+            return False
+
+        url = f"{self.feishu_api}/im/v1/messages"
+        payload = {
+            "receive_id": chat_id,
+            "msg_type": "interactive",
+            "content": json.dumps(card, ensure_ascii=False)
+        }
+
+        try:
+            response = self._feishu_request('POST', url, json=payload, params={"receive_id_type": "chat_id"})
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get('code') == 0:
+                return True
+            print(f"⚠️  汇总通知发送失败: {result.get('msg')}")
+        except Exception as e:
+            print(f"⚠️  发送汇总通知异常: {e}")
+        return False
+
+    def send_digest(self, accounts, rows, title):
+        """
+        按群组汇总结果行，每个群发送一份汇总卡片（超出大小时拆分为多张）
+
+        Args:
+            accounts: 账号列表，与 rows 一一对应
+            rows: 结果行，见 _result_row
+            title: 卡片标题
+        """
+        digests = {}
+        for account, row in zip(accounts, rows):
+            chat_id = account.get('chat_id') or self.config['feishu']['chat_id']
+            if chat_id not in digests:
+                digests[chat_id] = NotificationDigest(title, self.config['feishu'].get('digest'))
+            digests[chat_id].add(row)
+
+        with self.metrics.span('notify', chats=len(digests)) as span:
+            sent = total = 0
+            for chat_id, digest in digests.items():
+                for card in digest.cards():
+                    total += 1
+                    sent += self.send_feishu_card(card, chat_id)
+            if sent < total:
+                span.outcome = 'fail'
+
+        print(f"📨 汇总通知已发送 {sent}/{total} 张卡片（{len(digests)} 个群）")
+        return sent
+
+    def collect(self, target_date=None, account=None):
         """
         采集数据（新策略）
 
@@ -444,97 +2022,502 @@ class DouyinDataCollector:
         2. 从飞书查询前一天的粉丝数，计算净增
         3. 如果实时接口失败，降级到历史接口
 
+        实时接口不依赖飞书，与获取飞书 token 并发执行；token 就绪后立即查询前一天的粉丝数，
+        单账号采集的耗时约为两条分支中较慢的一条，而不是各步骤之和。
+
+        Args:
+            target_date: 目标日期（可选），默认为今天
+            account: 账号（可选），默认为第一个账号
+        """
+        account = account or self.accounts[0]
+        if self._notify_mode(1) != 'digest':
+            return self._collect_account(account, target_date, fetch_token=True)
+
+        result = self._collect_account(account, target_date, notify=False, fetch_token=True)
+        self.send_digest([account], [self._result_row(account, result)],
+                         f"抖音粉丝日报 {target_date or datetime.now().strftime('%Y-%m-%d')}")
+        return result
+
+    def _feishu_prefetch(self, account, date_str):
+        """
+        后台分支：获取飞书 token，成功后立即查询 date_str 前一天的粉丝数
+
+        Returns:
+            tuple: (token 是否获取成功, 前一天粉丝数或 None)
+        """
+        if not self._timed('token', None, self.get_feishu_tenant_token):
+            return False, None
+        return True, self._timed('previous_day', account, self.get_previous_day_fans, date_str, account, empty='miss')
+
+    def _get_collect_executor(self):
+        """单账号采集中并发分支使用的共享线程池（延迟创建）"""
+        with self._hedge_lock:
+            if self._collect_executor is None:
+                self._collect_executor = ThreadPoolExecutor(max_workers=DEFAULT_BATCH_WORKERS,
+                                                            thread_name_prefix='collect')
+            return self._collect_executor
+
+    def _timed(self, phase, account, func, *args, empty='fail'):
+        """
+        在 phase 阶段计时下调用 func(*args)
+
+        Args:
+            account: 账号（写入 JSON 日志），为 None 时不记录账号
+            empty: 返回 None / False 时记录的 outcome
+        """
+        fields = {'account': account['name']} if account else {}
+        with self.metrics.span(phase, **fields) as span:
+            result = func(*args)
+            if result is None or result is False:
+                span.outcome = empty
+            return result
+
+    def _timed_steps(self, phase, account, steps, empty='fail'):
+        """在 phase 阶段计时下执行一组步骤，参数同 _timed"""
+        with self.metrics.span(phase, account=account['name']) as span:
+            result = yield from steps
+            if result is None or result is False:
+                span.outcome = empty
+            return result
+
+    def collect_batch(self, accounts=None, target_date=None, workers=None, guard=None):
+        """
+        批量采集多个账号
+
+        所有账号共用一个飞书 token 和一个 HTTP 会话，
+        在线程池中并发执行单账号采集流程。
+
         Args:
+            accounts: 账号列表（可选），默认为配置中的全部账号
             target_date: 目标日期（可选），默认为今天
+            workers: 并发数（可选），默认读取 batch.workers
+            guard: 单账号采集的包装（可选），以 guard(account, collect) 代替 collect(account)，
+                   分布式采集时用于登记与跳过其他节点已处理的账号
+
+        Returns:
+            list: 每个账号一行结果，见 _result_row
+        """
+        accounts = accounts or self.accounts
+        workers = self._batch_workers(workers, len(accounts))
+
+        if not self._timed('token', None, self.get_feishu_tenant_token):
+            return [self._result_row(account, {'success': False, 'message': '获取飞书 token 失败'})
+                    for account in accounts]
+
+        print(f"👥 批量采集 {len(accounts)} 个账号，并发数 {workers}")
+        digest = self._notify_mode(len(accounts)) == 'digest'
+        if len(accounts) > 1:
+            # 写入前的去重查询（当天）与前一天粉丝数（昨天）合并为少量分页查询
+            today = datetime.now()
+            self.prefetch_records(accounts, [(today - timedelta(days=1)).strftime('%Y-%m-%d'),
+                                             today.strftime('%Y-%m-%d')])
+        def collect(account):
+            return self._collect_account(account, target_date, not digest)
+
+        try:
+            rows = self._run_batch(accounts, (lambda account: guard(account, collect)) if guard else collect, workers)
+        finally:
+            self._planned = {}
+        if digest:
+            self.send_digest(accounts, rows, f"抖音粉丝日报 {target_date or datetime.now().strftime('%Y-%m-%d')}")
+        return rows
+
+    def backfill_batch(self, start_date, end_date, accounts=None, workers=None):
+        """
+        批量补采多个账号的日期区间
+
+        Returns:
+            list: 每个账号一行结果，见 _result_row
         """
+        accounts = accounts or self.accounts
+        workers = self._batch_workers(workers, len(accounts))
+
         if not self.get_feishu_tenant_token():
+            return [self._result_row(account, {'success': False, 'message': '获取飞书 token 失败'})
+                    for account in accounts]
+
+        print(f"👥 批量补采 {len(accounts)} 个账号，并发数 {workers}")
+        digest = self._notify_mode(len(accounts)) == 'digest'
+        rows = self._run_batch(accounts, lambda account: self.backfill(start_date, end_date, account, not digest),
+                               workers)
+        if digest:
+            self.send_digest(accounts, rows, f"抖音粉丝补采 {start_date} 至 {end_date}")
+        return rows
+
+    def _batch_workers(self, workers, account_count):
+        """批量任务并发数，默认读取 batch.workers，且不超过账号数"""
+        if workers is None:
+            workers = self.config.get('batch', {}).get('workers', DEFAULT_BATCH_WORKERS)
+        return max(1, min(int(workers), account_count))
+
+    def _run_batch(self, accounts, task, workers):
+        """在线程池中对每个账号执行 task(account)，单个账号异常不影响其他账号"""
+        def run(account):
+            try:
+                result = task(account)
+            except Exception as e:
+                result = {'success': False, 'message': f'采集异常: {e}'}
+            return self._result_row(account, result)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, accounts))
+
+    @staticmethod
+    def _result_row(account, result):
+        """将单账号采集结果整理为结果表的一行"""
+        data = result.get('data') or {}
+        return {
+            'account': account['name'],
+            'success': result['success'],
+            'date': data.get('date', ''),
+            'fans_count': data.get('fans_count'),
+            'fans_delta': data.get('fans_delta'),
+            'source': data.get('source', ''),
+            'message': result['message']
+        }
+
+    def _collect_account(self, account, target_date=None, notify=True, fetch_token=False):
+        """
+        单账号采集流程，整体耗时记为 account 阶段
+
+        Args:
+            notify: 是否逐条发送通知（汇总通知时为 False）
+            fetch_token: 是否在流程中获取飞书 token（为 False 时调用前需已获取）
+        """
+        return self._drive(self._account_steps(account, target_date, notify, fetch_token))
+
+    def _account_steps(self, account, target_date=None, notify=True, fetch_token=False):
+        """
+        单账号采集流程的步骤（同步采集器与异步引擎共用），参数同 _collect_account
+
+        Returns:
+            dict: {'success', 'message', 'data'（成功时）}
+        """
+        with self.metrics.span('account', account=account['name']) as span:
+            result = yield from self._collect_steps(account, target_date, notify, fetch_token)
+            if not result['success']:
+                span.outcome = 'fail'
+            return result
+
+    @staticmethod
+    def _realtime_record(realtime_data, previous_fans):
+        """由实时数据与前一天粉丝数构造待写入的记录，前一天粉丝数未知时净增记为 0"""
+        return {
+            'date': realtime_data['date'],
+            'fans_count': realtime_data['fans_count'],
+            'fans_delta': realtime_data['fans_count'] - previous_fans if previous_fans is not None else 0,
+            'source': 'realtime'
+        }
+
+    def _store_realtime(self, account, realtime_data, previous_fans, notify=True, source='实时接口'):
+        """
+        根据实时粉丝数与前一天粉丝数计算净增，写入表格并发送通知
+
+        Args:
+            realtime_data: {'date', 'fans_count', ...}
+            previous_fans: 前一天粉丝数，未知时为 None（净增记为 0）
+            source: 结果说明中的数据来源
+        """
+        return self._drive(self._store_realtime_steps(account, realtime_data, previous_fans, notify, source))
+
+    def _store_realtime_steps(self, account, realtime_data, previous_fans, notify=True, source='实时接口'):
+        """_store_realtime 的步骤"""
+        print(f"\n📊 计算粉丝净增...")
+        final_data = self._realtime_record(realtime_data, previous_fans)
+        if previous_fans is not None:
+            print(f"   净增: {final_data['fans_delta']:+,}")
+        else:
+            print(f"   无法计算净增（前一天数据不存在），设为 0")
+        yield Call(self.record_snapshots, account, [final_data])
+        return (yield from self._store_steps(account, final_data, notify, source))
+
+    def _store_steps(self, account, final_data, notify=True, source='实时接口'):
+        """写入一条采集结果并发送通知的步骤，返回单账号采集结果"""
+        write_success = yield from self._timed_steps('write', account, self._write_steps(final_data, account))
+
+        if write_success:
+            if notify:
+                with self.metrics.span('notify', account=account['name']):
+                    yield from self._text_steps(self._record_message(final_data), account)
+            return {
+                'success': True,
+                'data': final_data,
+                'message': f'成功采集并写入 {final_data["date"]} 的数据（{source}）'
+            }
+        else:
             return {
                 'success': False,
-                'message': '获取飞书 token 失败'
+                'message': '数据写入失败'
             }
 
+    def _collect_steps(self, account, target_date=None, notify=True, fetch_token=False):
+        """
+        单账号采集的各个步骤，每个步骤单独计时
+
+        fetch_token 为 True 时，获取 token → 查询前一天粉丝数 在后台线程中执行，
+        与当前线程中的实时接口请求并发；实时数据的日期与预先查询的日期不同（跨零点）时重新查询。
+        """
         # 确定目标日期（默认为今天）
         if target_date is None:
             target_date = datetime.now().strftime('%Y-%m-%d')
 
-        print(f"🎯 目标采集日期: {target_date}")
+        print(f"🎯 [{account['name']}] 目标采集日期: {target_date}")
 
-        # 策略1: 尝试实时接口
-        realtime_data = self.fetch_realtime_data()
+        # 实时数据的日期为采集当天
+        expected_date = datetime.now().strftime('%Y-%m-%d')
+        feishu_branch = None
+        if fetch_token:
+            feishu_branch = self._get_collect_executor().submit(self._feishu_prefetch, account, expected_date)
 
-        if realtime_data:
-            # 实时接口成功，计算净增
-            print(f"\n📊 计算粉丝净增...")
-            previous_fans = self.get_previous_day_fans(realtime_data['date'])
-
-            if previous_fans is not None:
-                fans_delta = realtime_data['fans_count'] - previous_fans
-                print(f"   净增: {fans_delta:+,}")
-            else:
-                fans_delta = 0
-                print(f"   无法计算净增（前一天数据不存在），设为 0")
-
-            final_data = {
-                'date': realtime_data['date'],
-                'fans_count': realtime_data['fans_count'],
-                'fans_delta': fans_delta,
-                'source': 'realtime'
-            }
-
-            write_success = self.write_to_feishu(final_data)
+        # 策略1: 尝试实时接口
+        realtime_data = yield from self._timed_steps('realtime', account, self._realtime_steps(account))
 
-            if write_success:
-                self.send_feishu_message(final_data)
-                return {
-                    'success': True,
-                    'data': final_data,
-                    'message': f'成功采集并写入 {final_data["date"]} 的数据（实时接口）'
-                }
-            else:
+        prefetched = None
+        if feishu_branch is not None:
+            token_ok, prefetched = yield Call(feishu_branch.result)
+            if not token_ok:
                 return {
                     'success': False,
-                    'message': '数据写入失败'
+                    'message': '获取飞书 token 失败'
                 }
 
+        if realtime_data:
+            if feishu_branch is not None and realtime_data['date'] == expected_date:
+                previous_fans = prefetched
+            else:
+                previous_fans = yield from self._timed_steps(
+                    'previous_day', account, self._previous_day_steps(realtime_data['date'], account), empty='miss')
+            return (yield from self._store_realtime_steps(account, realtime_data, previous_fans, notify))
+
         # 策略2: 实时接口失败，降级到历史接口
         print(f"\n🔄 实时接口失败，尝试历史接口...")
 
         # 历史接口通常返回 T-1 的数据
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
-        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date, end_date = self._history_fallback_range()
 
-        history_data = self.fetch_history_data(start_date, end_date)
+        history_data = yield from self._timed_steps('history', account,
+                                                    self._history_steps(start_date, end_date, account))
 
         if history_data:
-            write_success = self.write_to_feishu(history_data)
-
-            if write_success:
-                self.send_feishu_message(history_data)
-                return {
-                    'success': True,
-                    'data': history_data,
-                    'message': f'成功采集并写入 {history_data["date"]} 的数据（历史接口）'
-                }
-            else:
-                return {
-                    'success': False,
-                    'message': '数据写入失败'
-                }
+            return (yield from self._store_steps(account, history_data, notify, '历史接口'))
 
         return {
             'success': False,
             'message': '所有接口均失败'
         }
 
-
-def main():
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='抖音数据采集程序')
+    parser.add_argument('--config', help='配置文件路径，默认为 config.json')
+    parser.add_argument('--batch', action='store_true',
+                        help='批量采集配置中的全部账号')
+    parser.add_argument('--workers', type=int,
+                        help='批量采集并发数，默认读取 batch.workers')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='使用异步引擎批量采集（需安装 aiohttp）')
+    parser.add_argument('--from', dest='date_from', metavar='YYYY-MM-DD',
+                        help='补采起始日期（含），需与 --to 同时使用')
+    parser.add_argument('--to', dest='date_to', metavar='YYYY-MM-DD',
+                        help='补采结束日期（含）')
+    parser.add_argument('--last', type=int, metavar='N',
+                        help='补采最近 N 天（截至昨天）的数据')
+    parser.add_argument('--daemon', action='store_true',
+                        help='常驻运行，按 schedule 配置的时间点定时采集全部账号')
+    parser.add_argument('--sample', action='store_true',
+                        help='常驻运行日内采样，按间隔轮询实时接口并汇总写入当日记录')
+    parser.add_argument('--interval', type=float, metavar='SECONDS',
+                        help='日内采样间隔（秒），默认读取 sampling.interval')
+    parser.add_argument('--fill-gaps', action='store_true',
+                        help='补齐全部账号最近 retry.max_retry_days 天（截至昨天）表格中缺失的日期'
+                             '（可配合 --from/--to/--last 指定区间）')
+    parser.add_argument('--deadline', metavar='HH:MM',
+                        help='按截止时间调度采集全部账号（覆盖 scheduler.deadline），来不及时降级或跳过')
+    parser.add_argument('--budget', type=int, metavar='N',
+                        help='本次运行的 TikHub 调用次数上限（覆盖 scheduler.budget），预算不足时降级或跳过')
+    parser.add_argument('--distributed', action='store_true',
+                        help='作为分布式采集节点运行，按 coordinator 配置与其他机器分片领取账号')
+    parser.add_argument('--report', action='store_true',
+                        help='仅从本地快照库输出报表（默认最近 7 天，可配合 --from/--to/--last）')
+    parser.add_argument('--lock-wait', type=float, metavar='SECONDS',
+                        help='另一个采集进程正在运行时最多等待的秒数，超时跳过本次运行（覆盖 run_lock.wait，默认不等待）')
+    parser.add_argument('--metrics-out', metavar='PATH',
+                        help='将阶段与 HTTP 请求指标导出为 Prometheus 文本文件，'
+                             'JSON 行日志写入同名 .jsonl 文件（覆盖 metrics.out）')
+    args = parser.parse_args(argv)
+
+    if args.interval is not None and args.interval <= 0:
+        parser.error('--interval 必须为正数')
+    if args.lock_wait is not None and args.lock_wait < 0:
+        parser.error('--lock-wait 不能为负数')
+    if args.budget is not None and args.budget < 0:
+        parser.error('--budget 不能为负数')
+    if args.deadline:
+        try:
+            datetime.strptime(args.deadline, '%H:%M')
+        except ValueError:
+            parser.error('--deadline 格式应为 HH:MM')
+
+    if args.last is not None:
+        if args.last < 1:
+            parser.error('--last 必须为正整数')
+        today = datetime.now()
+        args.date_from = (today - timedelta(days=args.last)).strftime('%Y-%m-%d')
+        args.date_to = (today - timedelta(days=1)).strftime('%Y-%m-%d')
+    elif bool(args.date_from) != bool(args.date_to):
+        parser.error('--from 与 --to 需同时指定')
+    elif args.report and not args.date_from:
+        today = datetime.now()
+        args.date_from = (today - timedelta(days=6)).strftime('%Y-%m-%d')
+        args.date_to = today.strftime('%Y-%m-%d')
+
+    if args.date_from:
+        try:
+            valid = datetime.strptime(args.date_from, '%Y-%m-%d') <= datetime.strptime(args.date_to, '%Y-%m-%d')
+        except ValueError:
+            parser.error('日期格式应为 YYYY-MM-DD')
+        if not valid:
+            parser.error('--from 不能晚于 --to')
+    return args
+
+
+def print_result_table(rows):
+    """打印批量采集结果表"""
+    print(f"{'账号':<20} {'状态':<4} {'日期':<10} {'粉丝总数':>12} {'净增':>8} {'来源':<8} 说明")
+    for row in rows:
+        status = '✅' if row['success'] else '❌'
+        fans_count = f"{int(row['fans_count']):,}" if row['fans_count'] is not None else '-'
+        fans_delta = f"{int(row['fans_delta']):+,}" if row['fans_delta'] is not None else '-'
+        print(f"{row['account']:<20} {status:<4} {row['date'] or '-':<10} {fans_count:>12} "
+              f"{fans_delta:>8} {row['source'] or '-':<8} {row['message']}")
+
+    succeeded = sum(1 for row in rows if row['success'])
+    print(f"\n合计 {len(rows)} 个账号：成功 {succeeded}，失败 {len(rows) - succeeded}")
+
+
+def print_snapshot_report(rows):
+    """打印本地快照报表"""
+    print(f"{'账号':<20} {'日期':<10} {'粉丝总数':>12} {'净增':>8} {'最高':>12} {'最低':>12} {'观测':>4} 来源")
+    for row in rows:
+        fans_delta = f"{int(row['fans_delta']):+,}" if row['fans_delta'] is not None else '-'
+        print(f"{row['account']:<20} {row['date']:<10} {row['fans_count']:>12,} {fans_delta:>8} "
+              f"{row['high']:>12,} {row['low']:>12,} {row['observations']:>4} {row['source']}")
+    print(f"\n合计 {len(rows)} 条日汇总")
+
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+
     print("=" * 50)
     print("🚀 抖音数据采集程序启动 v2.0")
     print("=" * 50)
 
-    collector = DouyinDataCollector()
+    collector = DouyinDataCollector(args.config)
+    if args.metrics_out:
+        collector.metrics.set_output(args.metrics_out)
+    # 同一配置的采集进程互斥，重叠的定时任务直接跳过，不排队重复采集
+    lock = collector.run_lock()
+    try:
+        # 常驻调度在每批采集时单独加锁；日内采样与报表不与采集互斥
+        if not (args.report or args.daemon or args.sample) and not lock.acquire(blocking=False):
+            wait = args.lock_wait if args.lock_wait is not None else collector.run_lock_wait()
+            if wait <= 0:
+                print("⏭️  另一个采集进程正在运行，本次跳过")
+                return 0
+            print(f"⏳ 另一个采集进程正在运行，最多等待 {wait:g}s...")
+            if not lock.acquire(timeout=wait):
+                print(f"⏭️  等待 {wait:g}s 后另一个采集进程仍在运行，本次跳过")
+                return 0
+        return run(collector, args)
+    finally:
+        lock.release()
+        collector.close()
+
+
+def run(collector, args):
+    """按命令行参数执行采集"""
+    if args.report:
+        rows = collector.snapshot_report(args.date_from, args.date_to)
+
+        print("\n" + "=" * 50)
+        print(f"📒 本地快照 {args.date_from} 至 {args.date_to}")
+        print_snapshot_report(rows)
+        print("=" * 50)
+        return 0
+
+    if args.sample:
+        from sampling import IntradaySampler
+
+        return IntradaySampler(collector, interval=args.interval, workers=args.workers).run()
+
+    if args.daemon:
+        from daemon import CollectorDaemon
+
+        return CollectorDaemon(collector, workers=args.workers).run()
+
+    # 先补写上次运行中写入失败的数据
+    collector.replay_outbox()
+
+    if args.distributed:
+        from coordinator import DistributedRunner
+
+        rows = DistributedRunner(collector, workers=args.workers).run()
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
+    if args.fill_gaps:
+        from gaps import GapScanner
+
+        rows = GapScanner(collector, workers=args.workers).fill(start_date=args.date_from, end_date=args.date_to)
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
+    if args.date_from:
+        rows = collector.backfill_batch(args.date_from, args.date_to, workers=args.workers)
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
+    if args.deadline or args.budget is not None or collector.config.get('scheduler', {}).get('enabled'):
+        from scheduler import DailyScheduler
+
+        rows = DailyScheduler(collector, workers=args.workers, deadline=args.deadline, budget=args.budget).run()
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
+    if args.use_async:
+        from async_engine import AsyncDouyinCollector
+
+        options = dict(collector.config.get('async', {}))
+        if args.workers:
+            options['workers'] = args.workers
+        rows = AsyncDouyinCollector(collector, options).collect_all()
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
+    if args.batch or len(collector.accounts) > 1:
+        rows = collector.collect_batch(workers=args.workers)
+
+        print("\n" + "=" * 50)
+        print_result_table(rows)
+        print("=" * 50)
+        return 0 if all(row['success'] for row in rows) else 1
+
     result = collector.collect()
 
     print("\n" + "=" * 50)
@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多机分布式采集协调
+功能：多台机器同时运行采集时，通过带过期时间的租约领取账号分片，
+过期未续约的分片由其他节点接手；每个 (账号, 日期) 在写入前登记，避免重复写入与重复消耗配额
+依赖：Redis 后端需要 redis（可选依赖，pip3 install redis），默认后端只依赖标准库
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from storage import FileLock, cache_dir
+
+# 每个分片的账号数、租约有效期（秒）、无可领取分片时的轮询间隔（秒）
+DEFAULT_SHARD_SIZE = 50
+DEFAULT_LEASE_TTL = 300
+DEFAULT_POLL_INTERVAL = 15
+# 采集失败的账号在本节点的最大采集次数（含首次），未用完时所在分片放回待领取、稍后重试
+DEFAULT_MAX_ATTEMPTS = 3
+# Redis 中一次运行的全部键的保留时间（秒）
+DEFAULT_RETENTION = 7 * 86400
+
+# begin_item 的结果：登记成功可以处理 / 已完成 / 正由其他节点处理（登记未过期）
+ITEM_STARTED = 'started'
+ITEM_DONE = 'done'
+ITEM_BUSY = 'busy'
+
+
+class Lease:
+    """一个分片租约；token 每次被领取时递增，续约与释放时校验，过期后被他人领取的旧租约随之失效"""
+
+    __slots__ = ('run_id', 'shard', 'owner', 'token', 'expires_at')
+
+    def __init__(self, run_id, shard, owner, token, expires_at):
+        self.run_id = run_id
+        self.shard = shard
+        self.owner = owner
+        self.token = token
+        self.expires_at = expires_at
+
+
+class Coordinator(ABC):
+    """
+    协调后端接口，后端须实现全部抽象方法（缺少任何一个时无法实例化）
+
+    run_id 标识一次采集（通常为目标日期），分片编号为 0 ～ shard_count - 1；
+    item 为分片内的一个工作项（账号标识），同一 run_id 下每个 item 只会被成功处理一次。
+    """
+
+    @abstractmethod
+    def claim(self, run_id, shard_count, owner, ttl):
+        """领取一个未完成且未被他人持有（或租约已过期）的分片，没有可领取的分片时返回 None"""
+
+    @abstractmethod
+    def renew(self, lease, ttl, items=()):
+        """
+        续约，租约已被他人接手时返回 False
+
+        items 为持有者正在处理的 item，分片续约成功时一并续期，避免处理较慢的 item 登记过期后被其他节点重复处理
+        """
+
+    @abstractmethod
+    def release(self, lease, done=True):
+        """释放租约；done 为 True 时分片标记为已完成，否则放回待领取"""
+
+    @abstractmethod
+    def begin_item(self, run_id, item, owner, ttl):
+        """
+        登记开始处理 item
+
+        Returns:
+            str: ITEM_STARTED 登记成功 / ITEM_DONE 已完成 / ITEM_BUSY 正由其他节点处理（登记未过期）
+        """
+
+    @abstractmethod
+    def finish_item(self, run_id, item, owner, ok):
+        """结束处理 item：成功时标记为已完成，失败时撤销登记以便重试"""
+
+    @abstractmethod
+    def report(self, run_id, owner, stats):
+        """上报本节点进度"""
+
+    @abstractmethod
+    def progress(self, run_id):
+        """
+        整体进度
+
+        Returns:
+            dict: {'shards', 'shards_done', 'shards_leased', 'items_done', 'hosts': {owner: stats}}
+        """
+
+    def close(self):
+        """关闭连接"""
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    run_id      TEXT NOT NULL,
+    shard       INTEGER NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    owner       TEXT,
+    token       INTEGER NOT NULL DEFAULT 0,
+    expires_at  REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, shard)
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id      TEXT NOT NULL,
+    item        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    owner       TEXT NOT NULL,
+    expires_at  REAL NOT NULL,
+    PRIMARY KEY (run_id, item)
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    run_id      TEXT NOT NULL,
+    owner       TEXT NOT NULL,
+    stats       TEXT NOT NULL,
+    updated     REAL NOT NULL,
+    PRIMARY KEY (run_id, owner)
+);
+"""
+
+
+class SQLiteCoordinator(Coordinator):
+    """
+    共享 SQLite 文件 + 文件锁后端
+
+    数据库放在各节点都能访问的共享目录（如 NFS）上；网络文件系统上 SQLite 自身的锁不可靠，
+    每个操作都在同目录的 .lock 文件锁内以短事务完成，且不使用 WAL 模式。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{self.path}.lock")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock, self._file_lock:
+            self._conn.executescript(SQLITE_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """在线程锁与文件锁内执行一个写事务"""
+        with self._lock, self._file_lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def claim(self, run_id, shard_count, owner, ttl):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany('INSERT OR IGNORE INTO shards (run_id, shard) VALUES (?, ?)',
+                             [(run_id, shard) for shard in range(shard_count)])
+            row = conn.execute(
+                "SELECT shard, token FROM shards WHERE run_id = ? AND shard < ? AND "
+                "(status = 'pending' OR (status = 'leased' AND expires_at < ?)) "
+                "ORDER BY status = 'leased', shard LIMIT 1",
+                (run_id, shard_count, now)
+            ).fetchone()
+            if row is None:
+                return None
+            shard, token = row[0], row[1] + 1
+            conn.execute(
+                "UPDATE shards SET status = 'leased', owner = ?, token = ?, expires_at = ? "
+                'WHERE run_id = ? AND shard = ?',
+                (owner, token, now + ttl, run_id, shard)
+            )
+        return Lease(run_id, shard, owner, token, now + ttl)
+
+    def renew(self, lease, ttl, items=()):
+        expires_at = time.time() + ttl
+        with self._transaction() as conn:
+            renewed = conn.execute(
+                "UPDATE shards SET expires_at = ? WHERE run_id = ? AND shard = ? AND status = 'leased' "
+                'AND owner = ? AND token = ?',
+                (expires_at, lease.run_id, lease.shard, lease.owner, lease.token)
+            ).rowcount
+            if renewed and items:
+                conn.executemany(
+                    "UPDATE items SET expires_at = ? WHERE run_id = ? AND item = ? AND owner = ? AND status = 'working'",
+                    [(expires_at, lease.run_id, item, lease.owner) for item in items]
+                )
+        if renewed:
+            lease.expires_at = expires_at
+        return bool(renewed)
+
+    def release(self, lease, done=True):
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE shards SET status = ?, owner = NULL, expires_at = 0 '
+                "WHERE run_id = ? AND shard = ? AND status = 'leased' AND owner = ? AND token = ?",
+                ('done' if done else 'pending', lease.run_id, lease.shard, lease.owner, lease.token)
+            )
+
+    def begin_item(self, run_id, item, owner, ttl):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT status, owner, expires_at FROM items WHERE run_id = ? AND item = ?',
+                               (run_id, item)).fetchone()
+            if row is not None and row[0] == 'done':
+                return ITEM_DONE
+            if row is not None and row[1] != owner and row[2] >= now:
+                return ITEM_BUSY
+            conn.execute(
+                "INSERT OR REPLACE INTO items (run_id, item, status, owner, expires_at) VALUES (?, ?, 'working', ?, ?)",
+                (run_id, item, owner, now + ttl)
+            )
+        return ITEM_STARTED
+
+    def finish_item(self, run_id, item, owner, ok):
+        with self._transaction() as conn:
+            if ok:
+                conn.execute("UPDATE items SET status = 'done' WHERE run_id = ? AND item = ?", (run_id, item))
+            else:
+                conn.execute("DELETE FROM items WHERE run_id = ? AND item = ? AND owner = ? AND status = 'working'",
+                             (run_id, item, owner))
+
+    def report(self, run_id, owner, stats):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO hosts (run_id, owner, stats, updated) VALUES (?, ?, ?, ?)',
+                         (run_id, owner, json.dumps(stats, ensure_ascii=False), time.time()))
+
+    def progress(self, run_id):
+        now = time.time()
+        with self._transaction() as conn:
+            shards = dict(conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND expires_at < ? THEN 'pending' ELSE status END, COUNT(*) "
+                'FROM shards WHERE run_id = ? GROUP BY 1', (now, run_id)
+            ).fetchall())
+            items_done = conn.execute("SELECT COUNT(*) FROM items WHERE run_id = ? AND status = 'done'",
+                                      (run_id,)).fetchone()[0]
+            hosts = conn.execute('SELECT owner, stats FROM hosts WHERE run_id = ?', (run_id,)).fetchall()
+        return {
+            'shards': sum(shards.values()),
+            'shards_done': shards.get('done', 0),
+            'shards_leased': shards.get('leased', 0),
+            'items_done': items_done,
+            'hosts': {owner: json.loads(stats) for owner, stats in hosts}
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 键值等于期望值时才续期 / 删除，保证只操作自己持有的租约
+# 续约：KEYS[1] 为分片租约，其余为 item 登记，值等于 ARGV[3]（持有者）的登记随分片一并续期
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+for i = 2, #KEYS do
+    if redis.call('GET', KEYS[i]) == ARGV[3] then
+        redis.call('PEXPIRE', KEYS[i], ARGV[2])
+    end
+end
+return 1
+"""
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+# 释放分片：校验租约、标记完成（ARGV[2] 为 1 时）与删除租约在同一脚本内完成，
+# 避免校验之后租约过期并被他人领取时仍把分片标记为完成
+RELEASE_SHARD_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '1' then
+    redis.call('SADD', KEYS[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+class RedisCoordinator(Coordinator):
+    """
+    Redis 后端
+
+    租约为 SET NX PX 键，值为 "owner#token"；已完成的分片与 item 记在集合中，
+    各节点进度记在哈希中。client 可传入任何兼容 redis-py 接口的客户端（如本地替身），
+    未传入时按 url 创建。
+    """
+
+    def __init__(self, url=None, client=None, prefix='douyin', retention=DEFAULT_RETENTION):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("Redis 协调后端需要 redis，请执行: pip3 install redis")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0', decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.retention = int(retention)
+
+    def _key(self, run_id, *parts):
+        return ':'.join((self.prefix, 'run', run_id) + tuple(str(part) for part in parts))
+
+    @staticmethod
+    def _text(value):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def _touch(self, run_id, *keys):
+        for key in keys:
+            self.client.expire(self._key(run_id, key), self.retention)
+
+    def claim(self, run_id, shard_count, owner, ttl):
+        self.client.set(self._key(run_id, 'shard_count'), shard_count, ex=self.retention)
+        done = {int(self._text(shard)) for shard in self.client.smembers(self._key(run_id, 'shards_done'))}
+        for shard in range(shard_count):
+            if shard in done:
+                continue
+            token = self.client.incr(self._key(run_id, 'fence'))
+            if self.client.set(self._key(run_id, 'lease', shard), f"{owner}#{token}", nx=True, px=int(ttl * 1000)):
+                self._touch(run_id, 'fence')
+                # 领取后再次确认分片未在此期间完成
+                if self.client.sismember(self._key(run_id, 'shards_done'), shard):
+                    self.client.delete(self._key(run_id, 'lease', shard))
+                    continue
+                return Lease(run_id, shard, owner, token, time.time() + ttl)
+        return None
+
+    def renew(self, lease, ttl, items=()):
+        keys = [self._key(lease.run_id, 'lease', lease.shard)] + [self._key(lease.run_id, 'item', item)
+                                                                  for item in items]
+        renewed = self.client.eval(RENEW_SCRIPT, len(keys), *keys,
+                                   f"{lease.owner}#{lease.token}", int(ttl * 1000), lease.owner)
+        if renewed:
+            lease.expires_at = time.time() + ttl
+        return bool(renewed)
+
+    def release(self, lease, done=True):
+        self.client.eval(RELEASE_SHARD_SCRIPT, 2, self._key(lease.run_id, 'lease', lease.shard),
+                         self._key(lease.run_id, 'shards_done'), f"{lease.owner}#{lease.token}",
+                         1 if done else 0, lease.shard, self.retention)
+
+    def begin_item(self, run_id, item, owner, ttl):
+        if self.client.sismember(self._key(run_id, 'items_done'), item):
+            return ITEM_DONE
+        key = self._key(run_id, 'item', item)
+        if self.client.set(key, owner, nx=True, px=int(ttl * 1000)):
+            return ITEM_STARTED
+        if self._text(self.client.get(key)) == owner:
+            self.client.pexpire(key, int(ttl * 1000))
+            return ITEM_STARTED
+        # 登记键可能恰好在两次请求之间随完成而删除
+        if self.client.sismember(self._key(run_id, 'items_done'), item):
+            return ITEM_DONE
+        return ITEM_BUSY
+
+    def finish_item(self, run_id, item, owner, ok):
+        if ok:
+            self.client.sadd(self._key(run_id, 'items_done'), item)
+            self._touch(run_id, 'items_done')
+        self.client.eval(RELEASE_SCRIPT, 1, self._key(run_id, 'item', item), owner)
+
+    def report(self, run_id, owner, stats):
+        self.client.hset(self._key(run_id, 'hosts'), owner, json.dumps(stats, ensure_ascii=False))
+        self._touch(run_id, 'hosts')
+
+    def progress(self, run_id):
+        shard_count = int(self._text(self.client.get(self._key(run_id, 'shard_count'))) or 0)
+        leased = sum(1 for shard in range(shard_count) if self.client.exists(self._key(run_id, 'lease', shard)))
+        hosts = self.client.hgetall(self._key(run_id, 'hosts'))
+        return {
+            'shards': shard_count,
+            'shards_done': self.client.scard(self._key(run_id, 'shards_done')),
+            'shards_leased': leased,
+            'items_done': self.client.scard(self._key(run_id, 'items_done')),
+            'hosts': {self._text(owner): json.loads(self._text(stats)) for owner, stats in hosts.items()}
+        }
+
+    def close(self):
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+
+def create_coordinator(config, config_path):
+    """
+    按 config.json 的 coordinator 段创建协调后端
+
+    backend: sqlite（默认）/ redis
+    path: SQLite 数据库路径，各节点需指向同一共享文件，默认为本地缓存目录下的 coordinator.sqlite
+    url: Redis 地址
+    """
+    options = config.get('coordinator', {})
+    backend = options.get('backend', 'sqlite')
+    if backend == 'redis':
+        return RedisCoordinator(options.get('url'), prefix=options.get('prefix', 'douyin'),
+                                retention=options.get('retention', DEFAULT_RETENTION))
+    if backend != 'sqlite':
+        raise ValueError(f"不支持的协调后端: {backend}")
+
+    path = options.get('path')
+    if path:
+        path = Path(path)
+        if not path.is_absolute():
+            path = Path(config_path).parent / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        path = cache_dir(config, config_path) / 'coordinator.sqlite'
+    return SQLiteCoordinator(path)
+
+
+class LeaseKeeper:
+    """
+    后台线程每隔 ttl / 3 续约一次；续约失败（租约已被他人接手）后 lost 置位
+
+    hold / drop 登记正在处理的 item，续约时随分片一并续期
+    """
+
+    def __init__(self, coordinator, lease, ttl):
+        self.coordinator = coordinator
+        self.lease = lease
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self._items = set()
+        self._items_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'lease-{lease.shard}', daemon=True)
+
+    def hold(self, item):
+        with self._items_lock:
+            self._items.add(item)
+
+    def drop(self, item):
+        with self._items_lock:
+            self._items.discard(item)
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            with self._items_lock:
+                items = sorted(self._items)
+            try:
+                ok = self.coordinator.renew(self.lease, self.ttl, items)
+            except Exception as e:
+                print(f"⚠️  分片 {self.lease.shard} 续约异常: {e}")
+                ok = time.time() < self.lease.expires_at
+            if not ok:
+                print(f"⚠️  分片 {self.lease.shard} 租约已失效，停止处理该分片")
+                self.lost.set()
+                return
+
+    def alive(self):
+        return not self.lost.is_set() and time.time() < self.lease.expires_at
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+class DistributedRunner:
+    """
+    分布式采集节点
+
+    全部账号按 _account_key 排序后切分为固定大小的分片（各节点账号配置需一致），
+    节点循环领取分片并通过 collect_batch 采集；每个账号采集前在协调后端登记
+    (账号, 日期)，已完成的账号直接跳过。正被其他节点处理的账号不计入结果，
+    所在分片不标记完成、等待 poll_interval 后重新领取，直到该账号完成或对方登记过期
+    （对方节点中途退出时由本节点接手）。采集失败的账号同样使所在分片不标记完成，
+    poll_interval 后重新领取重试，每个账号在本节点最多采集 max_attempts 次。
+    全部分片完成后退出；暂无可领取分片时等待其他节点完成或租约过期。
+
+    配置项（config.json 的 coordinator 段，均可选）：
+        shard_size: 每个分片的账号数
+        lease_ttl: 租约有效期（秒），节点每隔 lease_ttl / 3 续约一次
+        poll_interval: 暂无可领取分片时的轮询间隔（秒）
+        max_attempts: 采集失败的账号在本节点的最大采集次数（含首次）
+        host: 节点名称，默认为 主机名:进程号
+    """
+
+    def __init__(self, collector, coordinator=None, options=None, workers=None):
+        self.collector = collector
+        options = options or collector.config.get('coordinator', {})
+        self.coordinator = coordinator or create_coordinator(collector.config, collector.config_path)
+        self.shard_size = max(1, int(options.get('shard_size', DEFAULT_SHARD_SIZE)))
+        self.lease_ttl = float(options.get('lease_ttl', DEFAULT_LEASE_TTL))
+        self.poll_interval = float(options.get('poll_interval', DEFAULT_POLL_INTERVAL))
+        self.max_attempts = max(1, int(options.get('max_attempts', DEFAULT_MAX_ATTEMPTS)))
+        self.host = options.get('host') or f"{socket.gethostname()}:{os.getpid()}"
+        self.workers = workers
+
+    def shards(self, accounts):
+        """按账号标识排序后切分的分片列表"""
+        ordered = sorted(accounts, key=self.collector._account_key)
+        return [ordered[offset:offset + self.shard_size] for offset in range(0, len(ordered), self.shard_size)]
+
+    def _guard(self, run_id, keeper, busy):
+        """
+        collect_batch 的单账号包装：租约有效且登记成功才采集，采集结束后回写完成状态
+
+        正由其他节点处理的账号加入 busy（账号标识集合）
+        """
+        def guard(account, collect):
+            if not keeper.alive():
+                return {'success': False, 'message': '分片租约已失效，交由其他节点采集'}
+            item = self.collector._account_key(account)
+            state = self.coordinator.begin_item(run_id, item, self.host, self.lease_ttl)
+            if state == ITEM_DONE:
+                return {'success': True, 'message': '已由其他节点采集'}
+            if state == ITEM_BUSY:
+                busy.add(item)
+                return {'success': False, 'message': '正由其他节点采集，稍后重试'}
+            result = None
+            keeper.hold(item)
+            try:
+                result = collect(account)
+                return result
+            finally:
+                keeper.drop(item)
+                self.coordinator.finish_item(run_id, item, self.host, bool(result and result['success']))
+        return guard
+
+    def run(self, accounts=None, target_date=None):
+        """
+        作为一个节点参与采集，直到全部分片完成
+
+        Returns:
+            list: 本节点处理的账号结果行，见 DouyinDataCollector._result_row
+        """
+        accounts = accounts or self.collector.accounts
+        run_id = target_date or datetime.now().strftime('%Y-%m-%d')
+        shards = self.shards(accounts)
+        stats = {'shards': 0, 'accounts': 0, 'succeeded': 0, 'failed': 0, 'started': time.time()}
+        rows = []
+        # 因账号正由其他节点处理或采集失败而未完成的分片 → 这些账号的标识，重新领取时只处理这些账号
+        retry = {}
+        # 账号标识 → 本节点已采集失败的次数
+        failures = {}
+
+        print(f"🛰️  节点 {self.host} 加入分布式采集 {run_id}：{len(accounts)} 个账号，{len(shards)} 个分片")
+        while True:
+            lease = self.coordinator.claim(run_id, len(shards), self.host, self.lease_ttl)
+            if lease is None:
+                progress = self.coordinator.progress(run_id)
+                if progress['shards_done'] >= len(shards):
+                    break
+                print(f"💤 暂无可领取的分片（进行中 {progress['shards_leased']} 个），"
+                      f"{self.poll_interval:g}s 后重试")
+                time.sleep(self.poll_interval)
+                continue
+
+            shard = shards[lease.shard]
+            if lease.shard in retry:
+                waiting = retry.pop(lease.shard)
+                shard = [account for account in shard if self.collector._account_key(account) in waiting]
+            print(f"📦 领取分片 {lease.shard + 1}/{len(shards)}（{len(shard)} 个账号）")
+            busy = set()
+            with LeaseKeeper(self.coordinator, lease, self.lease_ttl) as keeper:
+                shard_rows = self.collector.collect_batch(shard, target_date, self.workers,
+                                                          guard=self._guard(run_id, keeper, busy))
+            # 采集失败且未用完重试次数的账号稍后重试
+            failed = set()
+            if not keeper.lost.is_set():
+                for account, row in zip(shard, shard_rows):
+                    item = self.collector._account_key(account)
+                    if row['success'] or item in busy:
+                        continue
+                    failures[item] = failures.get(item, 0) + 1
+                    if failures[item] < self.max_attempts:
+                        failed.add(item)
+            # 租约中途失效、有账号正由其他节点处理或待重试的分片不标记完成：
+            # 前者由接手的节点处理剩余账号，后两者稍后重新领取，对方中途退出时由本节点接手
+            waiting = busy | failed
+            self.coordinator.release(lease, done=not keeper.lost.is_set() and not waiting)
+            shard_rows = [row for account, row in zip(shard, shard_rows)
+                          if self.collector._account_key(account) not in waiting]
+
+            rows.extend(shard_rows)
+            stats['shards'] += 1
+            stats['accounts'] += len(shard_rows)
+            stats['succeeded'] += sum(1 for row in shard_rows if row['success'])
+            stats['failed'] += sum(1 for row in shard_rows if not row['success'])
+            stats['updated'] = time.time()
+            self.coordinator.report(run_id, self.host, stats)
+            self._print_progress(run_id, len(accounts))
+            if waiting:
+                retry[lease.shard] = waiting
+                if busy:
+                    print(f"⏳ 分片 {lease.shard + 1} 中 {len(busy)} 个账号正由其他节点采集，"
+                          f"{self.poll_interval:g}s 后重新领取")
+                if failed:
+                    print(f"🔁 分片 {lease.shard + 1} 中 {len(failed)} 个账号采集失败，"
+                          f"{self.poll_interval:g}s 后重新领取重试")
+                time.sleep(self.poll_interval)
+
+        self.coordinator.close()
+        print(f"🏁 节点 {self.host} 完成：{stats['shards']} 个分片，{stats['accounts']} 个账号")
+        return rows
+
+    def _print_progress(self, run_id, total):
+        progress = self.coordinator.progress(run_id)
+        print(f"📊 整体进度：分片 {progress['shards_done']}/{progress['shards']}，"
+              f"账号 {progress['items_done']}/{total}，节点 {len(progress['hosts'])} 个")
+        for host, stats in sorted(progress['hosts'].items()):
+            elapsed = max(stats.get('updated', stats['started']) - stats['started'], 1e-9)
+            print(f"   {host}: 分片 {stats['shards']}，账号 {stats['accounts']}"
+                  f"（成功 {stats['succeeded']}，失败 {stats['failed']}），{stats['accounts'] / elapsed:.1f} 个/秒")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻调度进程
+功能：单进程常驻，按配置的时间点为每个账号调度采集，
+连接池、飞书 token、本地索引与缓存在多次采集之间保持复用
+"""
+
+import heapq
+import itertools
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 默认每天采集时间点与随机延后上限（秒）
+DEFAULT_TIMES = ['12:30']
+DEFAULT_JITTER = 300
+# 堆中表示每晚缺失日期补齐任务的账号序号
+GAP_SCAN = -1
+
+
+def parse_times(value):
+    """
+    解析采集时间点
+
+    Args:
+        value: "HH:MM" 列表，或逗号分隔的字符串（CSV 账号文件中使用）
+
+    Returns:
+        list: 升序排列的 (hour, minute)
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    times = set()
+    for item in value:
+        item = str(item).strip()
+        if not item:
+            continue
+        try:
+            parsed = datetime.strptime(item, '%H:%M')
+        except ValueError:
+            raise ValueError(f"采集时间格式应为 HH:MM: {item}")
+        times.add((parsed.hour, parsed.minute))
+    if not times:
+        raise ValueError("采集时间不能为空")
+    return sorted(times)
+
+
+def next_slot(times, after):
+    """after 之后（不含）的下一个采集时间点"""
+    for hour, minute in times:
+        slot = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if slot > after:
+            return slot
+    hour, minute = times[0]
+    return (after + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+class CollectorDaemon:
+    """
+    常驻采集调度器
+
+    每个账号按自己的采集时间点排入最小堆，到期的账号合并为一批，
+    通过 collect_batch 并发采集；实际开始时间在时间点之后随机延后 0～jitter 秒，
+    避免大量账号同时请求。每批执行期间持有运行锁，与手动 / cron 启动的采集进程互斥。
+
+    收到 SIGTERM / SIGINT 后不再开始新的批次，当前批次完成后退出。
+
+    配置项（config.json 的 schedule 段，均可选）：
+        times: 每天的采集时间点，如 ["09:00", "21:00"]
+        jitter: 随机延后上限（秒）
+        run_on_start: 启动时立即采集一次全部账号
+        gap_scan: 每天补齐缺失日期的时间点（如 "03:30"），未配置时不补齐，见 gaps.GapScanner
+
+    账号可通过 schedule 字段（列表，或 CSV 中逗号分隔的字符串）单独指定采集时间点。
+    """
+
+    def __init__(self, collector, options=None, workers=None):
+        self.collector = collector
+        options = options or collector.config.get('schedule', {})
+        self.times = parse_times(options.get('times', DEFAULT_TIMES))
+        self.jitter = float(options.get('jitter', DEFAULT_JITTER))
+        self.run_on_start = bool(options.get('run_on_start', False))
+        self.gap_times = parse_times(options['gap_scan']) if options.get('gap_scan') else None
+        self.workers = workers
+
+        self._stop = threading.Event()
+        self._heap = []
+        self._seq = itertools.count()
+
+    def _account_times(self, account):
+        """账号的采集时间点，未单独配置时使用全局配置"""
+        if account.get('schedule'):
+            return parse_times(account['schedule'])
+        return self.times
+
+    def _push(self, idx, slot):
+        """将账号排入下一个采集时间点"""
+        due = slot.timestamp() + random.uniform(0, self.jitter)
+        heapq.heappush(self._heap, (due, next(self._seq), idx, slot))
+
+    def schedule_all(self, now=None):
+        """为全部账号安排下一次采集"""
+        now = now or datetime.now()
+        self._heap = []
+        for idx, account in enumerate(self.collector.accounts):
+            self._push(idx, next_slot(self._account_times(account), now))
+        if self.gap_times:
+            self._push(GAP_SCAN, next_slot(self.gap_times, now))
+
+    def stop(self, signum=None, frame=None):
+        """请求停止：当前批次完成后退出"""
+        if signum is not None:
+            print(f"\n🛑 收到信号 {signum}，当前批次完成后退出...")
+        self._stop.set()
+
+    def run(self):
+        """运行调度循环，直到收到停止信号"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        print(f"🕰️  常驻调度已启动：{len(self.collector.accounts)} 个账号，"
+              f"默认采集时间 {', '.join(f'{h:02d}:{m:02d}' for h, m in self.times)}，随机延后 ≤ {self.jitter:g}s")
+
+        if self.run_on_start:
+            self._run_batch(list(self.collector.accounts), datetime.now())
+
+        self.schedule_all()
+        while not self._stop.is_set():
+            due, _, _, _ = self._heap[0]
+            wait = due - time.time()
+            if wait > 0:
+                print(f"💤 下一次采集: {datetime.fromtimestamp(due).strftime('%Y-%m-%d %H:%M:%S')}")
+                # 分段等待，便于及时响应停止信号
+                if self._stop.wait(min(wait, 3600)) or time.time() < due:
+                    continue
+
+            batch = []
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, idx, slot = heapq.heappop(self._heap)
+                batch.append((idx, slot))
+
+            accounts = [self.collector.accounts[idx] for idx, _ in batch if idx != GAP_SCAN]
+            if accounts:
+                self._run_batch(accounts, min(slot for idx, slot in batch if idx != GAP_SCAN))
+            if len(accounts) < len(batch):
+                self._run_gap_scan()
+
+            # 批次耗时过长时跳过已错过的时间点
+            current = datetime.now()
+            for idx, _ in batch:
+                times = self.gap_times if idx == GAP_SCAN else self._account_times(self.collector.accounts[idx])
+                self._push(idx, next_slot(times, current))
+
+        print("👋 常驻调度已退出")
+        return 0
+
+    def _run_batch(self, accounts, slot):
+        """采集一批到期的账号，slot 为触发本批次的（最早的）采集时间点"""
+        from collector import print_result_table
+
+        print("\n" + "=" * 50)
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} 开始采集 {len(accounts)} 个账号")
+        try:
+            with self.collector.run_lock():
+                self.collector.replay_outbox()
+                if self.collector.config.get('scheduler', {}).get('enabled'):
+                    from scheduler import DailyScheduler
+
+                    # 截止时间相对触发本批次的时间点计算，随机延后不会使其提前过期
+                    rows = DailyScheduler(self.collector, workers=self.workers, slot=slot).run(accounts)
+                else:
+                    rows = self.collector.collect_batch(accounts, workers=self.workers)
+        except Exception as e:
+            # 单次批次异常不影响后续调度
+            print(f"❌ 本批次采集异常: {e}")
+            return
+
+        print_result_table(rows)
+        print("=" * 50)
+        self.collector.flush()
+
+    def _run_gap_scan(self):
+        """补齐全部账号最近几天的缺失日期"""
+        from collector import print_result_table
+        from gaps import GapScanner
+
+        print("\n" + "=" * 50)
+        print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} 开始补齐缺失日期")
+        try:
+            with self.collector.run_lock():
+                self.collector.replay_outbox()
+                rows = GapScanner(self.collector, workers=self.workers).fill()
+        except Exception as e:
+            print(f"❌ 缺失日期补齐异常: {e}")
+            return
+
+        print_result_table(rows)
+        print("=" * 50)
+        self.collector.flush()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口健康度统计
+功能：记录每个接口的延迟分位数与成功率并跨运行持久化，
+据此调整接口尝试顺序、熔断持续失败的接口、推算每个接口的超时时间
+"""
+
+import json
+import threading
+import time
+
+from storage import FileLock, write_private_file
+
+DEFAULT_WINDOW = 200
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 300
+DEFAULT_TIMEOUT_MULTIPLIER = 1.5
+DEFAULT_MIN_TIMEOUT = 2.0
+DEFAULT_MAX_TIMEOUT = 10.0
+
+
+def quantile(values, q):
+    """计算分位数（最近秩法），values 为空时返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class EndpointHealth:
+    """
+    接口健康度统计
+
+    每个接口保留最近 window 次请求的延迟与成败，存储在本地 JSON 文件中。
+
+    - order(): 成功率高、延迟低的接口排在前面；样本不足 min_samples 的接口
+      视为健康并优先尝试，以便积累样本
+    - 连续失败 failure_threshold 次后熔断 cooldown 秒，期间跳过该接口；
+      冷却结束后恢复尝试，再次失败立即重新熔断，成功即恢复
+    - timeout_for(): 读取超时 = p99 延迟 × timeout_multiplier，并限制在
+      [min_timeout, max_timeout] 区间内
+
+    配置项（config.json 的 endpoint_health 段，均可选）：
+        enabled, window, min_samples, failure_threshold, cooldown,
+        timeout_multiplier, min_timeout, max_timeout
+    """
+
+    def __init__(self, path, options=None):
+        options = options or {}
+        self.path = path
+        self.window = int(options.get('window', DEFAULT_WINDOW))
+        self.min_samples = int(options.get('min_samples', DEFAULT_MIN_SAMPLES))
+        self.failure_threshold = int(options.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD))
+        self.cooldown = float(options.get('cooldown', DEFAULT_COOLDOWN))
+        self.timeout_multiplier = float(options.get('timeout_multiplier', DEFAULT_TIMEOUT_MULTIPLIER))
+        self.min_timeout = float(options.get('min_timeout', DEFAULT_MIN_TIMEOUT))
+        self.max_timeout = float(options.get('max_timeout', DEFAULT_MAX_TIMEOUT))
+
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{path}.lock")
+        self._stats = self._load()
+        self._dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _entry(self, url):
+        return self._stats.setdefault(url, {
+            'latencies': [],
+            'outcomes': '',
+            'consecutive_failures': 0,
+            'open_until': 0
+        })
+
+    def record(self, url, latency, ok):
+        """记录一次请求结果（限流不应计入）"""
+        with self._lock:
+            entry = self._entry(url)
+            entry['outcomes'] = (entry['outcomes'] + ('1' if ok else '0'))[-self.window:]
+            if ok:
+                entry['latencies'] = (entry['latencies'] + [round(latency, 4)])[-self.window:]
+                entry['consecutive_failures'] = 0
+                entry['open_until'] = 0
+            else:
+                entry['consecutive_failures'] += 1
+                if entry['consecutive_failures'] >= self.failure_threshold:
+                    entry['open_until'] = time.time() + self.cooldown
+            self._dirty = True
+
+    def success_rate(self, url):
+        """最近 window 次请求的成功率，无样本时返回 None"""
+        with self._lock:
+            outcomes = self._stats.get(url, {}).get('outcomes', '')
+        return outcomes.count('1') / len(outcomes) if outcomes else None
+
+    def latency(self, url, q):
+        """成功请求延迟的 q 分位数（秒），样本不足时返回 None"""
+        with self._lock:
+            latencies = list(self._stats.get(url, {}).get('latencies', []))
+        if len(latencies) < self.min_samples:
+            return None
+        return quantile(latencies, q)
+
+    def order(self, urls):
+        """
+        按健康度排序接口，返回 [(配置中的序号, url), ...]
+
+        熔断冷却中的接口被剔除；全部接口都在冷却时仍按健康度返回全部接口。
+        """
+        now = time.time()
+        scored = []
+        with self._lock:
+            for idx, url in enumerate(urls):
+                entry = self._stats.get(url, {})
+                outcomes = entry.get('outcomes', '')
+                open_circuit = entry.get('open_until', 0) > now
+                if len(outcomes) < self.min_samples:
+                    score = (-1.0, 0.0)
+                else:
+                    # 成功率按 10% 分档，避免轻微波动导致顺序频繁变化
+                    rate = outcomes.count('1') / len(outcomes)
+                    latencies = entry.get('latencies', [])
+                    p50 = quantile(latencies, 0.5) if len(latencies) >= self.min_samples else None
+                    score = (-round(rate, 1), p50 or 0.0)
+                scored.append((open_circuit, score, idx, url))
+
+        scored.sort(key=lambda item: item[:3])
+        healthy = [(idx, url) for open_circuit, _, idx, url in scored if not open_circuit]
+        return healthy or [(idx, url) for _, _, idx, url in scored]
+
+    def timeout_for(self, url, default):
+        """根据 p99 延迟推算的读取超时（秒），不超过 default；样本不足时返回 default"""
+        p99 = self.latency(url, 0.99)
+        if p99 is None:
+            return default
+        return min(default, self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def save(self):
+        """写回本地文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            content = json.dumps(self._stats, ensure_ascii=False)
+            self._dirty = False
+        with self._file_lock:
+            write_private_file(self.path, content)
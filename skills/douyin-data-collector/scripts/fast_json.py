@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 快速解析
+功能：实时接口（handler_user_profile*）的响应体包含庞大的用户对象，而采集只需要
+code、time 与 data.user.follower_count 三个字段；直接在原始字节上定位这三个键，
+不构建完整的对象树。字段缺失、重复或格式异常时回退到完整解析。
+依赖：orjson（可选依赖，pip3 install orjson），安装后完整解析改用 orjson
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 键名前后的引号保证不会匹配到 "xxx_code" 之类的键；JSON 字符串内的引号必须转义，
+# 因此也不会匹配到字符串值中的同名文本
+KEY_RE = {
+    key: re.compile(rb'"' + key.encode() + rb'"\s*:\s*')
+    for key in ('code', 'time', 'follower_count', 'data', 'user')
+}
+INT_VALUE_RE = re.compile(rb'(-?\d+)\s*[,}]')
+STRING_VALUE_RE = re.compile(rb'("(?:[^"\\]|\\.)*")')
+# 校验嵌套层级时先去掉字符串，再只保留括号
+STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+NON_BRACKET_RE = re.compile(rb'[^{}\[\]]+')
+# 响应体首尾（忽略空白）须为花括号，避免为判断而复制整个响应体
+OBJECT_START_RE = re.compile(rb'\s*\{')
+OBJECT_END_RE = re.compile(rb'\}\s*\Z')
+
+
+def loads(body):
+    """完整解析 JSON（bytes 或 str），安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _unique_key(body, key):
+    """
+    键在 body 中的 (键起始位置, 值起始位置)：未出现时返回 ()，出现多次时返回 None
+    """
+    matches = list(KEY_RE[key].finditer(body))
+    if not matches:
+        return ()
+    if len(matches) > 1:
+        return None
+    return matches[0].start(), matches[0].end()
+
+
+def _object_key_before(body, key, end):
+    """end 之前最后一次出现的 key 且其值为对象时返回 (键起始位置, 值的 { 位置)，否则返回 None"""
+    match = None
+    for match in KEY_RE[key].finditer(body, 0, end):
+        pass
+    if match is None or body[match.end():match.end() + 1] != b'{':
+        return None
+    return match.start(), match.end()
+
+
+def _balanced(segment):
+    """片段（起止均在字符串之外）中的括号是否全部成对，即没有进入更深的层级，也没有离开所在对象"""
+    brackets = NON_BRACKET_RE.sub(b'', STRING_RE.sub(b'', segment))
+    while brackets:
+        reduced = brackets.replace(b'{}', b'').replace(b'[]', b'')
+        if reduced == brackets:
+            return False
+        brackets = reduced
+    return True
+
+
+def _is_member(body, brace, key_start):
+    """key_start 处的键是否为 brace 处开始的对象的直接成员"""
+    return _balanced(body[brace + 1:key_start])
+
+
+def _is_top_member(body, top, end, key_start, value_end):
+    """
+    key_start 处的键（值在 value_end 处结束）是否为顶层对象（top 至 end 处的花括号）的直接成员，
+    从较近的一端检查，位于响应体末尾的键无需扫描整个响应体
+    """
+    if key_start - top <= end - value_end:
+        return _balanced(body[top + 1:key_start])
+    return _balanced(body[value_end:end])
+
+
+def _value(body, found, value_re):
+    """_unique_key 的结果对应的值的 match 对象，值格式不符时返回 None"""
+    return value_re.match(body, found[1])
+
+
+def _fast_profile(body):
+    """
+    按键的位置直接取值：code、follower_count 各恰好出现一次（time 至多一次），
+    code / time 为顶层成员，follower_count 位于顶层 data 对象中 user 对象的直接成员；
+    任一条件不满足（嵌套对象中有同名键、user 为 null、字段缺失等）时返回 None
+    """
+    code, fans, time_key = (_unique_key(body, key) for key in ('code', 'follower_count', 'time'))
+    if not code or not fans or time_key is None:
+        return None
+    # 非 200 的错误响应体很小，完整解析以保留 message 等字段
+    code_value = _value(body, code, INT_VALUE_RE)
+    if code_value is None or code_value.group(1) != b'200':
+        return None
+    fans_value = _value(body, fans, INT_VALUE_RE)
+    time_value = _value(body, time_key, STRING_VALUE_RE) if time_key else None
+    if fans_value is None or (time_key and time_value is None):
+        return None
+
+    user = _object_key_before(body, 'user', fans[0])
+    data = _object_key_before(body, 'data', user[0]) if user else None
+    if data is None:
+        return None
+    # 其后再出现同名键时完整解析以后出现的为准
+    if KEY_RE['user'].search(body, fans[0]) or KEY_RE['data'].search(body, fans[0]):
+        return None
+    top, end = body.index(b'{'), body.rindex(b'}')
+    # 值的结束位置：整数值不含其后的分隔符；对象值的结束位置未知，从对象起始检查
+    if not (_is_top_member(body, top, end, code[0], code_value.end(1))
+            and _is_member(body, top, data[0])
+            and _is_member(body, data[1], user[0])
+            and _is_member(body, user[1], fans[0])
+            and (not time_key or _is_top_member(body, top, end, time_key[0], time_value.end(1)))):
+        return None
+
+    result = {'code': 200, 'data': {'user': {'follower_count': int(fans_value.group(1))}}}
+    if time_key:
+        result['time'] = json.loads(time_value.group(1))
+    return result
+
+
+def extract_profile(body):
+    """
+    从实时接口响应体中提取采集需要的字段
+
+    code 为 200、字段各自唯一且位于完整解析时的对应路径上时直接取值，见 _fast_profile；
+    否则完整解析后按路径读取，两种方式的结果一致。
+
+    Args:
+        body: 响应体字节
+
+    Returns:
+        dict: 与完整响应结构一致的精简字典
+              {'code': 200, 'time': '...', 'data': {'user': {'follower_count': 123}}}，
+              只包含实际存在的字段；响应体不是合法 JSON 时抛出 ValueError
+    """
+    if OBJECT_START_RE.match(body) and OBJECT_END_RE.search(body, max(len(body) - 64, 0)):
+        result = _fast_profile(body)
+        if result is not None:
+            return result
+
+    return profile_fields(loads(body))
+
+
+def profile_fields(data):
+    """从完整解析的响应中按路径读取采集需要的字段（extract_profile 的回退路径）"""
+    if not isinstance(data, dict):
+        return data
+    result = {key: data[key] for key in ('code', 'time', 'message') if key in data}
+    if isinstance(data.get('data'), dict):
+        user = data['data'].get('user')
+        result['data'] = {'user': {'follower_count': user.get('follower_count')}} \
+            if isinstance(user, dict) and 'follower_count' in user else {}
+    return result
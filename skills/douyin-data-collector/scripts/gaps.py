@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缺失日期补齐
+功能：对比每个账号应有的日期区间与飞书表格中已有的日期，
+将连续缺失的日期合并为尽量少的历史接口（kol_daily_fans_v1）区间请求，
+取回后只把缺失的日期批量写入表格
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from history_cache import iter_dates
+
+# 默认检查截至昨天的最近天数（retry.max_retry_days）
+DEFAULT_MAX_RETRY_DAYS = 3
+# 单次历史接口请求最多覆盖的天数
+DEFAULT_MAX_RANGE_DAYS = 31
+
+
+def coalesce_ranges(dates, max_range_days=DEFAULT_MAX_RANGE_DAYS):
+    """
+    将缺失日期合并为尽量少的日期区间
+
+    连续的日期合并为一个区间；相邻区间合并后跨度不超过 max_range_days 天时
+    也合并为一个请求（区间内已有的日期在写入前过滤掉）。
+
+    Returns:
+        list: [(起始日期, 结束日期), ...]，按日期升序
+    """
+    days = sorted(datetime.strptime(d, '%Y-%m-%d') for d in set(dates))
+    ranges = []
+    for day in days:
+        if ranges and (day - ranges[-1][0]).days < max_range_days:
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')) for start, end in ranges]
+
+
+class GapScanner:
+    """
+    缺失日期扫描与补齐
+
+    全部账号的已有日期通过一次批量预查询（或本地表格索引）得到，
+    每个账号的缺失区间在线程池中请求历史接口（优先读取本地历史缓存），
+    补齐的数据按表格合并后通过 records/batch_create 批量写入。
+
+    配置项（config.json 的 retry 段，均可选）：
+        max_retry_days: 检查截至昨天的最近天数
+        max_range_days: 单次历史接口请求最多覆盖的天数
+    """
+
+    def __init__(self, collector, options=None, workers=None):
+        self.collector = collector
+        options = options or collector.config.get('retry', {})
+        self.max_retry_days = max(1, int(options.get('max_retry_days', DEFAULT_MAX_RETRY_DAYS)))
+        self.max_range_days = max(1, int(options.get('max_range_days', DEFAULT_MAX_RANGE_DAYS)))
+        self.workers = workers
+
+    def window(self, today=None):
+        """默认检查区间：截至昨天的最近 max_retry_days 天"""
+        today = today or datetime.now()
+        end = today - timedelta(days=1)
+        start = end - timedelta(days=self.max_retry_days - 1)
+        return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+    def present_dates(self, accounts, start_date, end_date):
+        """
+        表格中各账号区间内已有的日期
+
+        Returns:
+            dict: {账号名称: set(日期)}，查询失败的账号为 None
+        """
+        collector = self.collector
+        dates = list(iter_dates(start_date, end_date))
+        covered = collector.prefetch_records(accounts, dates)
+
+        present = {}
+        try:
+            for account in accounts:
+                planned = [collector._planned_record(account, date) for date in dates]
+                if all(found for found, _ in planned):
+                    present[account['name']] = {date for date, (_, record) in zip(dates, planned) if record}
+                elif collector._table_key(account) in covered:
+                    # 本地表格索引已同步，直接读取索引
+                    existing = collector._existing_records(account, start_date, end_date)
+                    present[account['name']] = set(existing) if existing is not None else None
+                else:
+                    present[account['name']] = None
+        finally:
+            collector._planned = {}
+        return present
+
+    def scan(self, accounts, start_date, end_date):
+        """
+        扫描缺失日期
+
+        Returns:
+            dict: {账号名称: [缺失日期, ...]}，查询失败的账号为 None
+        """
+        present = self.present_dates(accounts, start_date, end_date)
+        expected = list(iter_dates(start_date, end_date))
+        return {
+            name: None if dates is None else [date for date in expected if date not in dates]
+            for name, dates in present.items()
+        }
+
+    def _fetch(self, account, missing):
+        """按合并后的区间请求历史数据，返回 (缺失日期的数据行, 失败的区间数)"""
+        wanted = set(missing)
+        rows, failed = [], 0
+        for start, end in coalesce_ranges(missing, self.max_range_days):
+            fetched = self.collector.fetch_history_range(start, end, account)
+            if fetched is None:
+                failed += 1
+                continue
+            rows.extend(row for row in fetched if row['date'] in wanted)
+        return rows, failed
+
+    def fill(self, accounts=None, start_date=None, end_date=None):
+        """
+        扫描并补齐缺失日期
+
+        Args:
+            accounts: 账号列表（可选），默认为配置中的全部账号
+            start_date, end_date: 检查区间（可选），默认为 window()
+
+        Returns:
+            list: 每个账号一行结果，见 DouyinDataCollector._result_row
+        """
+        collector = self.collector
+        accounts = accounts or collector.accounts
+        if start_date is None:
+            start_date, end_date = self.window()
+
+        if not collector.get_feishu_tenant_token():
+            return [collector._result_row(account, {'success': False, 'message': '获取飞书 token 失败'})
+                    for account in accounts]
+
+        print(f"🧩 检查 {len(accounts)} 个账号 {start_date} 至 {end_date} 的缺失日期")
+        with collector.metrics.span('gap_scan'):
+            gaps = self.scan(accounts, start_date, end_date)
+
+        results = {}
+        todo = []
+        for account in accounts:
+            missing = gaps.get(account['name'])
+            if missing is None:
+                results[account['name']] = {'success': False, 'message': '查询已有记录失败'}
+            elif not missing:
+                results[account['name']] = {'success': True, 'message': '无缺失日期'}
+            else:
+                todo.append((account, missing))
+
+        total = sum(len(missing) for _, missing in todo)
+        requests = sum(len(coalesce_ranges(missing, self.max_range_days)) for _, missing in todo)
+        print(f"   {len(todo)} 个账号缺失 {total} 天，合并为 {requests} 个历史接口请求")
+
+        fetched = {}
+        if todo:
+            workers = collector._batch_workers(self.workers, len(todo))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for (account, missing), (rows, failed) in zip(
+                        todo, executor.map(lambda item: self._fetch(*item), todo)):
+                    fetched[account['name']] = (rows, failed)
+
+        # 同一表格的补齐数据合并批量写入
+        tables = {}
+        for account, _ in todo:
+            for row in fetched[account['name']][0]:
+                tables.setdefault(collector._table_key(account), []).append((account, row))
+        written = {}
+        for items in tables.values():
+            count = collector._batch_create(items)
+            for account, _ in items[:count]:
+                written[account['name']] = written.get(account['name'], 0) + 1
+
+        for account, missing in todo:
+            rows, failed = fetched[account['name']]
+            filled = written.get(account['name'], 0)
+            message = f'缺失 {len(missing)} 天，补齐 {filled} 天'
+            if failed:
+                message += f'，{failed} 个区间历史接口请求失败'
+            elif len(rows) < len(missing):
+                message += f'，接口未返回 {len(missing) - len(rows)} 天'
+            data = {'date': f"{start_date}~{end_date}", 'source': 'history'}
+            if rows:
+                data['fans_count'] = rows[-1]['fans_count']
+                data['fans_delta'] = sum(row['fans_delta'] for row in rows[:filled])
+            results[account['name']] = {'success': filled == len(rows) and not failed,
+                                        'data': data, 'message': message}
+
+        print(f"🧩 缺失日期补齐完成：写入 {sum(written.values())}/{total} 天")
+        return [collector._result_row(account, results[account['name']]) for account in accounts]
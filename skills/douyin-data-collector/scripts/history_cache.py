@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史接口响应缓存
+功能：按 kolId + 日期缓存 kol_daily_fans_v1 的逐日粉丝数与净增，
+较早日期的数据不再变化，重复运行和降级请求无需再次消耗 TikHub 配额
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_MAX_ROWS = 200000
+DEFAULT_RECENT_TTL = 1800
+DEFAULT_STABLE_TTL = 30 * 86400
+DEFAULT_STABLE_AFTER_DAYS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    kol_id      TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    fans_cnt    INTEGER NOT NULL,
+    delta       INTEGER NOT NULL,
+    fetched_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (kol_id, date)
+);
+CREATE INDEX IF NOT EXISTS idx_days_accessed_at ON days (accessed_at);
+"""
+
+
+def iter_dates(start_date, end_date):
+    """依次返回 start_date 至 end_date（含两端）的每一天，格式 YYYY-MM-DD"""
+    current = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    while current <= end:
+        yield current.strftime('%Y-%m-%d')
+        current += timedelta(days=1)
+
+
+class HistoryCache:
+    """
+    历史粉丝数据的本地 SQLite 缓存
+
+    有效期取决于数据日期距今的天数：近 stable_after_days 天内的数据可能仍会被
+    修正，只缓存 recent_ttl 秒；更早的数据缓存 stable_ttl 秒（0 表示永久）。
+    总行数超过 max_rows 时按最近访问时间淘汰（LRU）。
+
+    配置项（config.json 的 history_cache 段，均可选）：
+        enabled, max_rows, recent_ttl, stable_ttl, stable_after_days
+    """
+
+    def __init__(self, path, options=None):
+        options = options or {}
+        self.max_rows = int(options.get('max_rows', DEFAULT_MAX_ROWS))
+        self.recent_ttl = float(options.get('recent_ttl', DEFAULT_RECENT_TTL))
+        self.stable_ttl = float(options.get('stable_ttl', DEFAULT_STABLE_TTL))
+        self.stable_after_days = int(options.get('stable_after_days', DEFAULT_STABLE_AFTER_DAYS))
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def _ttl(self, date_str, today):
+        """某日期数据的缓存有效期（秒），None 表示永久有效"""
+        age = (today - datetime.strptime(date_str, '%Y-%m-%d')).days
+        if age <= self.stable_after_days:
+            return self.recent_ttl
+        return self.stable_ttl or None
+
+    def get_range(self, kol_id, start_date, end_date):
+        """
+        读取日期区间内仍在有效期内的缓存
+
+        Returns:
+            dict: {date: {'date', 'fans_count', 'fans_delta', 'source'}}
+        """
+        now = time.time()
+        today = datetime.strptime(datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d')
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, fans_cnt, delta, fetched_at FROM days '
+                'WHERE kol_id = ? AND date BETWEEN ? AND ?',
+                (kol_id, start_date, end_date)
+            ).fetchall()
+
+            result = {}
+            for date, fans_cnt, delta, fetched_at in rows:
+                ttl = self._ttl(date, today)
+                if ttl is not None and now - fetched_at > ttl:
+                    continue
+                result[date] = {'date': date, 'fans_count': fans_cnt, 'fans_delta': delta, 'source': 'history'}
+
+            if result:
+                with self._conn:
+                    self._conn.executemany(
+                        'UPDATE days SET accessed_at = ? WHERE kol_id = ? AND date = ?',
+                        [(now, kol_id, date) for date in result]
+                    )
+        return result
+
+    def put_many(self, kol_id, rows):
+        """写入历史接口返回的逐日数据，并按 LRU 控制总行数"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO days (kol_id, date, fans_cnt, delta, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(kol_id, row['date'], int(row['fans_count']), int(row['fans_delta']), now, now) for row in rows]
+            )
+            count = self._conn.execute('SELECT COUNT(*) FROM days').fetchone()[0]
+            if count > self.max_rows:
+                self._conn.execute(
+                    'DELETE FROM days WHERE rowid IN '
+                    '(SELECT rowid FROM days ORDER BY accessed_at LIMIT ?)',
+                    (count - self.max_rows,)
+                )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
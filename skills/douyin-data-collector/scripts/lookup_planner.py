@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量记录查询规划
+功能：将一批 (账号, 日期) 查询合并为少量 records/search 分页请求
+（日期区间过滤或 OR 条件），并按 (账号, 日期) 分拣结果
+"""
+
+from datetime import datetime, timedelta
+
+# 相邻日期间隔不超过该天数时合并为一个日期区间查询
+DEFAULT_MAX_GAP_DAYS = 2
+# 单次 OR 查询中最多包含的日期条件数
+DEFAULT_MAX_OR_CONDITIONS = 20
+
+
+def date_from_condition(start_date):
+    """统计日期不早于 start_date 的过滤条件"""
+    start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp() * 1000)
+    return {"field_name": "统计日期", "operator": "isGreater", "value": ["ExactDate", str(start_ts - 1)]}
+
+
+def date_range_conditions(start_date, end_date):
+    """统计日期在 [start_date, end_date] 区间内（含两端）的过滤条件"""
+    end_ts = int((datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)).timestamp() * 1000)
+    return [
+        date_from_condition(start_date),
+        {"field_name": "统计日期", "operator": "isLess", "value": ["ExactDate", str(end_ts)]}
+    ]
+
+
+def plan_dates(dates, max_gap=DEFAULT_MAX_GAP_DAYS, max_or=DEFAULT_MAX_OR_CONDITIONS):
+    """
+    将日期集合规划为查询
+
+    间隔不超过 max_gap 天的日期合并为一个区间；多天的区间各用一次区间查询，
+    孤立的单个日期每 max_or 个合并为一次 OR 查询。
+
+    Returns:
+        list: [('range', start, end) | ('dates', [date, ...]), ...]
+    """
+    days = sorted(datetime.strptime(d, '%Y-%m-%d') for d in set(dates))
+    clusters = []
+    for day in days:
+        if clusters and (day - clusters[-1][-1]).days <= max_gap:
+            clusters[-1].append(day)
+        else:
+            clusters.append([day])
+
+    queries = []
+    singles = []
+    for cluster in clusters:
+        if len(cluster) == 1:
+            singles.append(cluster[0].strftime('%Y-%m-%d'))
+        else:
+            queries.append(('range', cluster[0].strftime('%Y-%m-%d'), cluster[-1].strftime('%Y-%m-%d')))
+    for offset in range(0, len(singles), max_or):
+        queries.append(('dates', singles[offset:offset + max_or]))
+    return queries
+
+
+class LookupPlanner:
+    """
+    单个表格的批量查询规划器
+
+    add() 收集需要的 (账号, 日期)；run() 按 plan_dates 的结果发起分页查询，
+    返回每个键对应的记录行，不存在的键为 None。账号条件只在仅查询一个账号时加入，
+    多个账号时取回日期范围内的全部记录后在本地分拣。
+    """
+
+    def __init__(self, max_gap=DEFAULT_MAX_GAP_DAYS, max_or=DEFAULT_MAX_OR_CONDITIONS):
+        self.max_gap = max_gap
+        self.max_or = max_or
+        self.keys = set()
+
+    def add(self, account, date_str):
+        """account 为索引中的账号名称（未配置账号字段时为空字符串）"""
+        self.keys.add((account, date_str))
+
+    def queries(self, account_conditions=None):
+        """
+        规划后的查询
+
+        Args:
+            account_conditions: 仅查询一个账号时附加的账号过滤条件
+
+        Returns:
+            list: [(conditions, conjunction), ...]
+        """
+        accounts = {account for account, _ in self.keys}
+        extra = account_conditions if account_conditions and len(accounts) == 1 else []
+
+        planned = []
+        for query in plan_dates((date for _, date in self.keys), self.max_gap, self.max_or):
+            if query[0] == 'range':
+                planned.append((date_range_conditions(query[1], query[2]) + extra, 'and'))
+            elif len(query[1]) == 1 or not extra:
+                conditions = [{"field_name": "统计日期文本", "operator": "is", "value": [date]}
+                              for date in query[1]]
+                planned.append((conditions + extra, 'and' if len(conditions) == 1 else 'or'))
+            else:
+                # 账号条件需与日期条件同时满足，多个日期时改为区间查询
+                planned.append((date_range_conditions(query[1][0], query[1][-1]) + extra, 'and'))
+        return planned
+
+    def run(self, scan, row_of, account_conditions=None):
+        """
+        执行查询并分拣结果
+
+        Args:
+            scan: scan(conditions, conjunction) 返回记录迭代器（自动翻页）
+            row_of: 将记录转换为索引行 (account, date, record_id, fans_count, fans_delta, modified_at)
+
+        Returns:
+            tuple: ({(account, date): 索引行或 None}, [查询到的全部索引行])
+        """
+        found = dict.fromkeys(self.keys)
+        rows = []
+        for conditions, conjunction in self.queries(account_conditions):
+            for item in scan(conditions, conjunction):
+                row = row_of(item)
+                if not row[1]:
+                    continue
+                rows.append(row)
+                if (row[0], row[1]) in found:
+                    found[(row[0], row[1])] = row
+        return found, rows
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集指标
+功能：记录采集各阶段与每个 HTTP 请求的耗时，输出 JSON 行日志，
+并导出 Prometheus 文本格式快照（textfile collector 文件或推送到 Pushgateway）
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from rate_limit import api_family
+from storage import write_private_file
+
+# 直方图分桶上限（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """累计分桶直方图（Prometheus 语义）"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        """输出 _bucket / _sum / _count 三组样本行"""
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else f"{bound:g}"
+            yield f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {self.total:.6f}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+def format_labels(labels):
+    """将 ((name, value), ...) 格式化为 {name="value",...}"""
+    if not labels:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+class Span:
+    """一个计时区间，outcome 默认为 ok，发生异常时为 error，调用方可改为其他值"""
+
+    __slots__ = ('phase', 'fields', 'outcome')
+
+    def __init__(self, phase, fields):
+        self.phase = phase
+        self.fields = fields
+        self.outcome = 'ok'
+
+
+class Metrics:
+    """
+    进程内指标收集器
+
+    - span(): 采集阶段计时（token、realtime、history、previous_day、exists_check、write、notify 等）
+    - http(): 单个 HTTP 请求（主机、接口标识、状态码、响应字节数、耗时）
+    - JSON 行日志逐条写入 json_log；Prometheus 指标只按阶段 / 主机 / 接口聚合，
+      账号名称只出现在 JSON 日志中，避免标签基数随账号数增长
+
+    配置项（config.json 的 metrics 段，均可选，命令行 --metrics-out 覆盖 out）：
+        out: Prometheus 文本文件路径（供 node_exporter textfile collector 读取）
+        json_log: JSON 行日志路径，默认为 out 同名的 .jsonl 文件
+        pushgateway: Pushgateway 地址，如 http://127.0.0.1:9091
+        job: 推送时使用的 job 名称，默认 douyin_collector
+    """
+
+    def __init__(self, options=None):
+        options = options or {}
+        self.out = None
+        self.json_log = options.get('json_log')
+        self.set_output(options.get('out'))
+        self.pushgateway = options.get('pushgateway')
+        self.job = options.get('job', 'douyin_collector')
+
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._http = {}
+        self._http_bytes = {}
+        self._http_requests = {}
+        self._endpoints = {}
+        self._log_file = None
+
+    def set_output(self, out):
+        """设置 Prometheus 文本文件路径，未单独配置 json_log 时日志写入同名 .jsonl 文件"""
+        if not out:
+            return
+        derived = self.out and self.json_log == self._default_log(self.out)
+        self.out = str(out)
+        if not self.json_log or derived:
+            self.json_log = self._default_log(self.out)
+
+    @staticmethod
+    def _default_log(out):
+        path = Path(out)
+        return str(path.with_suffix('.jsonl') if path.suffix else path.with_name(path.name + '.jsonl'))
+
+    def name_endpoints(self, kind, urls):
+        """为接口地址指定标识（如 realtime-1），未指定的地址按 主机/接口族 标识"""
+        for idx, url in enumerate(urls):
+            self._endpoints[url] = f"{kind}-{idx + 1}"
+
+    def endpoint_name(self, url):
+        base = url.split('?', 1)[0]
+        if base in self._endpoints:
+            return self._endpoints[base]
+        return api_family(base)[1] or urlsplit(base).path
+
+    @contextmanager
+    def span(self, phase, **fields):
+        """
+        记录一个阶段的耗时
+
+        用法：
+            with metrics.span('write', account=name) as span:
+                if not ok:
+                    span.outcome = 'fail'
+        """
+        span = Span(phase, fields)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.outcome = 'error'
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            key = (('phase', phase), ('outcome', span.outcome))
+            with self._lock:
+                self._phases.setdefault(key, Histogram()).observe(duration)
+            self._log({'type': 'span', 'phase': phase, 'outcome': span.outcome,
+                       'duration_ms': round(duration * 1000, 3), **fields})
+
+    def http(self, method, url, status, size, duration, error=None):
+        """
+        记录一个 HTTP 请求
+
+        Args:
+            status: HTTP 状态码，请求异常时为 None
+            size: 响应体字节数
+            duration: 耗时（秒）
+            error: 异常类型名称（可选）
+        """
+        host = urlsplit(url).hostname or ''
+        endpoint = self.endpoint_name(url)
+        status_label = str(status) if status is not None else 'error'
+        key = (('host', host), ('endpoint', endpoint), ('method', method.upper()))
+        with self._lock:
+            self._http.setdefault(key, Histogram()).observe(duration)
+            counter_key = key + (('status', status_label),)
+            self._http_requests[counter_key] = self._http_requests.get(counter_key, 0) + 1
+            self._http_bytes[key] = self._http_bytes.get(key, 0) + (size or 0)
+
+        record = {'type': 'http', 'method': method.upper(), 'host': host, 'endpoint': endpoint,
+                  'status': status, 'bytes': size, 'duration_ms': round(duration * 1000, 3)}
+        if error:
+            record['error'] = error
+        self._log(record)
+
+    def http_retries(self, method, url, history):
+        """
+        记录传输层（urllib3）内部重试过的请求，只计入请求数，不计入耗时直方图
+
+        Args:
+            history: urllib3 Retry.history，每一项为一次已发出但被重试的请求
+        """
+        host = urlsplit(url).hostname or ''
+        endpoint = self.endpoint_name(url)
+        key = (('host', host), ('endpoint', endpoint), ('method', method.upper()))
+        with self._lock:
+            for item in history:
+                status_label = str(item.status) if item.status is not None else 'error'
+                counter_key = key + (('status', status_label),)
+                self._http_requests[counter_key] = self._http_requests.get(counter_key, 0) + 1
+
+        for item in history:
+            record = {'type': 'http', 'method': method.upper(), 'host': host, 'endpoint': endpoint,
+                      'status': item.status, 'retried': True}
+            if item.error is not None:
+                record['error'] = type(item.error).__name__
+            self._log(record)
+
+    def request_count(self, *kinds):
+        """已发出的请求数，只统计接口标识以 kinds 之一开头的接口（如 'realtime'、'history'）"""
+        with self._lock:
+            return sum(count for key, count in self._http_requests.items()
+                       if dict(key)['endpoint'].startswith(kinds))
+
+    def _log(self, record):
+        if not self.json_log:
+            return
+        record = {'ts': round(time.time(), 3), **record}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._log_file is None:
+                self._log_file = open(self.json_log, 'a', encoding='utf-8')
+            self._log_file.write(line + '\n')
+
+    def prometheus(self):
+        """当前指标的 Prometheus 文本格式快照"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP douyin_phase_duration_seconds 采集阶段耗时')
+            lines.append('# TYPE douyin_phase_duration_seconds histogram')
+            for key, histogram in sorted(self._phases.items()):
+                lines.extend(histogram.lines('douyin_phase_duration_seconds', key))
+
+            lines.append('# HELP douyin_http_request_duration_seconds HTTP 请求耗时')
+            lines.append('# TYPE douyin_http_request_duration_seconds histogram')
+            for key, histogram in sorted(self._http.items()):
+                lines.extend(histogram.lines('douyin_http_request_duration_seconds', key))
+
+            lines.append('# HELP douyin_http_requests_total HTTP 请求数')
+            lines.append('# TYPE douyin_http_requests_total counter')
+            for key, count in sorted(self._http_requests.items()):
+                lines.append(f"douyin_http_requests_total{format_labels(key)} {count}")
+
+            lines.append('# HELP douyin_http_response_bytes_total HTTP 响应体字节数')
+            lines.append('# TYPE douyin_http_response_bytes_total counter')
+            for key, size in sorted(self._http_bytes.items()):
+                lines.append(f"douyin_http_response_bytes_total{format_labels(key)} {size}")
+
+        lines.append('# HELP douyin_metrics_generated_timestamp_seconds 快照生成时间')
+        lines.append('# TYPE douyin_metrics_generated_timestamp_seconds gauge')
+        lines.append(f"douyin_metrics_generated_timestamp_seconds {time.time():.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, http=None):
+        """
+        导出指标快照：写入 Prometheus 文本文件、推送到 Pushgateway（均按配置执行）
+
+        Args:
+            http: 推送使用的 HttpTransport（可选），默认使用 requests
+        """
+        if not self.out and not self.pushgateway:
+            return
+        snapshot = self.prometheus()
+        if self.out:
+            write_private_file(self.out, snapshot)
+        if self.pushgateway:
+            url = f"{self.pushgateway.rstrip('/')}/metrics/job/{self.job}"
+            if http is None:
+                import requests
+                requests.put(url, data=snapshot.encode('utf-8'), timeout=10).raise_for_status()
+            else:
+                http.request('PUT', url, data=snapshot.encode('utf-8'), idempotent=True).raise_for_status()
+
+    def close(self):
+        """关闭 JSON 日志文件"""
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+汇总通知
+功能：将一次批量采集 / 补采的结果汇总为飞书消息卡片（每个群一份），
+包含合计、涨粉 / 掉粉最多的账号与失败明细，超出卡片大小时自动拆分为多张
+"""
+
+import json
+import threading
+
+# 卡片 JSON 的最大字节数（飞书消息请求体上限约 30KB，预留请求包装与转义的余量）
+DEFAULT_MAX_BYTES = 25000
+# 涨粉 / 掉粉榜单的账号数
+DEFAULT_TOP = 5
+# 单个文本块的最大字节数，避免单个元素过长
+ELEMENT_MAX_BYTES = 4000
+
+
+def format_delta(value):
+    return f"{int(value):+,}" if value is not None else '-'
+
+
+def format_count(value):
+    return f"{int(value):,}" if value is not None else '-'
+
+
+class NotificationDigest:
+    """
+    通知汇总器
+
+    采集过程中通过 add() 收集每个账号的结果行（见 DouyinDataCollector._result_row），
+    可在多个线程中调用；结束后 cards() 生成一组交互式卡片。
+
+    配置项（config.json 的 feishu.digest 段，均可选）：
+        top: 涨粉 / 掉粉榜单的账号数
+        details: 是否附带全部成功账号的明细（默认 true）
+        max_bytes: 单张卡片 JSON 的最大字节数
+    """
+
+    def __init__(self, title, options=None):
+        options = options or {}
+        self.title = title
+        self.top = int(options.get('top', DEFAULT_TOP))
+        self.details = bool(options.get('details', True))
+        self.max_bytes = int(options.get('max_bytes', DEFAULT_MAX_BYTES))
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, row):
+        """记录一个账号的结果行"""
+        with self._lock:
+            self.rows.append(row)
+
+    def sections(self):
+        """
+        卡片内容分段
+
+        Returns:
+            list: [(标题, [行, ...]), ...]，第一段为合计
+        """
+        succeeded = [row for row in self.rows if row['success']]
+        failed = [row for row in self.rows if not row['success']]
+        with_delta = [row for row in succeeded if row.get('fans_delta') is not None]
+
+        total_fans = sum(int(row['fans_count']) for row in succeeded if row.get('fans_count') is not None)
+        total_delta = sum(int(row['fans_delta']) for row in with_delta)
+        sections = [('合计', [
+            f"账号 **{len(self.rows)}** 个：成功 **{len(succeeded)}**，失败 **{len(failed)}**",
+            f"粉丝总数 **{total_fans:,}**，合计净增 **{total_delta:+,}**",
+        ])]
+
+        gainers = sorted((row for row in with_delta if int(row['fans_delta']) > 0),
+                         key=lambda row: -int(row['fans_delta']))[:self.top]
+        if gainers:
+            sections.append((f'涨粉 Top {len(gainers)}', [self._row_line(row) for row in gainers]))
+
+        losers = sorted((row for row in with_delta if int(row['fans_delta']) < 0),
+                        key=lambda row: int(row['fans_delta']))[:self.top]
+        if losers:
+            sections.append((f'掉粉 Top {len(losers)}', [self._row_line(row) for row in losers]))
+
+        if failed:
+            sections.append((f'失败 {len(failed)} 个', [f"{row['account']}：{row['message']}" for row in failed]))
+
+        if self.details and succeeded:
+            sections.append(('明细', [self._row_line(row) for row in sorted(succeeded, key=lambda r: r['account'])]))
+        return sections
+
+    @staticmethod
+    def _row_line(row):
+        line = f"{row['account']}  {format_count(row.get('fans_count'))}（{format_delta(row.get('fans_delta'))}）"
+        if row.get('date'):
+            line += f"  {row['date']}"
+        return line
+
+    def _card(self, title, elements, failed):
+        return {
+            "config": {"wide_screen_mode": True},
+            "header": {
+                "title": {"tag": "plain_text", "content": title},
+                "template": "orange" if failed else "green"
+            },
+            "elements": elements
+        }
+
+    @staticmethod
+    def _size(value):
+        """JSON 序列化后的字节数"""
+        return len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _text(lines):
+        return {"tag": "div", "text": {"tag": "lark_md", "content": '\n'.join(lines)}}
+
+    def cards(self):
+        """
+        生成卡片列表，单张卡片超过 max_bytes 时拆分，
+        被拆开的分段在下一张卡片中以“（续）”标题继续
+
+        Returns:
+            list: 飞书 interactive 卡片（dict），无结果时为空列表
+        """
+        if not self.rows:
+            return []
+
+        failed = any(not row['success'] for row in self.rows)
+        # 标题追加页码、空文本块本身的开销
+        budget = self.max_bytes - self._size(self._card(self.title + '（00/00）', [], failed))
+        element_overhead = self._size(self._text([])) + 2
+        pages = []
+        elements, used = [], 0
+
+        for heading, lines in self.sections():
+            if elements:
+                elements.append({"tag": "hr"})
+                used += self._size(elements[-1]) + 2
+            chunk = [f"**{heading}**"]
+            chunk_bytes = self._size(chunk[0])
+            # chunk 中只有分段标题
+            fresh = True
+
+            for line in lines:
+                # 换行符在 JSON 中转义为两个字节，与两侧引号的字节数相同
+                line_bytes = self._size(line)
+                if not fresh and chunk_bytes + line_bytes > ELEMENT_MAX_BYTES:
+                    elements.append(self._text(chunk))
+                    used += self._size(elements[-1]) + 2
+                    chunk, chunk_bytes = [], 0
+
+                if used + element_overhead + chunk_bytes + line_bytes > budget and (elements or not fresh):
+                    if fresh:
+                        # 分段标题之后一行都放不下，整段移到下一张卡片
+                        elements.pop()
+                    else:
+                        if chunk:
+                            elements.append(self._text(chunk))
+                        chunk = [f"**{heading}（续）**"]
+                        chunk_bytes = self._size(chunk[0])
+                    pages.append(elements)
+                    elements, used = [], 0
+
+                chunk.append(line)
+                chunk_bytes += line_bytes
+                fresh = False
+
+            elements.append(self._text(chunk))
+            used += self._size(elements[-1]) + 2
+        pages.append(elements)
+
+        if len(pages) == 1:
+            return [self._card(self.title, pages[0], failed)]
+        return [self._card(f"{self.title}（{idx + 1}/{len(pages)}）", page, failed)
+                for idx, page in enumerate(pages)]
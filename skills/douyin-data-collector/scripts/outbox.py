@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写入发件箱
+功能：写入飞书表格之前先将待写入的数据落盘，写入成功后标记完成；
+写入失败（网络中断、飞书 5xx、限流等）的数据在下次启动时批量重放，不必重新请求 TikHub
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id          INTEGER PRIMARY KEY,
+    table_key   TEXT NOT NULL,
+    account     TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    UNIQUE (table_key, account, date)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, updated);
+"""
+
+# 同一账号同一天重复入队时以最新数据为准，已完成的记录重新变为待写入
+UPSERT_SQL = (
+    'INSERT INTO outbox (table_key, account, date, payload, status, created, updated) '
+    "VALUES (?, ?, ?, ?, 'pending', ?, ?) "
+    'ON CONFLICT (table_key, account, date) DO UPDATE SET '
+    "payload = excluded.payload, status = 'pending', updated = excluded.updated"
+)
+
+# 默认保留已完成记录的天数与发件箱最大记录数
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_MAX_ROWS = 100000
+
+
+class WriteOutbox:
+    """
+    SQLite 写前日志
+
+    每条记录以 (table_key, account, date) 唯一，状态为 pending（待写入）或 done（已写入）；
+    payload 为写入飞书的数据行 {'date', 'fans_count', 'fans_delta', 'source', ...} 的 JSON。
+    account 为账号的 sec_user_id（未配置时为账号名称）。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, entries):
+        """
+        记录待写入的数据
+
+        Args:
+            entries: [(table_key, account, row), ...]
+
+        Returns:
+            list: 与 entries 一一对应的记录 id
+        """
+        now = time.time()
+        ids = []
+        with self._lock, self._conn:
+            for table_key, account, row in entries:
+                self._conn.execute(UPSERT_SQL, (table_key, account, row['date'],
+                                                json.dumps(row, ensure_ascii=False), now, now))
+                ids.append(self._conn.execute(
+                    'SELECT id FROM outbox WHERE table_key = ? AND account = ? AND date = ?',
+                    (table_key, account, row['date'])
+                ).fetchone()[0])
+        return ids
+
+    def mark_done(self, ids):
+        """标记为已写入"""
+        if not ids:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE outbox SET status = 'done', error = NULL, updated = ? WHERE id = ?",
+                                   [(now, record_id) for record_id in ids])
+
+    def mark_failed(self, ids, error=None):
+        """记录一次写入失败，数据保持待写入状态"""
+        if not ids:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, error = ?, updated = ? WHERE id = ? AND status = 'pending'",
+                [(error, now, record_id) for record_id in ids]
+            )
+
+    def pending(self):
+        """
+        待写入的数据
+
+        Returns:
+            dict: {(table_key, account): [(id, row), ...]}，每组按日期升序
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, table_key, account, payload FROM outbox WHERE status = 'pending' "
+                'ORDER BY table_key, account, date'
+            ).fetchall()
+
+        groups = {}
+        for record_id, table_key, account, payload in rows:
+            groups.setdefault((table_key, account), []).append((record_id, json.loads(payload)))
+        return groups
+
+    def compact(self, retention_days=DEFAULT_RETENTION_DAYS, max_rows=DEFAULT_MAX_ROWS):
+        """
+        压缩发件箱：删除超过保留期的已完成记录；总数仍超过 max_rows 时
+        先删除最旧的已完成记录，再删除最旧的待写入记录
+
+        Returns:
+            int: 被丢弃的待写入记录数
+        """
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM outbox WHERE status = 'done' AND updated < ?", (cutoff,))
+            total = self._conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+            dropped = 0
+            for status in ('done', 'pending'):
+                excess = total - max_rows
+                if excess <= 0:
+                    break
+                deleted = self._conn.execute(
+                    'DELETE FROM outbox WHERE id IN ('
+                    'SELECT id FROM outbox WHERE status = ? ORDER BY updated LIMIT ?)',
+                    (status, excess)
+                ).rowcount
+                total -= deleted
+                if status == 'pending':
+                    dropped = deleted
+        return dropped
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+限流器
+功能：按主机与接口族的令牌桶限流，识别 429 / 限流错误码与 Retry-After 等响应头
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# 飞书接口频率限制错误码
+FEISHU_RATE_LIMIT_CODES = {99991400}
+
+# 单次请求因限流最多重试次数、无响应头提示时的默认等待时间（秒）
+DEFAULT_THROTTLE_RETRIES = 5
+DEFAULT_THROTTLE_WAIT = 1.0
+
+# 接口路径前缀，前缀之后的第一段视为接口族（如 bitable、im、douyin）
+API_PATH_PREFIXES = ('/open-apis/', '/api/v1/')
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    rate 为每秒补充的令牌数，burst 为桶容量。reserve() 立即扣除一个令牌并
+    返回需要等待的秒数，由调用方自行 sleep（同步或异步均可）。
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预订一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+
+            wait = self._updated - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return max(wait, 0.0)
+
+    def refund(self):
+        """归还 reserve() 预订但未使用的令牌"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def pause(self, seconds):
+        """服务端要求退避时暂停发放令牌，恢复后从空桶开始补充"""
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._updated:
+                self._updated = resume_at
+                self._tokens = min(self._tokens, 0.0)
+
+
+def api_family(url):
+    """请求地址对应的 (主机, 接口族)，如 ('open.feishu.cn', 'bitable')"""
+    parts = urlsplit(url)
+    path = parts.path
+    for prefix in API_PATH_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    family = path.strip('/').split('/', 1)[0]
+    return parts.hostname or '', family
+
+
+def throttle_delay(status_code, headers, body_code=None):
+    """
+    判断响应是否为限流，是则返回建议等待的秒数，否则返回 None
+
+    依次识别 Retry-After、飞书 x-ogw-ratelimit-reset、通用 X-RateLimit-Reset 响应头。
+    """
+    if status_code != 429 and body_code not in FEISHU_RATE_LIMIT_CODES:
+        return None
+    return header_wait(headers) or DEFAULT_THROTTLE_WAIT
+
+
+def header_wait(headers):
+    """从限流相关响应头解析需要等待的秒数，无法解析时返回 None"""
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+
+    reset = headers.get('x-ogw-ratelimit-reset') or headers.get('X-RateLimit-Reset')
+    if reset:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # 大于 10 亿视为 Unix 时间戳，否则为剩余秒数
+        return max(reset - time.time(), 0.0) if reset > 1e9 else reset
+    return None
+
+
+def quota_exhausted(headers):
+    """响应头显示剩余配额为 0 时返回距重置的秒数，否则返回 None"""
+    remaining = headers.get('X-RateLimit-Remaining') or headers.get('x-ogw-ratelimit-remaining')
+    if remaining is None:
+        return None
+    try:
+        if float(remaining) > 0:
+            return None
+    except ValueError:
+        return None
+    return header_wait(headers) or DEFAULT_THROTTLE_WAIT
+
+
+class RateLimiter:
+    """
+    按主机与接口族分组的限流器
+
+    规则来自 config.json 的 rate_limits 段，键为 "主机/接口族" 或 "主机"，
+    查找顺序为 主机/接口族 → 主机 → "*"，未匹配的请求不限流：
+
+        "rate_limits": {
+            "api.tikhub.io": {"rate": 10, "burst": 20},
+            "open.feishu.cn/bitable": {"rate": 20},
+            "open.feishu.cn/im": {"rate": 5}
+        }
+
+    同一规则键下的请求共用一个令牌桶。
+    """
+
+    def __init__(self, rules=None, throttle_retries=DEFAULT_THROTTLE_RETRIES):
+        self.rules = dict(rules or {})
+        self.throttle_retries = int(self.rules.pop('throttle_retries', throttle_retries))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """请求地址对应的令牌桶，未配置规则时返回 None"""
+        host, family = api_family(url)
+        for key in (f"{host}/{family}", host, '*'):
+            rule = self.rules.get(key)
+            if rule:
+                with self._lock:
+                    bucket = self._buckets.get(key)
+                    if bucket is None:
+                        bucket = TokenBucket(rule['rate'], rule.get('burst'))
+                        self._buckets[key] = bucket
+                return bucket
+        return None
+
+    def acquire(self, url, cancel=None):
+        """同步等待直到可以发送请求，cancel（threading.Event）置位时提前结束等待"""
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            wait = bucket.reserve()
+            if wait > 0:
+                if cancel is not None:
+                    cancel.wait(wait)
+                else:
+                    time.sleep(wait)
+
+    def release(self, url):
+        """归还 acquire() 取得但未发出请求的令牌"""
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            bucket.refund()
+
+    async def acquire_async(self, url):
+        """异步等待直到可以发送请求"""
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    def pause(self, url, seconds):
+        """服务端限流时暂停该规则下的所有请求"""
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            bucket.pause(seconds)
+        return seconds
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日内高频采样
+功能：按固定间隔轮询实时接口记录粉丝数，批量写入本地快照库，
+并将当天的收盘值、日内最高 / 最低与净增汇总写回飞书表格的当日记录
+"""
+
+import signal
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# 默认采样间隔、缓冲区最大样本数、缓冲区最长保留时间（秒）
+DEFAULT_INTERVAL = 3600
+DEFAULT_FLUSH_SIZE = 10000
+DEFAULT_FLUSH_INTERVAL = 300
+
+
+class SampleBuffer:
+    """
+    采样缓冲区
+
+    全部账号共用三个定长元素数组：采样时间（double）、账号序号与粉丝数（int32），
+    每个样本占 16 字节，不为样本创建 dict 等 Python 对象。
+    """
+
+    def __init__(self):
+        self.ts = array('d')
+        self.accounts = array('i')
+        self.counts = array('i')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ts)
+
+    def add(self, account_idx, fans_count, ts=None):
+        """追加一个样本"""
+        with self._lock:
+            self.ts.append(ts or time.time())
+            self.accounts.append(account_idx)
+            self.counts.append(fans_count)
+
+    def oldest(self):
+        """最早样本的时间，缓冲区为空时返回 None"""
+        with self._lock:
+            return self.ts[0] if self.ts else None
+
+    def drain(self):
+        """取出全部样本并清空缓冲区，返回 (ts, accounts, counts) 三个数组"""
+        with self._lock:
+            drained = (self.ts, self.accounts, self.counts)
+            self.ts, self.accounts, self.counts = array('d'), array('i'), array('i')
+        return drained
+
+
+class IntradaySampler:
+    """
+    日内采样器
+
+    每隔 interval 秒并发请求一次全部账号的实时接口，样本先进入 SampleBuffer，
+    样本数达到 flush_size 或最早样本超过 flush_interval 秒时批量写入本地快照库，
+    内存占用只与两次写入之间的样本数有关。
+
+    日期切换时（以及退出时）将当天的采样汇总写回飞书表格：收盘值写入抖音粉丝数，
+    收盘值减前一天收盘值写入抖音净新增；配置了 high_field / low_field 时一并写入
+    日内最高 / 最低。已有当日记录时按 upsert 方式更新。
+
+    配置项（config.json 的 sampling 段，均可选）：
+        interval, flush_size, flush_interval, high_field, low_field
+    """
+
+    def __init__(self, collector, options=None, interval=None, workers=None):
+        self.collector = collector
+        options = options or collector.config.get('sampling', {})
+        self.interval = float(interval or options.get('interval', DEFAULT_INTERVAL))
+        self.flush_size = int(options.get('flush_size', DEFAULT_FLUSH_SIZE))
+        self.flush_interval = float(options.get('flush_interval', DEFAULT_FLUSH_INTERVAL))
+        self.high_field = options.get('high_field')
+        self.low_field = options.get('low_field')
+        self.workers = collector._batch_workers(workers, len(collector.accounts))
+
+        self.buffer = SampleBuffer()
+        self._stop = threading.Event()
+        # 每个日期采样到的账号序号，用于汇总
+        self._sampled = {}
+
+    def stop(self, signum=None, frame=None):
+        """请求停止：当前一轮采样完成、写入并汇总后退出"""
+        if signum is not None:
+            print(f"\n🛑 收到信号 {signum}，完成当前一轮采样后退出...")
+        self._stop.set()
+
+    def sample_once(self):
+        """并发采集一轮全部账号的实时粉丝数，返回成功的账号数"""
+        accounts = self.collector.accounts
+        sampled = self._sampled.setdefault(datetime.now().strftime('%Y-%m-%d'), set())
+
+        def sample(idx):
+            data = self.collector.fetch_realtime_data(accounts[idx])
+            if not data:
+                return False
+            self.buffer.add(idx, int(data['fans_count']))
+            sampled.add(idx)
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return sum(executor.map(sample, range(len(accounts))))
+
+    def should_flush(self):
+        """缓冲区是否需要写入本地"""
+        oldest = self.buffer.oldest()
+        if oldest is None:
+            return False
+        return len(self.buffer) >= self.flush_size or time.time() - oldest >= self.flush_interval
+
+    def flush(self):
+        """将缓冲区中的样本批量写入本地快照库，返回写入的样本数"""
+        ts, account_idx, counts = self.buffer.drain()
+        if not ts:
+            return 0
+
+        store = self.collector._snapshot_store()
+        if store is None:
+            print("⚠️  本地快照库不可用，丢弃本批采样")
+            return 0
+
+        accounts = self.collector.accounts
+        keys = [self.collector._account_key(account) for account in accounts]
+        rows = (
+            (keys[idx], stamp, datetime.fromtimestamp(stamp).strftime('%Y-%m-%d'), count)
+            for stamp, idx, count in zip(ts, account_idx, counts)
+        )
+        store.append_samples(rows)
+        print(f"💾 已写入 {len(ts)} 个采样")
+        return len(ts)
+
+    def rollup(self, date_str):
+        """将某天的采样汇总写回飞书表格，返回成功写入的账号数"""
+        indexes = sorted(self._sampled.get(date_str, ()))
+        store = self.collector._snapshot_store()
+        if not indexes or store is None:
+            return 0
+        if not self.collector.get_feishu_tenant_token():
+            print("❌ 获取飞书 token 失败，跳过日内汇总")
+            return 0
+
+        written = 0
+        for idx in indexes:
+            account = self.collector.accounts[idx]
+            days = store.daily(self.collector._account_key(account), date_str, date_str)
+            if not days:
+                continue
+            day = days[0]
+
+            previous = self.collector.get_previous_day_fans(date_str, account)
+            extra_fields = {}
+            if self.high_field:
+                extra_fields[self.high_field] = day['high']
+            if self.low_field:
+                extra_fields[self.low_field] = day['low']
+
+            data = {
+                'date': date_str,
+                'fans_count': day['fans_count'],
+                'fans_delta': day['fans_count'] - previous if previous is not None else 0,
+                'source': 'sample',
+                'extra_fields': extra_fields
+            }
+            if self.collector.write_to_feishu(data, account, write_mode='upsert'):
+                written += 1
+
+        print(f"📊 {date_str} 日内汇总已写入 {written}/{len(indexes)} 个账号")
+        return written
+
+    def run(self):
+        """运行采样循环，直到收到停止信号"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        print(f"📈 日内采样已启动：{len(self.collector.accounts)} 个账号，间隔 {self.interval:g}s")
+        current_day = datetime.now().strftime('%Y-%m-%d')
+
+        while not self._stop.is_set():
+            started = time.time()
+            succeeded = self.sample_once()
+            print(f"📈 {datetime.now().strftime('%H:%M:%S')} 本轮采样成功 "
+                  f"{succeeded}/{len(self.collector.accounts)} 个账号")
+
+            if self.should_flush():
+                self.flush()
+
+            # 日期切换后汇总前一天
+            today = datetime.now().strftime('%Y-%m-%d')
+            if today != current_day:
+                self.flush()
+                self.rollup(current_day)
+                self._sampled.pop(current_day, None)
+                current_day = today
+
+            self.collector.flush()
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+
+        self.flush()
+        self.rollup(current_day)
+        print("👋 日内采样已退出")
+        return 0
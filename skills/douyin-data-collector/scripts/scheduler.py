@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截止时间与调用预算感知的每日采集调度
+功能：在报表截止时间前、按 TikHub 调用预算采集全部账号：
+账号按优先级与数据陈旧程度排序，每个账号选择最省调用的路径，
+预算或时间吃紧时降级为单次调用，来不及或预算用尽时跳过并汇报
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from daemon import next_slot, parse_times
+
+# 截止前停止派发新账号的余量（秒）、可直接复用的当日快照最长时间（秒）
+DEFAULT_STOP_MARGIN = 60
+DEFAULT_REUSE_AGE = 3600
+# 尚无耗时观测时单个账号的预估耗时（秒）
+DEFAULT_ACCOUNT_SECONDS = 2.0
+
+# 采集路径
+PATH_EXISTING = 'existing'   # 表格中已有当日记录，0 次调用
+PATH_SNAPSHOT = 'snapshot'   # 复用本地快照库中的当日观测，0 次调用
+PATH_FULL = 'full'           # 完整流程：实时接口（含备选）→ 历史接口
+PATH_DEGRADED = 'degraded'   # 降级：只请求健康度最高的一个实时接口
+
+PATH_LABELS = {
+    PATH_EXISTING: '已存在',
+    PATH_SNAPSHOT: '复用快照',
+    PATH_FULL: '完整',
+    PATH_DEGRADED: '降级',
+    'skipped': '跳过',
+    'error': '异常',
+}
+
+
+class DailyScheduler:
+    """
+    每日采集调度器
+
+    - 排序：priority（账号字段，越大越先）降序，再按本地快照中最近一次数据的日期由旧到新
+    - 路径：已存在 → 复用当日快照 → 完整流程；前两种不消耗 TikHub 调用
+    - 预算：每个账号开始前按最坏情况（全部实时与历史接口，每个接口含传输层重试）预留调用次数，
+      剩余预算不足时降级为单个实时接口，连单个接口都不够时跳过；
+      此外每次发送 TikHub 请求（含限流后的重新发送）前都按剩余预算检查，
+      已发出未返回的请求计为最坏情况，预算是硬上限
+    - 时间：按已完成账号的平均耗时估算剩余工作量，赶不上截止时间时降级，
+      距截止不足 stop_margin 秒时不再派发新账号
+
+    配置项（config.json 的 scheduler 段，均可选，命令行 --deadline / --budget 覆盖）：
+        deadline: 截止时间 "HH:MM"，见 resolve_deadline；不配置时不限时间
+        budget: 本次运行的 TikHub 调用次数上限，不配置时不限
+        stop_margin: 截止前停止派发新账号的余量（秒）
+        reuse_age: 可直接复用的当日快照的最长时间（秒），0 表示不复用
+    """
+
+    def __init__(self, collector, options=None, workers=None, deadline=None, budget=None, slot=None):
+        self.collector = collector
+        options = options or collector.config.get('scheduler', {})
+        deadline = deadline or options.get('deadline')
+        self.deadline = self.resolve_deadline(deadline, slot=slot) if deadline else None
+        budget = budget if budget is not None else options.get('budget')
+        self.budget = int(budget) if budget is not None else None
+        self.stop_margin = float(options.get('stop_margin', DEFAULT_STOP_MARGIN))
+        self.reuse_age = float(options.get('reuse_age', DEFAULT_REUSE_AGE))
+        self.workers = workers
+
+        # 单个接口调用最多发出的请求数：首次请求 + 传输层对 5xx / 连接重置的自动重试
+        self.call_cost = collector.http.retries + 1
+        history = collector.config['tikhub'].get('history_api_urls', [])
+        self._tikhub_urls = set(collector._realtime_urls()) | set(history)
+        self.full_cost = max(1, len(self._tikhub_urls)) * self.call_cost
+
+        self._lock = threading.Lock()
+        self._reserved = 0
+        self._in_flight = 0
+        self._unaccounted = 0
+        self._spent_base = 0
+        self._durations = []
+        self._remaining = 0
+
+    @staticmethod
+    def resolve_deadline(value, now=None, slot=None):
+        """
+        截止时间 "HH:MM" 对应的时间戳：本次运行开始之后的第一次
+
+        开始时间为触发本次运行的采集时间点（常驻调度，slot），否则为当前时间（手动 / cron），
+        两种方式含义相同：如 09:00 开始、截止 12:30 指当天 12:30，
+        21:00 开始指次日 12:30，12:30 整点开始指次日 12:30。
+        常驻调度以时间点而非实际开始时间计算，随机延后不会使截止时间顺延
+        """
+        times = parse_times([value])
+        return next_slot(times, slot or now or datetime.now()).timestamp()
+
+    def order(self, accounts, today):
+        """按优先级降序、数据陈旧程度（最近一次快照距今天数）降序排列"""
+        store = self.collector._snapshot_store()
+        last_dates = store.last_dates() if store is not None else {}
+
+        def staleness(account):
+            last = last_dates.get(self.collector._account_key(account))
+            if not last:
+                return float('inf')
+            return (today - datetime.strptime(last, '%Y-%m-%d')).days
+
+        def priority(account):
+            try:
+                return float(account.get('priority') or 0)
+            except (TypeError, ValueError):
+                return 0.0
+
+        return sorted(accounts, key=lambda account: (-priority(account), -staleness(account), account['name']))
+
+    def spent(self):
+        """本次运行已发出的 TikHub 请求数（以异常结束的请求按含自动重试的最坏情况计）"""
+        return self.collector.metrics.request_count('realtime', 'history') - self._spent_base + self._unaccounted
+
+    def _reserve(self):
+        """
+        为下一个账号选择付费路径并预留调用次数
+
+        Returns:
+            tuple: (路径, 预留次数)，应跳过时路径为 None、第二项为原因
+        """
+        now = time.time()
+        with self._lock:
+            path = PATH_FULL
+            if self.deadline is not None:
+                left = self.deadline - now
+                if left < self.stop_margin:
+                    return None, '截止时间前来不及采集'
+
+                per_account = (sum(self._durations) / len(self._durations)) if self._durations \
+                    else DEFAULT_ACCOUNT_SECONDS
+                workers = max(1, self.workers or 1)
+                if self._remaining / workers * per_account > left - self.stop_margin:
+                    path = PATH_DEGRADED
+
+            if self.budget is not None:
+                available = self.budget - self.spent() - self._reserved
+                if available < self.call_cost:
+                    return None, '调用预算已用尽'
+                # 按每个剩余账号至少一个接口调用估算，预算不够完整流程时降级
+                if available < self.full_cost or available < self._remaining * self.call_cost:
+                    path = PATH_DEGRADED
+
+            cost = self.full_cost if path == PATH_FULL else self.call_cost
+            self._reserved += cost
+            self._remaining -= 1
+            return path, cost
+
+    def _settle(self, cost, duration):
+        with self._lock:
+            self._reserved -= cost
+            self._durations.append(duration)
+
+    def _send_guard(self, url):
+        """
+        每次发送请求前的预算检查（见 HttpTransport.send_guard）
+
+        TikHub 请求在已发出与发送中的请求（各按含自动重试的最坏情况计）之外
+        仍有一次调用的预算时放行，返回请求结束后调用的释放函数；不足时返回 None。
+        请求以异常结束时无法得知内部重试了几次，按最坏情况计入已用调用。
+        账号级预留只用于选择路径，不在此扣除，其他主机的请求不受限制
+        """
+        if url not in self._tikhub_urls:
+            return lambda unknown: None
+        with self._lock:
+            if self.budget - self.spent() - self._in_flight < self.call_cost:
+                return None
+            self._in_flight += self.call_cost
+
+        def release(unknown):
+            with self._lock:
+                self._in_flight -= self.call_cost
+                if unknown:
+                    # 指标中已计 1 次
+                    self._unaccounted += self.call_cost - 1
+        return release
+
+    def _free_path(self, account, today_str):
+        """不消耗调用的路径：已存在 / 当日快照，返回 (路径, 数据) 或 (None, None)"""
+        collector = self.collector
+        if collector._write_mode() != 'upsert' and collector.find_record(today_str, account) is not None:
+            return PATH_EXISTING, None
+
+        store = collector._snapshot_store()
+        if store is not None and self.reuse_age > 0:
+            snapshot = store.latest(collector._account_key(account), today_str)
+            if snapshot and snapshot['source'] in ('realtime', 'sample') and \
+                    time.time() - snapshot['ts'] <= self.reuse_age:
+                return PATH_SNAPSHOT, {'date': today_str, 'fans_count': snapshot['fans_count'],
+                                       'source': 'realtime'}
+        return None, None
+
+    def _run_account(self, account, today_str, notify):
+        """按调度结果采集一个账号，返回 (路径, 结果)"""
+        collector = self.collector
+        path, data = self._free_path(account, today_str)
+        if path == PATH_EXISTING:
+            with self._lock:
+                self._remaining -= 1
+            return path, {'success': True, 'message': f'表格中已有 {today_str} 的记录'}
+        if path == PATH_SNAPSHOT:
+            with self._lock:
+                self._remaining -= 1
+            previous = collector._timed('previous_day', account, collector.get_previous_day_fans,
+                                        today_str, account, empty='miss')
+            return path, collector._store_realtime(account, data, previous, notify, PATH_LABELS[path])
+
+        path, cost = self._reserve()
+        if path is None:
+            return 'skipped', {'success': False, 'message': f'已跳过：{cost}'}
+
+        started = time.monotonic()
+        try:
+            if path == PATH_FULL:
+                return path, collector._collect_account(account, today_str, notify)
+
+            realtime = collector._timed('realtime', account, collector.fetch_realtime_data, account, 1)
+            if not realtime:
+                return path, {'success': False, 'message': '降级采集：实时接口失败，未再尝试其他接口'}
+            previous = collector._timed('previous_day', account, collector.get_previous_day_fans,
+                                        realtime['date'], account, empty='miss')
+            return path, collector._store_realtime(account, realtime, previous, notify, '实时接口，降级')
+        finally:
+            self._settle(cost, time.monotonic() - started)
+
+    def run(self, accounts=None):
+        """
+        调度采集全部账号
+
+        Returns:
+            list: 每个账号一行结果（按输入顺序），见 DouyinDataCollector._result_row
+        """
+        collector = self.collector
+        accounts = accounts or collector.accounts
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_str = today.strftime('%Y-%m-%d')
+        started = time.time()
+
+        if not collector.get_feishu_tenant_token():
+            return [collector._result_row(account, {'success': False, 'message': '获取飞书 token 失败'})
+                    for account in accounts]
+
+        ordered = self.order(accounts, today)
+        self.workers = collector._batch_workers(self.workers, len(accounts))
+        self._remaining = len(ordered)
+        self._spent_base = collector.metrics.request_count('realtime', 'history')
+        deadline = datetime.fromtimestamp(self.deadline).strftime('%m-%d %H:%M') if self.deadline else '不限'
+        print(f"🗓️  调度采集 {len(accounts)} 个账号：截止 {deadline}，"
+              f"调用预算 {self.budget if self.budget is not None else '不限'}，并发数 {self.workers}")
+        if self.deadline is not None and self.deadline - started < self.stop_margin:
+            print(f"⚠️  已临近截止时间 {deadline}，仅处理无需调用接口的账号")
+        if self.budget is not None and self.budget < self.call_cost:
+            print(f"⚠️  调用预算小于单个接口调用的最大请求数 {self.call_cost}（含 http.retries 次重试），"
+                  f"仅处理无需调用接口的账号")
+
+        if len(ordered) > 1:
+            collector.prefetch_records(ordered, [(today - timedelta(days=1)).strftime('%Y-%m-%d'), today_str])
+        digest = collector._notify_mode(len(accounts)) == 'digest'
+        paths = {}
+
+        def task(account):
+            path, result = self._run_account(account, today_str, not digest)
+            paths[id(account)] = path
+            return result
+
+        if self.budget is not None:
+            collector.http.send_guard = self._send_guard
+        try:
+            rows = collector._run_batch(ordered, task, self.workers)
+        finally:
+            collector._planned = {}
+            collector.http.send_guard = None
+
+        by_account = {id(account): row for account, row in zip(ordered, rows)}
+        rows = [by_account[id(account)] for account in accounts]
+        if digest:
+            collector.send_digest(accounts, rows, f"抖音粉丝日报 {today_str}")
+        self.report(ordered, by_account, paths, time.time() - started)
+        return rows
+
+    def report(self, ordered, rows, paths, elapsed):
+        """输出各路径账号数、调用次数与被跳过的账号"""
+        counts = {}
+        for account in ordered:
+            path = paths.get(id(account), 'error')
+            counts[path] = counts.get(path, 0) + 1
+        summary = '，'.join(f"{label} {counts[path]}" for path, label in PATH_LABELS.items() if counts.get(path))
+        budget = f"/{self.budget}" if self.budget is not None else ''
+        print(f"\n📋 调度摘要：{summary}；TikHub 调用 {self.spent()}{budget} 次，用时 {elapsed:.1f}s")
+
+        skipped = [account for account in ordered if paths.get(id(account)) == 'skipped']
+        if skipped:
+            print(f"⏭️  跳过 {len(skipped)} 个账号：")
+            for account in skipped:
+                print(f"   {account['name']}：{rows[id(account)]['message']}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地快照库
+功能：以只追加方式记录每一次实时 / 历史接口观测到的粉丝数，
+供净增计算与报表直接读取，同时作为采集审计记录
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id          INTEGER PRIMARY KEY,
+    account     TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    date        TEXT NOT NULL,
+    fans_count  INTEGER NOT NULL,
+    fans_delta  INTEGER,
+    source      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_account_date ON snapshots (account, date, ts);
+CREATE INDEX IF NOT EXISTS idx_snapshots_account_ts ON snapshots (account, ts);
+"""
+
+INSERT_SQL = (
+    'INSERT INTO snapshots (account, ts, date, fans_count, fans_delta, source) '
+    'VALUES (?, ?, ?, ?, ?, ?)'
+)
+
+# 历史接口同一天的数据会被反复拉取，数值未变化时不再重复追加
+INSERT_CHANGED_SQL = (
+    'INSERT INTO snapshots (account, ts, date, fans_count, fans_delta, source) '
+    'SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS ('
+    'SELECT 1 FROM snapshots WHERE account = ? AND date = ? AND source = ? '
+    'AND fans_count = ? AND fans_delta IS ?)'
+)
+
+
+class SnapshotStore:
+    """
+    粉丝数快照的本地 SQLite 存储（只追加，不修改、不删除）
+
+    account 为账号的 sec_user_id（未配置时为账号名称）；ts 为观测时的 Unix 时间戳；
+    date 为数据所属日期。某一天的"收盘值"取该日期最后一次观测。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def append_many(self, account, rows, ts=None):
+        """
+        追加观测记录
+
+        Args:
+            rows: [{'date', 'fans_count', 'fans_delta', 'source'}, ...]，fans_delta 可缺省
+            ts: 观测时间，默认为当前时间
+        """
+        ts = ts or time.time()
+        realtime, history = [], []
+        for row in rows:
+            values = (account, ts, row['date'], int(row['fans_count']),
+                      None if row.get('fans_delta') is None else int(row['fans_delta']),
+                      row.get('source', 'realtime'))
+            if values[5] == 'history':
+                history.append(values + (account, values[2], values[5], values[3], values[4]))
+            else:
+                realtime.append(values)
+
+        with self._lock, self._conn:
+            if realtime:
+                self._conn.executemany(INSERT_SQL, realtime)
+            if history:
+                self._conn.executemany(INSERT_CHANGED_SQL, history)
+
+    def append_samples(self, rows):
+        """
+        批量追加日内采样（source 为 sample）
+
+        Args:
+            rows: 可迭代的 (account, ts, date, fans_count)
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                INSERT_SQL,
+                ((account, ts, date, fans_count, None, 'sample') for account, ts, date, fans_count in rows)
+            )
+
+    def latest(self, account, date):
+        """某日期最后一次观测，返回 {'fans_count', 'fans_delta', 'source', 'ts'} 或 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT fans_count, fans_delta, source, ts FROM snapshots '
+                'WHERE account = ? AND date = ? ORDER BY ts DESC, id DESC LIMIT 1',
+                (account, date)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'fans_count': row[0], 'fans_delta': row[1], 'source': row[2], 'ts': row[3]}
+
+    def last_dates(self):
+        """每个账号有观测记录的最近日期 {account: date}"""
+        with self._lock:
+            rows = self._conn.execute('SELECT account, MAX(date) FROM snapshots GROUP BY account').fetchall()
+        return dict(rows)
+
+    def daily(self, account, start_date, end_date):
+        """
+        日期区间（含两端）内每天的汇总
+
+        Returns:
+            list: 按日期升序的 [{'date', 'fans_count', 'fans_delta', 'high', 'low',
+                  'source', 'observations'}, ...]，fans_count 为当天最后一次观测
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, fans_count, fans_delta, source FROM snapshots '
+                'WHERE account = ? AND date BETWEEN ? AND ? ORDER BY date, ts, id',
+                (account, start_date, end_date)
+            ).fetchall()
+
+        days = {}
+        for date, fans_count, fans_delta, source in rows:
+            day = days.get(date)
+            if day is None:
+                day = days[date] = {'date': date, 'high': fans_count, 'low': fans_count, 'observations': 0}
+            day.update(fans_count=fans_count, fans_delta=fans_delta, source=source)
+            day['high'] = max(day['high'], fans_count)
+            day['low'] = min(day['low'], fans_count)
+            day['observations'] += 1
+
+        result = [days[date] for date in sorted(days)]
+        for previous, day in zip(result, result[1:]):
+            expected = (datetime.strptime(day['date'], '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+            if day['fans_delta'] is None and previous['date'] == expected:
+                day['fans_delta'] = day['fans_count'] - previous['fans_count']
+        return result
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集步骤的副作用描述
+功能：单账号的采集步骤（实时接口与对冲、历史接口、前一天粉丝数、去重、写入、通知）
+以生成器实现一次，生成器产出下列副作用并接收执行结果，
+由同步采集器（requests + 线程）与异步引擎（aiohttp + asyncio）各自的驱动执行，
+两条路径共用同一份步骤逻辑
+依赖：无（仅标准库）
+"""
+
+
+class Request:
+    """
+    一次 HTTP 请求
+
+    驱动执行后向步骤送回解析后的响应数据；HTTP 状态码 >= 400、响应不是合法 JSON 或传输失败时向步骤抛出异常。
+    feishu 为 True 时携带 tenant_access_token（token 失效时重新鉴权并重试一次）；
+    cancel 为 threading.Event，置位后请求不再发出或重试。
+    """
+
+    __slots__ = ('method', 'url', 'params', 'json', 'headers', 'timeout', 'idempotent', 'parse', 'cancel', 'feishu')
+
+    def __init__(self, method, url, params=None, json=None, headers=None, timeout=None, idempotent=None,
+                 parse=None, cancel=None, feishu=False):
+        self.method = method
+        self.url = url
+        self.params = params
+        self.json = json
+        self.headers = headers
+        self.timeout = timeout
+        self.idempotent = idempotent
+        self.parse = parse
+        self.cancel = cancel
+        self.feishu = feishu
+
+
+class Call:
+    """一次可能阻塞的本地调用（SQLite 读写、token 刷新等）；同步驱动直接调用，异步驱动在线程池中执行"""
+
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+
+class Launch:
+    """并发执行另一组步骤，驱动送回可等待的句柄（concurrent.futures.Future 或 asyncio.Task）"""
+
+    __slots__ = ('steps',)
+
+    def __init__(self, steps):
+        self.steps = steps
+
+
+class Wait:
+    """等待 pending 中任一句柄完成或超时（timeout 为 None 时一直等待），驱动送回 (已完成, 未完成) 两个集合"""
+
+    __slots__ = ('pending', 'timeout')
+
+    def __init__(self, pending, timeout=None):
+        self.pending = pending
+        self.timeout = timeout
+
+
+def handle_result(handle):
+    """已完成句柄的结果，句柄已被取消时为 None"""
+    return None if handle.cancelled() else handle.result()
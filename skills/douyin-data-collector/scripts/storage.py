@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地存储工具
+功能：本地缓存目录定位、跨进程文件锁
+"""
+
+import os
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# 带超时获取文件锁时的轮询间隔（秒）
+LOCK_POLL_INTERVAL = 0.5
+
+
+def cache_dir(config, config_path):
+    """
+    本地缓存目录，默认为 config.json 同级的 .cache 目录
+
+    可通过 config.json 的 cache.dir 指定，相对路径以 config.json 所在目录为基准。
+    """
+    path = Path(config.get('cache', {}).get('dir', '.cache'))
+    if not path.is_absolute():
+        path = Path(config_path).parent / path
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class FileLock:
+    """
+    基于 flock 的跨进程文件锁（Windows 下使用 msvcrt）
+
+    用法：
+        with FileLock(path):
+            ...
+
+        lock = FileLock(path)
+        if lock.acquire(timeout=30):
+            try:
+                ...
+            finally:
+                lock.release()
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self, blocking=True, timeout=None):
+        """
+        获取锁，非阻塞模式下获取失败返回 False
+
+        指定 timeout（秒）时最多等待 timeout 秒，超时返回 False
+        """
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            while not self.acquire(blocking=False):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                time.sleep(min(LOCK_POLL_INTERVAL, left))
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(self._file.fileno(), flags)
+            elif msvcrt is not None:
+                mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), mode, 1)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def release(self):
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise OSError(f"无法获取文件锁: {self.path}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def write_private_file(path, content):
+    """原子写入仅当前用户可读写的文件"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
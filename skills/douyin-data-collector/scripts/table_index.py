@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书多维表格本地索引
+功能：将目标表格的记录按（表格、账号、日期）镜像到本地 SQLite，
+替代逐日期的 records/search 远程查询
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    table_key   TEXT NOT NULL,
+    account     TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    record_id   TEXT NOT NULL,
+    fans_count  INTEGER,
+    fans_delta  INTEGER,
+    modified_at INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_key, account, date)
+);
+CREATE INDEX IF NOT EXISTS idx_records_record_id ON records (table_key, record_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_key    TEXT PRIMARY KEY,
+    synced_at    REAL NOT NULL,
+    max_modified INTEGER NOT NULL DEFAULT 0,
+    covered_from TEXT NOT NULL DEFAULT ''
+);
+"""
+
+UPSERT_SQL = (
+    'INSERT INTO records (table_key, account, date, record_id, fans_count, fans_delta, modified_at) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT (table_key, account, date) DO UPDATE SET '
+    'record_id = excluded.record_id, fans_count = excluded.fans_count, '
+    'fans_delta = excluded.fans_delta, modified_at = excluded.modified_at'
+)
+
+
+def field_text(value):
+    """将多维表格字段值（文本 / 公式 / 数字）转换为字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, dict):
+        if 'value' in value:
+            return field_text(value['value'])
+        return str(value.get('text', ''))
+    if isinstance(value, list):
+        return ''.join(field_text(v) for v in value)
+    return str(value)
+
+
+def field_number(value):
+    """将多维表格字段值（数字 / 公式）转换为整数，无法转换时返回 None"""
+    if value is None:
+        return None
+    if isinstance(value, dict) and 'value' in value:
+        return field_number(value['value'])
+    if isinstance(value, list):
+        return field_number(value[0]) if value else None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def record_date(fields):
+    """记录的统计日期（YYYY-MM-DD），优先读取统计日期文本，其次读取统计日期时间戳"""
+    text = field_text(fields.get('统计日期文本')).strip()
+    if text:
+        return text[:10]
+    timestamp = field_number(fields.get('统计日期'))
+    if timestamp:
+        return datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
+    return ''
+
+
+class BitableIndex:
+    """
+    多维表格记录的本地 SQLite 索引
+
+    table_key 为 "{app_token}/{table_id}"；未配置账号字段时 account 为空字符串。
+    sync_state.covered_from 为最近一次同步完整覆盖的起始日期（空字符串表示整张表），
+    早于该日期的记录可能不全。单个连接加锁供多线程共用，WAL 模式下多个进程可同时读写。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(sync_state)')}
+        if 'covered_from' not in columns:
+            # 旧版本只做全量同步，已有的同步状态覆盖整张表
+            self._conn.execute("ALTER TABLE sync_state ADD COLUMN covered_from TEXT NOT NULL DEFAULT ''")
+
+    def get(self, table_key, account, date):
+        """查询单条记录，返回 {'record_id', 'fans_count', 'fans_delta'} 或 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT record_id, fans_count, fans_delta FROM records '
+                'WHERE table_key = ? AND account = ? AND date = ?',
+                (table_key, account, date)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'record_id': row[0], 'fans_count': row[1], 'fans_delta': row[2]}
+
+    def records_between(self, table_key, account, start_date, end_date):
+        """日期区间（含两端）内的记录，返回 {date: {'record_id', 'fans_count', 'fans_delta'}}"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, record_id, fans_count, fans_delta FROM records '
+                'WHERE table_key = ? AND account = ? AND date BETWEEN ? AND ?',
+                (table_key, account, start_date, end_date)
+            ).fetchall()
+        return {date: {'record_id': record_id, 'fans_count': fans_count, 'fans_delta': fans_delta}
+                for date, record_id, fans_count, fans_delta in rows}
+
+    def upsert(self, table_key, account, date, record_id, fans_count, fans_delta, modified_at=None):
+        """写入或更新单条记录"""
+        self.upsert_many(table_key, [(account, date, record_id, fans_count, fans_delta, modified_at)])
+
+    def upsert_many(self, table_key, rows):
+        """
+        批量写入或更新记录
+
+        Args:
+            rows: [(account, date, record_id, fans_count, fans_delta, modified_at), ...]
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT_SQL, self._values(table_key, rows))
+
+    def replace_table(self, table_key, rows, max_modified, since=''):
+        """
+        以远程扫描结果替换该表格 since（含）之后的本地记录，since 为空字符串时替换全部记录
+
+        Args:
+            rows: 远程扫描到的统计日期不早于 since 的全部记录
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM records WHERE table_key = ? AND date >= ?', (table_key, since))
+            self._conn.executemany(UPSERT_SQL, self._values(table_key, rows))
+        self.mark_synced(table_key, max_modified, since)
+
+    @staticmethod
+    def _values(table_key, rows):
+        now = int(time.time() * 1000)
+        return [(table_key, account, date, record_id, fans_count, fans_delta, modified_at or now)
+                for account, date, record_id, fans_count, fans_delta, modified_at in rows]
+
+    def sync_state(self, table_key):
+        """返回 (synced_at, max_modified, covered_from)，从未同步时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT synced_at, max_modified, covered_from FROM sync_state WHERE table_key = ?',
+                (table_key,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def mark_synced(self, table_key, max_modified, covered_from=None):
+        """
+        记录同步时间与已同步到的最大修改时间
+
+        covered_from 为本次同步完整覆盖的起始日期；按修改时间增量同步时为 None，沿用原覆盖范围
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO sync_state (table_key, synced_at, max_modified, covered_from) '
+                "VALUES (?, ?, ?, COALESCE(?, '')) "
+                'ON CONFLICT (table_key) DO UPDATE SET synced_at = excluded.synced_at, '
+                'max_modified = MAX(sync_state.max_modified, excluded.max_modified), '
+                'covered_from = COALESCE(?, sync_state.covered_from)',
+                (table_key, time.time(), max_modified, covered_from, covered_from)
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
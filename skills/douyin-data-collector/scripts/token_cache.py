@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+飞书 tenant_access_token 本地缓存
+功能：跨进程、跨运行复用 token，避免每次采集都重新鉴权
+"""
+
+import json
+import time
+
+from storage import FileLock, write_private_file
+
+
+class TenantTokenCache:
+    """
+    tenant_access_token 文件缓存
+
+    文件内容按 app_id 分组：{"cli_xxx": {"token": "t-xxx", "expire_at": 1760000000}}
+    读写都在文件锁内完成，多个采集进程同时刷新时只有一个进程发起鉴权。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load(self, app_id):
+        """读取缓存的 token，返回 {'token': ..., 'expire_at': ...} 或 None（调用方需持有锁）"""
+        entry = self._read().get(app_id)
+        if not entry or not entry.get('token'):
+            return None
+        return entry
+
+    def save(self, app_id, token, expire_at):
+        """写入 token（调用方需持有锁）"""
+        data = self._read()
+        # 顺带清理已过期的其他应用 token
+        now = time.time()
+        data = {k: v for k, v in data.items() if v.get('expire_at', 0) > now}
+        data[app_id] = {'token': token, 'expire_at': expire_at}
+        write_private_file(self.path, json.dumps(data, ensure_ascii=False))
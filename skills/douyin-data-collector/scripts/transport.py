@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层
+功能：按主机维护 requests.Session 连接池（keep-alive），统一超时与重试策略
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limit import RateLimiter, quota_exhausted, throttle_delay
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# 服务端错误时自动重试的状态码；429 不在其中，交由 request() 暂停限流器后重试
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class RequestCancelled(requests.RequestException):
+    """请求在发出前被取消（对冲请求已有其他接口返回，或调用预算不足）"""
+
+
+class HttpTransport:
+    """
+    采集器共用的 HTTP 传输对象
+
+    每个主机（scheme + host + port）一个 Session，连接在多次调用、
+    多个账号、多个线程之间复用。Session 按请求是否幂等分为两组：
+    幂等请求在 5xx / 连接重置时按退避策略自动重试，非幂等请求
+    （如新增记录、发送消息）只在连接尚未建立时重试，避免重复写入。
+
+    配置项（config.json 的 http 段，均可选）：
+        pool_connections: 每个 Session 缓存的连接池数量
+        pool_maxsize: 每个连接池的最大连接数，应不小于并发数
+        connect_timeout / read_timeout: 连接 / 读取超时（秒）
+        retries: 最大重试次数
+        backoff_factor: 重试退避系数，第 n 次重试前等待 backoff_factor * 2^(n-1) 秒
+
+    每次请求前先向限流器申请令牌；服务端返回 429 或飞书限流错误码时，
+    按 Retry-After 等响应头暂停同组请求后重试，限流不计为接口失败。
+
+    传入 metrics 时，每次请求（含限流重试）的状态码、响应字节数与耗时都会被记录，
+    连接池内部的自动重试只计入请求数。
+    """
+
+    def __init__(self, options=None, limiter=None, metrics=None):
+        options = options or {}
+        self.limiter = limiter or RateLimiter()
+        self.metrics = metrics
+        self.pool_connections = int(options.get('pool_connections', DEFAULT_POOL_CONNECTIONS))
+        self.pool_maxsize = int(options.get('pool_maxsize', DEFAULT_POOL_MAXSIZE))
+        self.timeout = (
+            float(options.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+            float(options.get('read_timeout', DEFAULT_READ_TIMEOUT))
+        )
+        self.retries = int(options.get('retries', DEFAULT_RETRIES))
+        self.backoff_factor = float(options.get('backoff_factor', DEFAULT_BACKOFF_FACTOR))
+
+        # 可选的发送前检查：send_guard(url) 放行时返回释放函数 release(unknown)，拒绝时返回 None。
+        # 每次发送（含限流重试）前调用，请求结束后释放；发出后异常时 unknown 为 True（实际请求数未知）。
+        # 调度器以此实现调用预算的硬上限
+        self.send_guard = None
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _build_retry(self, idempotent):
+        """
+        构造 urllib3 重试策略
+
+        不遵循 Retry-After：否则 urllib3 会在连接池内部自行重试 429（及带 Retry-After 的 503），
+        在各个线程里分别等待，共享的令牌桶不会暂停，其他线程仍持续请求被限流的主机
+        """
+        allowed_methods = Retry.DEFAULT_ALLOWED_METHODS
+        if idempotent:
+            allowed_methods = allowed_methods | {'POST'}
+
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries if idempotent else 0,
+            status=self.retries if idempotent else 0,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=allowed_methods,
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+
+    def session_for(self, url, idempotent=True):
+        """获取目标主机对应的 Session（不存在时创建）"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, idempotent)
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=self._build_retry(idempotent)
+                )
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def request(self, method, url, idempotent=None, cancel=None, **kwargs):
+        """
+        发送请求
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            idempotent: 请求是否可安全重试，默认 GET 类请求为 True、POST 为 False
+            cancel: 可选的 threading.Event，置位后不再申请令牌或发出（含限流重试），抛出 RequestCancelled；
+                    已发出的请求无法中断，只能等待其返回或超时
+            **kwargs: 透传给 requests 的参数，未指定 timeout 时使用配置的超时
+        """
+        if idempotent is None:
+            idempotent = method.upper() in Retry.DEFAULT_ALLOWED_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session_for(url, idempotent)
+
+        for attempt in range(self.limiter.throttle_retries + 1):
+            # 申请令牌前后各检查一次：已取消的请求不申请令牌，等待令牌期间被取消的请求归还令牌、不再发出
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled(f"请求已取消: {url}")
+            guard = self.send_guard
+            release = guard(url) if guard is not None else None
+            if guard is not None and release is None:
+                raise RequestCancelled("调用预算不足，请求未发出")
+            sent = None
+            try:
+                self.limiter.acquire(url, cancel)
+                if cancel is not None and cancel.is_set():
+                    self.limiter.release(url)
+                    raise RequestCancelled(f"请求已取消: {url}")
+                sent = False
+                response = self._send(session, method, url, **kwargs)
+                sent = True
+            finally:
+                if release is not None:
+                    release(sent is False)
+
+            wait = self._throttle_wait(url, response)
+            if wait is None or attempt == self.limiter.throttle_retries:
+                return response
+
+            # 被限流的请求未被处理，非幂等请求同样可以安全重试
+            print(f"⏳ {urlsplit(url).hostname} 触发限流，{wait:.1f}s 后重试...")
+            if self.limiter.bucket_for(url) is None:
+                if cancel is not None:
+                    cancel.wait(wait)
+                else:
+                    time.sleep(wait)
+            else:
+                self.limiter.pause(url, wait)
+
+    def _send(self, session, method, url, **kwargs):
+        """发送单次请求，配置了 metrics 时记录耗时与结果"""
+        if self.metrics is None:
+            return session.request(method, url, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            self.metrics.http(method, url, None, 0, time.perf_counter() - started, type(e).__name__)
+            raise
+        # 连接池内部按 5xx / 连接重置重试过的请求同样计费，计入请求数（调用预算依赖此计数）
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            self.metrics.http_retries(method, url, retries.history)
+        # 未使用 stream 时响应体已读取完毕，content 不会产生额外的网络读取
+        self.metrics.http(method, url, response.status_code, len(response.content),
+                          time.perf_counter() - started)
+        return response
+
+    def _throttle_wait(self, url, response):
+        """响应为限流时返回需要等待的秒数；配额耗尽时暂停后续请求"""
+        body_code = None
+        if response.status_code in (400, 429):
+            try:
+                body_code = response.json().get('code')
+            except ValueError:
+                pass
+
+        wait = throttle_delay(response.status_code, response.headers, body_code)
+        if wait is None:
+            exhausted = quota_exhausted(response.headers)
+            if exhausted:
+                self.limiter.pause(url, exhausted)
+        return wait
+
+    def get(self, url, **kwargs):
+        """发送 GET 请求"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """发送 POST 请求"""
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """关闭全部连接"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
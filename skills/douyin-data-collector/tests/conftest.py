@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具：脚本目录加入导入路径，提供本地 TikHub / 飞书模拟服务与配置生成
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from mock_servers import FeishuMock, TikHubMock  # noqa: E402
+
+
+@pytest.fixture
+def feishu():
+    server = FeishuMock().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_config(tmp_path, feishu):
+    """
+    生成指向模拟服务的配置文件，返回路径
+
+    用法：make_config(tikhub, accounts=3, http={'retries': 2})，其余关键字参数按段合并
+    """
+    def make(tikhub, accounts=1, realtime=1, **sections):
+        config = {
+            'accounts': [{'name': f"acc{i}", 'sec_user_id': f"SID{i:04d}", 'kol_id': f"{7000 + i}"}
+                         for i in range(accounts)],
+            'tikhub': {
+                'api_key': 'test',
+                'realtime_api_urls': [f"{tikhub.base_url}/api/v1/douyin/web/handler_user_profile_v{i + 1}"
+                                      for i in range(realtime)],
+                'history_api_urls': [f"{tikhub.base_url}/api/v1/douyin/xingtu/kol_daily_fans_v1"],
+            },
+            'feishu': {
+                'app_id': 'cli_test', 'app_secret': 'test', 'app_token': 'bascnTest', 'table_id': 'tblTest',
+                'chat_id': 'oc_test', 'account_field': '账号', 'base_url': f"{feishu.base_url}/open-apis",
+            },
+            'http': {'backoff_factor': 0, 'read_timeout': 5},
+            'cache': {'dir': str(tmp_path / 'cache')},
+        }
+        for section, values in sections.items():
+            if isinstance(values, dict):
+                config.setdefault(section, {}).update(values)
+            else:
+                config[section] = values
+        path = tmp_path / 'config.json'
+        path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+        return path
+    return make
+
+
+@pytest.fixture
+def tikhub_factory():
+    """按故障配置启动 TikHub 模拟服务，测试结束后统一停止"""
+    servers = []
+
+    def start(faults=None):
+        server = TikHubMock(faults).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+账号配置校验测试
+运行：python3 -m pytest tests
+"""
+
+import json
+
+import pytest
+
+from collector import DouyinDataCollector
+
+
+def write_config(tmp_path, accounts, **feishu):
+    config = {
+        'accounts': accounts,
+        'tikhub': {'api_key': 'k', 'realtime_api_urls': ['http://127.0.0.1:1/realtime'],
+                   'history_api_urls': ['http://127.0.0.1:1/history']},
+        'feishu': {'app_id': 'x', 'app_secret': 'y', 'app_token': 'A', 'table_id': 'T', **feishu},
+        'cache': {'dir': str(tmp_path / 'cache')},
+    }
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(config), encoding='utf-8')
+    return path
+
+
+def collector(path):
+    instance = DouyinDataCollector(path)
+    instance.close()
+    return instance
+
+
+def test_shared_table_without_account_field_is_rejected(tmp_path, capsys):
+    path = write_config(tmp_path, [{'name': 'a', 'sec_user_id': 'S1'}, {'name': 'b', 'sec_user_id': 'S2'}])
+    with pytest.raises(SystemExit):
+        collector(path)
+    out = capsys.readouterr().out
+    assert 'feishu.account_field' in out
+    assert 'A/T: a、b' in out
+
+
+def test_shared_table_with_account_field(tmp_path):
+    path = write_config(tmp_path, [{'name': 'a', 'sec_user_id': 'S1'}, {'name': 'b', 'sec_user_id': 'S2'}],
+                        account_field='抖音账号')
+    assert [account['name'] for account in collector(path).accounts] == ['a', 'b']
+
+
+def test_separate_tables_without_account_field(tmp_path):
+    path = write_config(tmp_path, [{'name': 'a', 'sec_user_id': 'S1'},
+                                   {'name': 'b', 'sec_user_id': 'S2', 'table_id': 'T2'}])
+    assert len(collector(path).accounts) == 2
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步引擎测试：与同步采集器共用的采集步骤（对冲、前一天粉丝数、快照、写入）与调用预算
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from mock_servers import Faults
+
+from collector import DouyinDataCollector
+
+pytest.importorskip('aiohttp')
+from async_engine import AsyncDouyinCollector  # noqa: E402
+
+
+def expected_fans(sec_user_id):
+    return 10000 + sum(map(ord, sec_user_id))
+
+
+def day_ms(offset):
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - timedelta(days=offset)).timestamp() * 1000)
+
+
+@pytest.fixture
+def engine(tikhub_factory, make_config):
+    made = []
+
+    def make(tikhub=None, **sections):
+        collector = DouyinDataCollector(make_config(tikhub or tikhub_factory(), **sections))
+        made.append(collector)
+        return AsyncDouyinCollector(collector)
+    yield make
+    for collector in made:
+        collector.close()
+
+
+def test_previous_day_and_snapshot_shared_with_sync(engine, feishu):
+    feishu._create({'账号': 'acc0', '统计日期': day_ms(1), '抖音粉丝数': 10000, '抖音净新增': 1})
+    async_engine = engine()
+    row = async_engine.collect()
+    fans = expected_fans('SID0000')
+    assert row['success'] and row['fans_count'] == fans
+    assert row['fans_delta'] == fans - 10000
+    # 实时观测写入本地快照库，与同步采集器相同
+    collector = async_engine.collector
+    assert collector._snapshot_fans(collector.accounts[0], datetime.now().strftime('%Y-%m-%d')) == fans
+
+
+def test_upsert_updates_changed_fields(engine, feishu):
+    record_id = feishu._create({'账号': 'acc0', '统计日期': day_ms(0), '抖音粉丝数': 1, '抖音净新增': 0})['record_id']
+    async_engine = engine(feishu={'write_mode': 'upsert', 'idempotent_writes': False})
+    assert async_engine.collect()['success']
+    assert len(feishu.records) == 1
+    assert feishu.records[record_id]['抖音粉丝数'] == expected_fans('SID0000')
+
+
+def test_history_fallback(engine, tikhub_factory, feishu):
+    tikhub = tikhub_factory({'handler_user_profile': Faults(error_rate=1.0)})
+    row = engine(tikhub).collect()
+    assert row['success'] and row['source'] == 'history'
+    assert len(feishu.records) == 1
+
+
+def test_hedge_takes_the_faster_endpoint(engine, tikhub_factory):
+    tikhub = tikhub_factory({'handler_user_profile_v1': Faults(latency=2.0)})
+    async_engine = engine(tikhub, realtime=2)
+    async_engine.config['tikhub']['realtime_hedge'] = {'mode': 'hedge', 'delay': 0.05}
+    started = time.monotonic()
+    row = async_engine.collect()
+    assert row['success'] and row['fans_count'] == expected_fans('SID0000')
+    assert time.monotonic() - started < 1.5
+
+
+def test_send_guard_applies_to_async_requests(engine, tikhub_factory):
+    tikhub = tikhub_factory()
+    async_engine = engine(tikhub, accounts=2)
+    released = []
+
+    def guard(url):
+        # 只拒绝 TikHub 请求，与调度器的调用预算相同
+        if url.startswith(tikhub.base_url):
+            return None
+        return released.append
+
+    async_engine.collector.http.send_guard = guard
+    rows = async_engine.collect_all()
+    assert not any(row['success'] for row in rows)
+    assert sum(tikhub.counts.values()) == 0
+    assert released and not any(released)
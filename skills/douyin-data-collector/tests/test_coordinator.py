@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式采集协调测试：分片租约与 item 登记的续约、接手与失败重试
+"""
+
+import time
+from collections import Counter
+
+import pytest
+
+from coordinator import ITEM_BUSY, ITEM_DONE, ITEM_STARTED, DistributedRunner, LeaseKeeper, SQLiteCoordinator
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    instance = SQLiteCoordinator(tmp_path / 'coordinator.sqlite')
+    yield instance
+    instance.close()
+
+
+def test_item_registration_renewed_with_shard(coordinator):
+    lease = coordinator.claim('d', 1, 'a', 5)
+    assert coordinator.begin_item('d', 'x', 'a', 0.2) == ITEM_STARTED
+    assert coordinator.begin_item('d', 'y', 'a', 0.2) == ITEM_STARTED
+    assert coordinator.renew(lease, 5, ['x'])
+    time.sleep(0.3)
+    # x 随分片续期仍由 a 处理，未续期的 y 已过期可被接手
+    assert coordinator.begin_item('d', 'x', 'b', 5) == ITEM_BUSY
+    assert coordinator.begin_item('d', 'y', 'b', 5) == ITEM_STARTED
+
+
+def test_lost_lease_does_not_renew_items(coordinator):
+    lease = coordinator.claim('d', 1, 'a', 0.1)
+    coordinator.begin_item('d', 'x', 'a', 0.1)
+    time.sleep(0.2)
+    assert coordinator.claim('d', 1, 'b', 5).owner == 'b'
+    assert not coordinator.renew(lease, 5, ['x'])
+    assert coordinator.begin_item('d', 'x', 'b', 5) == ITEM_STARTED
+
+
+def test_stale_lease_cannot_mark_shard_done(coordinator):
+    stale = coordinator.claim('d', 1, 'a', 0.1)
+    time.sleep(0.2)
+    lease = coordinator.claim('d', 1, 'b', 5)
+    coordinator.release(stale, done=True)
+    assert coordinator.progress('d')['shards_done'] == 0
+    coordinator.release(lease, done=True)
+    assert coordinator.progress('d')['shards_done'] == 1
+    assert coordinator.claim('d', 1, 'a', 5) is None
+
+
+def test_failed_item_can_be_retried_but_done_item_cannot(coordinator):
+    coordinator.begin_item('d', 'x', 'a', 5)
+    coordinator.finish_item('d', 'x', 'a', False)
+    assert coordinator.begin_item('d', 'x', 'b', 5) == ITEM_STARTED
+    coordinator.finish_item('d', 'x', 'b', True)
+    assert coordinator.begin_item('d', 'x', 'a', 5) == ITEM_DONE
+
+
+def test_keeper_renews_held_items(coordinator):
+    lease = coordinator.claim('d', 1, 'a', 0.3)
+    coordinator.begin_item('d', 'x', 'a', 0.3)
+    with LeaseKeeper(coordinator, lease, 0.3) as keeper:
+        keeper.hold('x')
+        time.sleep(0.6)
+        assert keeper.alive()
+        assert coordinator.begin_item('d', 'x', 'b', 5) == ITEM_BUSY
+
+
+class FlakyCollector:
+    """采集器替身：每个账号前 failures[name] 次采集失败，记录每个账号的采集次数"""
+
+    def __init__(self, accounts, failures):
+        self.config = {}
+        self.config_path = None
+        self.accounts = [{'name': name} for name in accounts]
+        self.failures = failures
+        self.calls = Counter()
+
+    @staticmethod
+    def _account_key(account):
+        return account['name']
+
+    def collect_batch(self, accounts, target_date=None, workers=None, guard=None):
+        def collect(account):
+            self.calls[account['name']] += 1
+            return {'success': self.calls[account['name']] > self.failures.get(account['name'], 0)}
+        return [guard(account, collect) for account in accounts]
+
+
+def run(coordinator, collector, **options):
+    runner = DistributedRunner(collector, coordinator,
+                               {'shard_size': 2, 'poll_interval': 0, 'host': 'a', **options})
+    return runner.run(target_date='d')
+
+
+def test_failed_accounts_are_retried_in_the_run(coordinator):
+    collector = FlakyCollector(['a1', 'a2', 'a3'], {'a2': 1})
+    rows = run(coordinator, collector)
+    assert all(row['success'] for row in rows)
+    assert len(rows) == 3
+    assert collector.calls == {'a1': 1, 'a2': 2, 'a3': 1}
+
+
+def test_retries_stop_after_max_attempts(coordinator):
+    collector = FlakyCollector(['a1', 'a2'], {'a1': 99})
+    rows = run(coordinator, collector, max_attempts=2)
+    assert collector.calls == {'a1': 2, 'a2': 1}
+    assert [row['success'] for row in rows] == [True, False]
+    reopened = SQLiteCoordinator(coordinator.path)
+    try:
+        assert reopened.progress('d')['shards_done'] == 1
+    finally:
+        reopened.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 快速解析测试：快速路径与完整解析的结果一致
+"""
+
+import json
+import random
+
+import pytest
+
+import fast_json
+from bench_json import build_payload
+from fast_json import extract_profile, profile_fields
+
+
+def full(body):
+    return profile_fields(json.loads(body))
+
+
+CASES = [
+    # 常规响应
+    b'{"code":200,"time":"t","data":{"user":{"nickname":"a","follower_count":5}}}',
+    b'  {"code": 200, "data": {"user": {"follower_count": 5}}, "time": "t"}\n',
+    b'{"code":200,"data":{"status_code":0,"user":{"avatar":{"url_list":["x"]},"follower_count":5},"extra":{}}}',
+    # follower_count 不在 data.user 下
+    b'{"code":200,"time":"t","data":{"user":null,"similar":{"follower_count":5}}}',
+    b'{"code":200,"time":"t","data":{"user":{},"similar":{"follower_count":5}}}',
+    b'{"code":200,"time":"t","data":{"user":{"stats":{"follower_count":5}}}}',
+    b'{"code":200,"time":"t","data":{"list":[{"user":{"follower_count":5}}]}}',
+    b'{"code":200,"time":"t","user":{"follower_count":5},"data":{}}',
+    b'{"code":200,"time":"t","data":{"user":{"follower_count":5}},"data":{"user":{}}}',
+    b'{"code":200,"time":"t","data":{"user":{"follower_count":5},"user":null}}',
+    b'{"code":200,"time":"t","other":{"data":{"user":{"follower_count":5}}}}',
+    # code / time 不在顶层
+    b'{"data":{"code":200,"user":{"follower_count":5}}}',
+    b'{"code":200,"data":{"time":"t","user":{"follower_count":5}}}',
+    b'{"code":200,"data":{"user":{"follower_count":5}},"meta":{"time":"t"}}',
+    # 字符串中的括号与同名文本
+    b'{"code":200,"time":"t","data":{"note":"} {\\" [","user":{"bio":"\\"follower_count\\": 1 }","follower_count":5}}}',
+    # 错误响应与格式异常
+    b'{"code":400,"message":"bad","data":{"user":{"follower_count":5}}}',
+    b'{"code":200,"time":"t","data":{"user":{"follower_count":"5"}}}',
+    b'{"code":200,"time":null,"data":{"user":{"follower_count":5}}}',
+    b'{"code":200,"data":{"user":{"follower_count":5,"follower_count":6}}}',
+    b'{"code":200,"data":"none"}',
+    b'[1, 2]',
+]
+
+
+@pytest.mark.parametrize('body', CASES)
+def test_matches_full_parse(body):
+    assert extract_profile(body) == full(body)
+
+
+def test_benchmark_payload_uses_fast_path(monkeypatch):
+    body = build_payload(50)
+    expected = full(body)
+
+    def fail(body):
+        raise AssertionError('不应回退到完整解析')
+    monkeypatch.setattr(fast_json, 'loads', fail)
+    assert extract_profile(body) == expected
+
+
+def test_random_nesting_matches_full_parse():
+    rng = random.Random(7)
+
+    def noise(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice([1, 'x"}{', None, [], {}])
+        if rng.random() < 0.5:
+            return [noise(depth - 1) for _ in range(rng.randint(0, 3))]
+        keys = ['follower_count', 'user', 'data', 'time', 'code', 'k']
+        return {rng.choice(keys): noise(depth - 1) for _ in range(rng.randint(0, 3))}
+
+    for _ in range(500):
+        user = rng.choice([{'follower_count': rng.randint(0, 10 ** 6), 'x': noise(2)}, noise(3), None])
+        payload = {'code': rng.choice([200, 200, 500]), 'data': {'a': noise(2), 'user': user, 'b': noise(2)}}
+        if rng.random() < 0.8:
+            payload['time'] = 't'
+        items = list(payload.items()) + [('extra', noise(3))]
+        rng.shuffle(items)
+        body = json.dumps(dict(items)).encode()
+        assert extract_profile(body) == full(body), body
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+汇总通知测试：分段内容、卡片大小上限与拆分、按群组发送
+"""
+
+import json
+
+from collector import DouyinDataCollector
+from notify import NotificationDigest
+
+
+def result(name, fans=1000, delta=0, success=True, message='ok'):
+    return {'account': name, 'success': success, 'date': '2026-10-17' if success else '',
+            'fans_count': fans if success else None, 'fans_delta': delta if success else None,
+            'source': 'realtime' if success else '', 'message': message}
+
+
+def digest(rows, **options):
+    instance = NotificationDigest('日报', options)
+    for row in rows:
+        instance.add(row)
+    return instance
+
+
+def card_text(card):
+    return '\n'.join(element['text']['content'] for element in card['elements'] if element['tag'] == 'div')
+
+
+def test_sections_totals_rankings_and_failures():
+    rows = [result('a', 1000, 50), result('b', 2000, -20), result('c', 3000, 0),
+            result('d', success=False, message='所有接口均失败')]
+    sections = dict(digest(rows, top=1).sections())
+    assert sections['合计'] == ["账号 **4** 个：成功 **3**，失败 **1**", "粉丝总数 **6,000**，合计净增 **+30**"]
+    assert sections['涨粉 Top 1'] == ['a  1,000（+50）  2026-10-17']
+    assert sections['掉粉 Top 1'] == ['b  2,000（-20）  2026-10-17']
+    assert sections['失败 1 个'] == ['d：所有接口均失败']
+    assert len(sections['明细']) == 3
+
+
+def test_small_digest_is_one_card():
+    cards = digest([result('a'), result('b')]).cards()
+    assert len(cards) == 1
+    assert cards[0]['header']['title']['content'] == '日报'
+    assert cards[0]['header']['template'] == 'green'
+
+
+def test_large_digest_is_split_under_max_bytes():
+    rows = [result(f"账号{i:04d}", 1000 + i, i % 7 - 3) for i in range(600)]
+    rows.append(result('失败账号', success=False, message='数据写入失败'))
+    cards = digest(rows, max_bytes=8000).cards()
+    assert len(cards) > 1
+    for idx, card in enumerate(cards):
+        assert len(json.dumps(card, ensure_ascii=False).encode('utf-8')) <= 8000
+        assert card['header']['title']['content'] == f"日报（{idx + 1}/{len(cards)}）"
+        assert card['header']['template'] == 'orange'
+    lines = '\n'.join(card_text(card) for card in cards).split('\n')
+    # 拆分不丢行也不重复：去掉分段标题后与 sections() 的内容逐行一致，被拆开的分段以“（续）”继续
+    expected = [line for _, section in digest(rows).sections() for line in section]
+    assert [line for line in lines if not line.startswith('**')] == expected
+    assert '**明细（续）**' in lines
+
+
+def test_send_digest_groups_by_chat(tikhub_factory, make_config, feishu):
+    collector = DouyinDataCollector(make_config(tikhub_factory(), accounts=3))
+    try:
+        collector.accounts[2]['chat_id'] = 'oc_other'
+        collector.get_feishu_tenant_token()
+        rows = [result(account['name']) for account in collector.accounts]
+        assert collector.send_digest(collector.accounts, rows, '日报') == 2
+    finally:
+        collector.close()
+    assert feishu.counts['/open-apis/im/v1/messages'] == 2
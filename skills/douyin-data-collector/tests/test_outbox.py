@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写入发件箱测试：入队去重、容量压缩与失败写入的幂等重放
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from mock_servers import Faults
+
+from collector import DouyinDataCollector
+from outbox import WriteOutbox
+
+
+def row(date, fans=100, delta=1):
+    return {'date': date, 'fans_count': fans, 'fans_delta': delta, 'source': 'realtime'}
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    instance = WriteOutbox(tmp_path / 'outbox.sqlite')
+    yield instance
+    instance.close()
+
+
+def test_enqueue_keeps_latest_payload_per_day(outbox):
+    first = outbox.enqueue([('T', 'a', row('2026-10-01', 100))])
+    outbox.mark_done(first)
+    assert outbox.pending() == {}
+    # 同一天重新入队：id 不变，以最新数据为准并重新变为待写入
+    assert outbox.enqueue([('T', 'a', row('2026-10-01', 120))]) == first
+    assert outbox.pending() == {('T', 'a'): [(first[0], row('2026-10-01', 120))]}
+
+
+def test_mark_failed_keeps_pending(outbox):
+    ids = outbox.enqueue([('T', 'a', row('2026-10-01')), ('T', 'a', row('2026-10-02'))])
+    outbox.mark_failed(ids, 'HTTP 500')
+    assert [record_id for record_id, _ in outbox.pending()[('T', 'a')]] == ids
+
+
+def test_compact_drops_done_before_pending(outbox):
+    done = outbox.enqueue([('T', 'a', row(f'2026-10-0{day}')) for day in range(1, 4)])
+    outbox.mark_done(done)
+    time.sleep(0.01)
+    outbox.enqueue([('T', 'b', row(f'2026-10-0{day}')) for day in range(1, 4)])
+    assert outbox.compact(max_rows=4) == 0
+    assert outbox.compact(max_rows=2) == 1
+    assert len(outbox.pending()[('T', 'b')]) == 2
+
+
+@pytest.fixture
+def collector(tikhub_factory, make_config):
+    made = []
+
+    def make(**sections):
+        instance = DouyinDataCollector(make_config(tikhub_factory(), **sections))
+        made.append(instance)
+        return instance
+    yield make
+    for instance in made:
+        instance.close()
+
+
+def today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def test_failed_write_is_replayed_once(collector, feishu):
+    # 新增记录接口全部失败（查询正常），写入失败的数据留在发件箱
+    feishu.faults = {'/records/search': Faults(), '/records': Faults(error_rate=1.0)}
+    first = collector()
+    assert not first.collect()['success']
+    assert feishu.records == {}
+    first.close()
+
+    feishu.faults = {}
+    second = collector()
+    assert second.replay_outbox() == 1
+    assert len(feishu.records) == 1
+    # 再次重放没有待写入数据，也不会重复写入
+    assert second.replay_outbox() == 0
+    assert len(feishu.records) == 1
+
+
+def test_replay_skips_records_written_before_the_response_was_lost(collector, feishu):
+    c = collector()
+    account = c.accounts[0]
+    data = row(today(), 5000)
+    c._outbox_enqueue([(account, data)])
+    feishu._create(c._record_fields(account, data))
+    assert c.replay_outbox() == 1
+    assert len(feishu.records) == 1
+    assert c._outbox().pending() == {}
+
+
+def test_replay_updates_changed_fields_in_upsert_mode(collector, feishu):
+    c = collector(feishu={'write_mode': 'upsert'})
+    account = c.accounts[0]
+    record_id = feishu._create(c._record_fields(account, row(today(), 5000)))['record_id']
+    c._outbox_enqueue([(account, row(today(), 5100))])
+    assert c.replay_outbox() == 1
+    assert len(feishu.records) == 1
+    assert feishu.records[record_id]['抖音粉丝数'] == 5100
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日调度器测试：截止时间解析与调用预算上限
+"""
+
+from datetime import datetime
+
+from mock_servers import Faults
+
+from collector import DouyinDataCollector
+from scheduler import DailyScheduler
+
+
+def at(text):
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S')
+
+
+def deadline(value, **kwargs):
+    return datetime.fromtimestamp(DailyScheduler.resolve_deadline(value, **kwargs))
+
+
+def test_deadline_later_today():
+    assert deadline('12:00', now=at('2026-10-17 09:00:00')) == at('2026-10-17 12:00:00')
+
+
+def test_deadline_after_start_is_tomorrow():
+    # 12:30 的 cron 运行稍晚启动，截止 12:30 不应视为已超时
+    assert deadline('12:30', now=at('2026-10-17 12:30:05')) == at('2026-10-18 12:30:00')
+    assert deadline('12:00', now=at('2026-10-17 21:00:00')) == at('2026-10-18 12:00:00')
+
+
+def test_deadline_same_meaning_for_daemon_and_manual():
+    for start in ('2026-10-17 09:00:00', '2026-10-17 12:30:00', '2026-10-17 23:10:00'):
+        assert deadline('12:30', slot=at(start)) == deadline('12:30', now=at(start))
+
+
+def test_daemon_deadline_ignores_jitter():
+    # 12:00 的时间点随机延后到 12:04 才开始，截止 12:05 仍指当天
+    assert deadline('12:05', now=at('2026-10-17 12:04:00'), slot=at('2026-10-17 12:00:00')) == \
+        at('2026-10-17 12:05:00')
+
+
+def test_no_deadline_by_default(tikhub_factory, make_config):
+    collector = DouyinDataCollector(make_config(tikhub_factory()))
+    try:
+        assert DailyScheduler(collector, options={}).deadline is None
+    finally:
+        collector.close()
+
+
+def run_budget(tikhub, make_config, budget, accounts=3):
+    collector = DouyinDataCollector(make_config(tikhub, accounts=accounts, http={'retries': 2}))
+    try:
+        scheduler = DailyScheduler(collector, options={}, workers=2, budget=budget)
+        rows = scheduler.run()
+        return scheduler, rows
+    finally:
+        collector.close()
+
+
+def test_budget_is_a_hard_cap_with_transport_retries(tikhub_factory, make_config):
+    # 实时与历史接口均返回 500，每次调用连同自动重试发出 3 个请求
+    for budget in (2, 3, 6, 9):
+        tikhub = tikhub_factory({'*': Faults(error_rate=1.0)})
+        scheduler, rows = run_budget(tikhub, make_config, budget)
+        sent = sum(tikhub.counts.values())
+        assert sent <= budget
+        assert scheduler.spent() == sent
+        assert not any(row['success'] for row in rows)
+
+
+def test_budget_too_small_for_one_call_skips_everything(tikhub_factory, make_config):
+    tikhub = tikhub_factory({'*': Faults(error_rate=1.0)})
+    _, rows = run_budget(tikhub, make_config, 2)
+    assert sum(tikhub.counts.values()) == 0
+    assert all('调用预算已用尽' in row['message'] for row in rows)
+
+
+def test_budget_enough_collects_all(tikhub_factory, make_config, feishu):
+    tikhub = tikhub_factory()
+    scheduler, rows = run_budget(tikhub, make_config, 100)
+    assert all(row['success'] for row in rows)
+    assert scheduler.spent() == sum(tikhub.counts.values()) == 3
+    assert len(feishu.records) == 3
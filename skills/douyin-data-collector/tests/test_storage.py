@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地存储工具测试：文件锁与运行锁
+"""
+
+import time
+
+from collector import main
+from storage import FileLock
+
+
+def test_file_lock_timeout(tmp_path):
+    holder = FileLock(tmp_path / 'run.lock')
+    assert holder.acquire(blocking=False)
+    try:
+        started = time.monotonic()
+        assert not FileLock(tmp_path / 'run.lock').acquire(timeout=0.3)
+        assert time.monotonic() - started >= 0.3
+    finally:
+        holder.release()
+    lock = FileLock(tmp_path / 'run.lock')
+    assert lock.acquire(timeout=0.3)
+    lock.release()
+
+
+def test_overlapping_run_is_skipped(tikhub_factory, make_config, feishu, capsys):
+    path = make_config(tikhub_factory())
+    holder = FileLock(path.parent / 'cache' / 'run.lock')
+    assert holder.acquire(blocking=False)
+    try:
+        assert main(['--config', str(path)]) == 0
+        assert main(['--config', str(path), '--lock-wait', '0.2']) == 0
+    finally:
+        holder.release()
+    out = capsys.readouterr().out
+    assert out.count('本次跳过') == 2
+    assert not feishu.records
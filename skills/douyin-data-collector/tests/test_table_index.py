@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地表格索引测试：按日期窗口同步、覆盖范围与旧版本数据库升级
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from collector import DouyinDataCollector
+from table_index import BitableIndex
+
+
+def day(offset):
+    return (datetime.now() - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def seed(feishu, accounts, days):
+    """为每个账号写入最近 days 天（不含今天）的记录"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(accounts):
+        for offset in range(1, days + 1):
+            feishu._create({'账号': f"acc{i}", '统计日期': int((today - timedelta(days=offset)).timestamp() * 1000),
+                            '抖音粉丝数': 1000 + offset, '抖音净新增': 1})
+
+
+def searches(feishu):
+    return sum(count for path, count in feishu.counts.items() if path.endswith('/records/search'))
+
+
+@pytest.fixture
+def collector(tikhub_factory, make_config, feishu):
+    def make(accounts=2, **index):
+        instance = DouyinDataCollector(make_config(tikhub_factory(), accounts=accounts,
+                                                   feishu={'index': {'window_days': 10, **index}}))
+        instance.get_feishu_tenant_token()
+        made.append(instance)
+        return instance
+    made = []
+    yield make
+    for instance in made:
+        instance.close()
+
+
+def test_sync_scans_only_the_window(collector, feishu):
+    seed(feishu, 2, 100)
+    c = collector()
+    assert c.sync_table_index()
+    index = c._table_index()
+    table_key = c._table_key(c.accounts[0])
+    assert index.sync_state(table_key)[2] == day(10)
+    assert len(index.records_between(table_key, 'acc0', '0000-00-00', '9999-99-99')) == 10
+    assert searches(feishu) == 1
+
+
+def test_miss_inside_window_is_authoritative(collector, feishu):
+    seed(feishu, 2, 30)
+    c = collector()
+    account = c.accounts[0]
+    assert c.find_record(day(3), account)['fans_count'] == 1003
+    feishu.counts.clear()
+    # 今天没有记录：窗口内未命中无需远程查询
+    assert c.find_record(day(0), account) is None
+    assert searches(feishu) == 0
+    # 早于窗口的日期回退到远程查询
+    assert c.find_record(day(20), account)['fans_count'] == 1020
+    assert searches(feishu) == 1
+
+
+def test_full_sync_covers_whole_table(collector, feishu):
+    seed(feishu, 1, 30)
+    c = collector(accounts=1)
+    assert c.sync_table_index(full=True)
+    assert c._index_fresh(c.accounts[0], day(29))
+
+
+def test_window_sync_drops_deleted_records(collector, feishu):
+    seed(feishu, 1, 5)
+    c = collector(accounts=1)
+    assert c.sync_table_index()
+    record_id = next(iter(feishu.records))
+    del feishu.records[record_id]
+    assert c.sync_table_index()
+    table_key = c._table_key(c.accounts[0])
+    assert len(c._table_index().records_between(table_key, 'acc0', day(10), day(0))) == 4
+
+
+def test_stale_index_does_not_preempt_batch_prefetch(collector, feishu):
+    seed(feishu, 20, 60)
+    c = collector(accounts=20)
+    feishu.counts.clear()
+    covered = c.prefetch_records(c.accounts, [day(1), day(0)])
+    assert covered == {c._table_key(c.accounts[0])}
+    # 只有预查询，没有同步整个窗口
+    assert searches(feishu) == 1
+    assert c._local_record(c.accounts[5], day(1))[1]['fans_count'] == 1001
+    assert c._local_record(c.accounts[5], day(0)) == ('批量预查询', None)
+
+
+def test_fresh_index_skips_prefetch(collector, feishu):
+    seed(feishu, 3, 5)
+    c = collector(accounts=3)
+    assert c.sync_table_index()
+    feishu.counts.clear()
+    c.prefetch_records(c.accounts, [day(1), day(0)])
+    assert searches(feishu) == 0
+
+
+def test_upgrade_keeps_old_sync_state(tmp_path):
+    path = tmp_path / 'bitable_index.sqlite'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE sync_state (table_key TEXT PRIMARY KEY, synced_at REAL NOT NULL,
+                                 max_modified INTEGER NOT NULL DEFAULT 0);
+        INSERT INTO sync_state VALUES ('A/T', 1.0, 5);
+    """)
+    conn.close()
+    index = BitableIndex(path)
+    try:
+        assert index.sync_state('A/T') == (1.0, 5, '')
+        index.mark_synced('A/T', 3)
+        assert index.sync_state('A/T')[1:] == (5, '')
+        index.replace_table('A/T', [], 0, '2026-01-01')
+        assert index.sync_state('A/T')[2] == '2026-01-01'
+    finally:
+        index.close()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层测试：限流重试、发送前检查与取消
+"""
+
+import threading
+
+import pytest
+
+from mock_servers import MockServer
+from rate_limit import RateLimiter
+from transport import HttpTransport, RequestCancelled
+
+
+class ThrottledMock(MockServer):
+    """前 throttled 个请求返回 429（Retry-After: 0），之后返回 200"""
+
+    def __init__(self, throttled):
+        super().__init__()
+        self.throttled = throttled
+
+    def route(self, method, path, query, body):
+        if sum(self.counts.values()) <= self.throttled:
+            return 429, {'code': 429}
+        return 200, {'code': 200}
+
+
+@pytest.fixture
+def throttled():
+    servers = []
+
+    def start(count):
+        server = ThrottledMock(count).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def transport():
+    return HttpTransport({'backoff_factor': 0}, RateLimiter({'throttle_retries': 3}))
+
+
+def test_throttled_request_is_resent(throttled):
+    server = throttled(2)
+    http = transport()
+    assert http.get(f"{server.base_url}/x").status_code == 200
+    assert sum(server.counts.values()) == 3
+
+
+def test_send_guard_checked_before_every_resend(throttled):
+    server = throttled(5)
+    http = transport()
+    allowed = iter([True, True, False])
+    released = []
+
+    def guard(url):
+        if not next(allowed):
+            return None
+        return released.append
+
+    http.send_guard = guard
+    with pytest.raises(RequestCancelled):
+        http.get(f"{server.base_url}/x")
+    # 第三次发送前被拒绝，只发出两次
+    assert sum(server.counts.values()) == 2
+    assert released == [False, False]
+
+
+def test_cancelled_request_is_not_sent(throttled):
+    server = throttled(0)
+    http = transport()
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestCancelled):
+        http.get(f"{server.base_url}/x", cancel=cancel)
+    assert sum(server.counts.values()) == 0
+
+
+def test_cancelled_request_does_not_take_a_token(throttled):
+    server = throttled(0)
+    limiter = RateLimiter({'127.0.0.1': {'rate': 1, 'burst': 1}})
+    http = HttpTransport({'backoff_factor': 0}, limiter)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestCancelled):
+        http.get(f"{server.base_url}/x", cancel=cancel)
+    # 令牌仍在桶中，下一个请求无需等待
+    assert limiter.bucket_for(server.base_url).reserve() == 0
+
+
+def test_request_cancelled_while_waiting_for_a_token_returns_it(throttled):
+    server = throttled(0)
+    limiter = RateLimiter({'127.0.0.1': {'rate': 0.5, 'burst': 1}})
+    http = HttpTransport({'backoff_factor': 0}, limiter)
+    http.get(f"{server.base_url}/x")
+
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    with pytest.raises(RequestCancelled):
+        http.get(f"{server.base_url}/x", cancel=cancel)
+    assert sum(server.counts.values()) == 1
+    # 归还后桶中的欠额只剩第一次请求之后的补充时间，不再叠加被取消的请求
+    assert limiter.bucket_for(server.base_url).reserve() < 2.0